@@ -0,0 +1,33 @@
+// Loads an axon map written by axon_map.py through include/AxonMap.h and prints what it sees, one line per
+// array: "<name> <count> <id> <id> ...". Exits 1 with the loader's error when the map is rejected.
+// Built and run by test_axon_map.py.
+
+#include <cstdio>
+#include "AxonMap.h"
+
+static void printArray(const char* name, const uint32_t* ids, uint32_t count) {
+    std::printf("%s %u", name, count);
+    for (uint32_t i = 0; i < count; i++) {
+        std::printf(" %u", ids[i]);
+    }
+    std::printf("\n");
+}
+
+int main(int argc, char** argv) {
+    if (argc != 2) {
+        std::fprintf(stderr, "usage: %s AXON_MAP\n", argv[0]);
+        return 2;
+    }
+    AxonMap map;
+    if (!map.load(argv[1])) {
+        std::printf("error %s\n", map.error().c_str());
+        return 1;
+    }
+    printArray("input_axons", map.inputAxons(), map.numInputs());
+    printArray("input_chips", map.inputChips(), map.numInputs());
+    printArray("input_cores", map.inputCores(), map.numInputs());
+    printArray("output_axons", map.outputAxons(), map.numOutputs());
+    printArray("output_chips", map.outputChips(), map.numOutputs());
+    printArray("output_cores", map.outputCores(), map.numOutputs());
+    return 0;
+}
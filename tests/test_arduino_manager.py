@@ -0,0 +1,192 @@
+"""
+Runs dummy-pipeline-1.0's arduino_manager against a fake `arduino-cli` on PATH that logs its calls, to check
+the board list parsing and which runs compile and upload. The fake compile keeps the FIRMWARE_ID it was given
+and the fake upload "flashes" it to board.id, which the board query reads back. The query itself is checked
+against a pty answering like arduino/arduino.ino.
+"""
+import os
+import pty
+import sys
+import tty
+import json
+import stat
+import select
+import threading
+import pytest
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(REPO, 'tutorials', 'dummy-pipeline-1.0'))
+import arduino_manager
+
+FQBN = "arduino:avr:leonardo"
+PORT = "/dev/ttyACM0"
+
+FAKE_CLI = """#!{python}
+import os, sys, json, shutil
+here = os.path.dirname(__file__)
+args = sys.argv[1:]
+with open(os.path.join(here, "calls.jsonl"), "a") as log:
+    log.write(json.dumps(args) + "\\n")
+command = args[0]
+status = int(os.environ.get("FAKE_" + command.upper() + "_STATUS", "0"))
+if command == "board":
+    print(json.dumps({{"detected_ports": [
+        {{"port": {{"address": "/dev/ttyS0", "protocol": "serial"}}}},
+        {{"port": {{"address": "{port}", "protocol": "serial"}},
+         "matching_boards": [{{"name": "Arduino Leonardo", "fqbn": "{fqbn}"}}]}}]}}))
+elif command == "compile" and status == 0:
+    flag = args[args.index("--build-property") + 1]
+    with open(os.path.join(args[args.index("--output-dir") + 1], "firmware.id"), "w") as f:
+        f.write(flag.rpartition("=")[2])
+elif command == "upload":
+    # A failed upload leaves the board without a sketch
+    if os.path.exists(os.path.join(here, "board.id")):
+        os.remove(os.path.join(here, "board.id"))
+    if status == 0:
+        shutil.copy(os.path.join(args[args.index("--input-dir") + 1], "firmware.id"), os.path.join(here, "board.id"))
+sys.exit(status)
+"""
+
+
+@pytest.fixture
+def cli(tmp_path, monkeypatch):
+    """The fake arduino-cli's directory, first on PATH. Returns a function reading the calls made so far."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "arduino-cli"
+    script.write_text(FAKE_CLI.format(python=sys.executable, port=PORT, fqbn=FQBN))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.delenv("ARDUINO_FORCE_UPLOAD", raising=False)
+    monkeypatch.setattr(arduino_manager, "ARDUINO_CLI", "arduino-cli")
+    monkeypatch.setattr(arduino_manager, "FIRMWARE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(arduino_manager, "_board_list_cache", None)
+
+    def board_firmware_id(port):
+        # The sketch answers with the id it was compiled with, anything else on the board does not answer
+        assert port == PORT
+        flashed = bin_dir / "board.id"
+        return int(flashed.read_text().rstrip("ULL"), 16) if flashed.exists() else None
+    monkeypatch.setattr(arduino_manager, "board_firmware_id", board_firmware_id)
+
+    def calls():
+        log = bin_dir / "calls.jsonl"
+        if not log.exists():
+            return []
+        return [json.loads(line)[0] for line in log.read_text().splitlines()]
+    return calls
+
+
+@pytest.fixture
+def sketch(tmp_path):
+    sketch_dir = tmp_path / "arduino"
+    sketch_dir.mkdir()
+    ino = sketch_dir / "arduino.ino"
+    ino.write_text("void setup() {}\nvoid loop() {}\n")
+    return ino
+
+
+def test_board_list_is_parsed_once_per_session(cli):
+    assert arduino_manager.detect_board_and_port() == (FQBN, PORT)
+    assert arduino_manager.detect_board_and_port() == (FQBN, PORT)
+    assert arduino_manager.detect_board_and_port("Arduino Uno") == (None, None)
+    assert cli() == ["board"]
+
+
+def test_unchanged_firmware_skips_compile_and_upload(cli, sketch):
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload"]
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload"]
+
+
+def test_changed_sketch_rebuilds_and_old_build_is_reused(cli, sketch):
+    original = sketch.read_text()
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    sketch.write_text(original + "// changed\n")
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload", "compile", "upload"]
+    # Back to the first version: its build is cached, only the upload is needed
+    sketch.write_text(original)
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload", "compile", "upload", "upload"]
+
+
+def test_failed_upload_is_retried(cli, sketch, monkeypatch):
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    monkeypatch.setenv("FAKE_UPLOAD_STATUS", "1")
+    assert not arduino_manager.compile_and_upload(str(sketch), FQBN, PORT, force=True)
+    monkeypatch.delenv("FAKE_UPLOAD_STATUS")
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload", "compile", "upload", "upload"]
+
+
+def test_failed_compile_is_not_cached(cli, sketch, monkeypatch):
+    monkeypatch.setenv("FAKE_COMPILE_STATUS", "1")
+    assert not arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    monkeypatch.delenv("FAKE_COMPILE_STATUS")
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "compile", "upload"]
+
+
+def test_force_upload_env_recompiles(cli, sketch, monkeypatch):
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    monkeypatch.setenv("ARDUINO_FORCE_UPLOAD", "1")
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload", "compile", "upload"]
+
+
+def test_board_flashed_with_other_firmware_gets_the_sketch_again(cli, sketch, tmp_path):
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    # pinpong flashed Firmata for the oscillator tutorial, which does not answer the query
+    (tmp_path / "bin" / "board.id").unlink()
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    assert cli() == ["compile", "upload", "upload"]
+
+
+def test_compiled_id_is_the_sketch_hash(cli, sketch, tmp_path):
+    assert arduino_manager.compile_and_upload(str(sketch), FQBN, PORT)
+    sketch_hash = arduino_manager.firmware_hash(str(sketch), FQBN)
+    flashed = (tmp_path / "bin" / "board.id").read_text()
+    assert flashed == f"0x{sketch_hash[:16]}ULL"
+
+
+@pytest.fixture
+def board():
+    """A pty answering the firmware query like arduino/arduino.ino. Returns (port, set_id, bytes received)."""
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    state = {"id": None, "received": bytearray()}
+    done = threading.Event()
+
+    def sketch():
+        while not done.is_set():
+            if not select.select([master], [], [], 0.01)[0]:
+                continue
+            state["received"] += os.read(master, 64)
+            if state["received"].endswith(arduino_manager.FIRMWARE_QUERY) and state["id"] is not None:
+                os.write(master, arduino_manager.FIRMWARE_REPLY + state["id"].to_bytes(8, "little"))
+    thread = threading.Thread(target=sketch, daemon=True)
+    thread.start()
+    yield os.ttyname(slave), state
+    done.set()
+    thread.join()
+    os.close(master)
+    os.close(slave)
+
+
+def test_board_reports_its_firmware_id(board):
+    port, state = board
+    state["id"] = 0x0123456789ABCDEF
+    assert arduino_manager.board_firmware_id(port) == 0x0123456789ABCDEF
+    assert bytes(state["received"]) == arduino_manager.FIRMWARE_QUERY
+
+
+def test_silent_board_has_no_firmware_id(board):
+    port, state = board
+    assert arduino_manager.board_firmware_id(port, timeout=0.1) is None
+    assert bytes(state["received"]) == arduino_manager.FIRMWARE_QUERY
+
+
+def test_missing_port_has_no_firmware_id(tmp_path):
+    assert arduino_manager.board_firmware_id(str(tmp_path / "ttyACM9"), timeout=0.1) is None
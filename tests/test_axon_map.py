@@ -0,0 +1,137 @@
+"""
+Checks the binary axon map layout on both sides: axon_map.py round trips and header checks, and
+include/AxonMap.h (built from axon_map_check.cpp) reading a file written by Python.
+"""
+import os
+import sys
+import shutil
+import subprocess
+import numpy as np
+import pytest
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PIPELINE = os.path.join(REPO, 'tutorials', 'dummy-pipeline-2.0')
+sys.path.append(PIPELINE)
+from axon_map import write_axon_map, read_axon_map, HEADER_DTYPE, MAGIC, VERSION
+
+CHECK_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'axon_map_check.cpp')
+CXX = os.environ.get("CXX") or shutil.which("g++") or shutil.which("clang++")
+
+MAP = dict(input_axons=[7, 70000, 3], output_axons=[11, 12],
+           input_chips=[0, 1, 2], input_cores=[4, 5, 6], output_chips=[1, 1], output_cores=[127, 0])
+
+
+@pytest.fixture
+def map_path(tmp_path):
+    path = str(tmp_path / "axons.bin")
+    write_axon_map(path, **MAP)
+    return path
+
+
+def patch_header(path, field, value):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    header[field] = value
+    with open(path, "r+b") as f:
+        header.tofile(f)
+
+
+def test_round_trip(map_path):
+    loaded = read_axon_map(map_path)
+    for name, ids in MAP.items():
+        assert getattr(loaded, name).tolist() == ids
+        assert getattr(loaded, name).dtype == np.dtype("<u4")
+
+
+def test_chips_and_cores_default_to_zero(tmp_path):
+    path = str(tmp_path / "axons.bin")
+    write_axon_map(path, [1, 2], [3])
+    loaded = read_axon_map(path)
+    assert loaded.input_chips.tolist() == [0, 0] and loaded.output_cores.tolist() == [0]
+
+
+def test_empty_map(tmp_path):
+    path = str(tmp_path / "axons.bin")
+    write_axon_map(path, [], [])
+    assert os.path.getsize(path) == HEADER_DTYPE.itemsize
+    assert all(ids.size == 0 for ids in read_axon_map(path))
+
+
+def test_header_layout(map_path):
+    raw = open(map_path, "rb").read()
+    assert raw[:4] == MAGIC
+    assert int.from_bytes(raw[4:6], "little") == VERSION
+    assert int.from_bytes(raw[6:8], "little") == 32
+    assert int.from_bytes(raw[8:12], "little") == 3
+    assert int.from_bytes(raw[12:16], "little") == 2
+    assert raw[16:32] == bytes(16)
+    assert len(raw) == 32 + 4 * 3 * (3 + 2)
+    # Input axon IDs come first, little-endian uint32
+    assert int.from_bytes(raw[36:40], "little") == 70000
+
+
+def test_bad_ids_are_rejected(tmp_path):
+    path = str(tmp_path / "axons.bin")
+    with pytest.raises(ValueError):
+        write_axon_map(path, [1, 2], [3], input_chips=[0])
+    with pytest.raises(ValueError):
+        write_axon_map(path, [-1], [3])
+    with pytest.raises(ValueError):
+        write_axon_map(path, [1 << 32], [3])
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("field,value,message", [("magic", b"NOPE", "not an axon map"),
+                                                 ("version", VERSION + 1, "version"),
+                                                 ("num_outputs", 3, "bytes, expected")])
+def test_bad_header_is_rejected(map_path, field, value, message):
+    patch_header(map_path, field, value)
+    with pytest.raises(ValueError, match=message):
+        read_axon_map(map_path)
+
+
+def test_truncated_file_is_rejected(map_path):
+    with open(map_path, "r+b") as f:
+        f.truncate(16)
+    with pytest.raises(ValueError, match="too short"):
+        read_axon_map(map_path)
+
+
+@pytest.fixture(scope="module")
+def axon_map_check(tmp_path_factory):
+    if CXX is None:
+        pytest.skip("no C++ compiler")
+    binary = str(tmp_path_factory.mktemp("cpp") / "axon_map_check")
+    subprocess.run([CXX, "-std=c++11", "-Wall", "-Werror", "-I", os.path.join(PIPELINE, "include"),
+                    CHECK_SOURCE, "-o", binary], check=True)
+    return binary
+
+
+def run_check(binary, path):
+    result = subprocess.run([binary, path], capture_output=True, text=True)
+    return result.returncode, result.stdout
+
+
+def test_cpp_reads_python_map(axon_map_check, map_path):
+    returncode, output = run_check(axon_map_check, map_path)
+    assert returncode == 0, output
+    seen = {}
+    for line in output.splitlines():
+        name, count, *ids = line.split()
+        assert int(count) == len(ids)
+        seen[name] = [int(i) for i in ids]
+    assert seen == MAP
+
+
+@pytest.mark.parametrize("field,value,message", [("magic", b"NOPE", "not an axon map"),
+                                                 ("version", VERSION + 1, "version"),
+                                                 ("num_inputs", 4, "bytes, expected"),
+                                                 ("header_size", 16, "bytes, expected")])
+def test_cpp_rejects_bad_header(axon_map_check, map_path, field, value, message):
+    patch_header(map_path, field, value)
+    returncode, output = run_check(axon_map_check, map_path)
+    assert returncode == 1 and message in output
+
+
+def test_cpp_rejects_missing_file(axon_map_check, tmp_path):
+    returncode, output = run_check(axon_map_check, str(tmp_path / "missing.bin"))
+    assert returncode == 1 and "unable to open" in output
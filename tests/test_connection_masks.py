@@ -0,0 +1,25 @@
+"""
+utils/connection_masks.py: the default port i <-> neuron i mask and the shape check.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.connection_masks import identity_mask, connection_mask
+
+
+def test_identity_mask_pairs_sources_and_destinations():
+    mask = identity_mask(3, 5)
+    assert mask.format == "csr"
+    assert mask.toarray().tolist() == np.eye(3, 5, dtype=int).tolist()
+
+
+def test_default_and_given_masks():
+    assert connection_mask(None, 4, 2).shape == (4, 2)
+    given = np.ones((4, 2), dtype=int)
+    assert connection_mask(given, 4, 2) is given
+    with pytest.raises(ValueError, match=r"\(2, 4\), expected"):
+        connection_mask(given.T, 4, 2)
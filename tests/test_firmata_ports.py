@@ -0,0 +1,94 @@
+"""
+utils/firmata_ports.py against a transport that collects the bytes: port messages, coalescing of pin changes and
+the token bucket rate cap, on a fake clock.
+"""
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils import firmata_ports
+from utils.firmata_ports import (FirmataPortBackend, port_message, link_message_rate, DIGITAL_MESSAGE, SET_PIN_MODE,
+                                 PIN_MODE_OUTPUT, MAX_BURST_MESSAGES)
+
+
+class Transport:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+    def messages(self):
+        """Every 3 byte message written, in order."""
+        data = b"".join(self.writes)
+        return [data[i:i + 3] for i in range(0, len(data), 3)]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(firmata_ports, "time", clock)
+    return clock
+
+
+def test_port_message_bytes():
+    assert port_message(0, 0b00000001) == bytes([DIGITAL_MESSAGE, 0x01, 0x00])
+    # Pin 7 of the port goes in the second data byte, pin 8 is port 1
+    assert port_message(1, 0b10000001) == bytes([DIGITAL_MESSAGE | 1, 0x01, 0x01])
+    assert port_message(2, 0xFF) == bytes([DIGITAL_MESSAGE | 2, 0x7F, 0x01])
+    assert link_message_rate(57600) == 1920
+
+
+def test_setup_sets_the_pin_mode():
+    transport = Transport()
+    FirmataPortBackend(transport).setup(13)
+    assert transport.writes == [bytes([SET_PIN_MODE, 13, PIN_MODE_OUTPUT])]
+
+
+def test_changes_of_one_port_coalesce_into_one_message():
+    transport = Transport()
+    backend = FirmataPortBackend(transport)
+    backend.write_pins({2: 1, 3: 1, 5: 1, 9: 1})
+    # One write per call, one message per touched port
+    assert transport.writes == [port_message(0, 0b101100) + port_message(1, 0b10)]
+    assert (backend.pin_writes, backend.port_writes, backend.coalesced) == (4, 2, 2)
+    backend.write_pins({3: 0})
+    assert transport.messages()[-1] == port_message(0, 0b100100)
+    assert backend.pending == 0
+
+
+def test_burst_is_capped(clock):
+    transport = Transport()
+    backend = FirmataPortBackend(transport, max_messages_per_sec=100)
+    clock.now += 60  # long idle, the bucket only fills to MAX_BURST_MESSAGES
+    backend.write_pins({port * 8: 1 for port in range(MAX_BURST_MESSAGES + 3)})
+    assert len(transport.messages()) == MAX_BURST_MESSAGES
+    assert backend.pending == 3
+
+
+def test_held_back_ports_absorb_changes_until_flushed(clock):
+    transport = Transport()
+    backend = FirmataPortBackend(transport, max_messages_per_sec=100)
+    backend.write_pins({0: 1, 8: 1})  # one token to start with, port 1 waits
+    assert transport.messages() == [port_message(0, 1)]
+    assert backend.pending == 1
+    backend.write_pins({9: 1})
+    backend.flush()
+    assert len(transport.messages()) == 1  # no time has passed, no token
+    clock.now += 0.015  # one and a half tokens at 100 messages/sec
+    backend.flush()
+    # Both changes of port 1 go out in one message
+    assert transport.messages() == [port_message(0, 1), port_message(1, 0b11)]
+    assert backend.pending == 0
+    assert (backend.pin_writes, backend.port_writes) == (3, 2)
+    backend.flush()
+    assert len(transport.writes) == 2  # nothing dirty, nothing written
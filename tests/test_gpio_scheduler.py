@@ -0,0 +1,60 @@
+"""
+utils/gpio_scheduler.py stepped with advance() against utils.harness.FakePinBackend: every pulse reaches the
+backend, however many ticks one advance() call covers.
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.gpio_scheduler import GpioScheduler
+from utils.harness import FakePinBackend
+
+
+def levels_written(backend, pin):
+    return [value for _, p, value in backend.edges if p == pin]
+
+
+def test_pulse_within_one_advance_reaches_the_backend():
+    backend = FakePinBackend()
+    gpio = GpioScheduler(backend)
+    now = gpio.now_tick()
+    gpio.blink(2, 0.003)
+    assert gpio.advance(now + 10) == 2
+    assert levels_written(backend, 2) == [1, 0]
+    assert len(backend.pulses(2)) == 1
+    assert backend.write_calls == 2 and gpio.edges_written == 2
+    assert backend.levels[2] == 0
+
+
+def test_pulses_on_two_pins_keep_their_tick_order():
+    backend = FakePinBackend()
+    gpio = GpioScheduler(backend)
+    now = gpio.now_tick()
+    gpio.blink(2, 0.002)
+    gpio.blink(3, 0.005)
+    gpio.advance(now + 20)
+    # Both on in the first tick's write, pin 2 off before pin 3
+    assert [(pin, value) for _, pin, value in backend.edges] == [(2, 1), (3, 1), (2, 0), (3, 0)]
+    assert backend.write_calls == 3
+
+
+def test_step_by_step_matches_one_advance():
+    backend = FakePinBackend()
+    gpio = GpioScheduler(backend)
+    now = gpio.now_tick()
+    gpio.blink(2, 0.003)
+    writes = [gpio.advance(now + step) for step in range(1, 11)]
+    assert sum(writes) == 2
+    assert levels_written(backend, 2) == [1, 0]
+
+
+def test_merged_blink_extends_the_pulse():
+    backend = FakePinBackend()
+    gpio = GpioScheduler(backend)
+    now = gpio.now_tick()
+    gpio.blink(2, 0.003)
+    gpio.advance(now + 2)
+    gpio.blink(2, 0.005)
+    gpio.advance(now + 20)
+    assert gpio.blinks_merged == 1
+    assert levels_written(backend, 2) == [1, 0]
@@ -0,0 +1,140 @@
+"""
+dummy-pipeline-2.0's host_snip_cache.py with a stub build.sh: the cache key, hits, failed builds, and the real
+build.sh configuring CMake in a directory of its own per cache key.
+"""
+import os
+import sys
+import stat
+import shutil
+import subprocess
+import pytest
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PIPELINE = os.path.join(REPO, 'tutorials', 'dummy-pipeline-2.0')
+sys.path.append(PIPELINE)
+import host_snip_cache
+
+STUB_BUILD = """#!/usr/bin/env bash
+echo "$@" >> "$(dirname "$0")/builds.log"
+[ -n "$FAIL_BUILD" ] && exit 1
+mkdir -p "$HOST_SNIP_OUTPUT_DIR/cmake-build"
+echo "library" > "$HOST_SNIP_OUTPUT_DIR/libhost_snip.so"
+"""
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """A pipeline directory with host snip sources and the stub build.sh, and an empty cache."""
+    root = tmp_path / "pipeline"
+    write(root / "host_snip.cpp", "int run() { return 0; }\n")
+    write(root / "CMakeLists.txt", "project(host_snip)\n")
+    write(root / "include" / "Logging.h", "#pragma once\n")
+    write(root / "snips" / "topology.h", "#define NUM_INPUTS 2\n")
+    write(root / "snips" / "topology_ports.h", "#define INPUT_AXON_0 7\n")
+    write(root / "build.sh", STUB_BUILD)
+    monkeypatch.setattr(host_snip_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("FAIL_BUILD", raising=False)
+    return root
+
+
+def builds(root):
+    log = root / "builds.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_key_follows_sources_and_flags(root, monkeypatch):
+    key = host_snip_cache.build_hash(str(root))
+    assert host_snip_cache.build_hash(str(root)) == key
+    # Regenerated after every compile, not compiled into the library
+    write(root / "snips" / "topology_ports.h", "#define INPUT_AXON_0 8\n")
+    write(root / "notes.txt", "not a source\n")
+    assert host_snip_cache.build_hash(str(root)) == key
+    write(root / "snips" / "topology.h", "#define NUM_INPUTS 3\n")
+    changed = host_snip_cache.build_hash(str(root))
+    assert changed != key
+    monkeypatch.setenv("CXXFLAGS", "-O3")
+    assert host_snip_cache.build_hash(str(root)) not in (key, changed)
+
+
+def test_miss_builds_once_then_hits(root):
+    lib = host_snip_cache.build_library(str(root))
+    key = host_snip_cache.build_hash(str(root))
+    assert lib == os.path.join(host_snip_cache.CACHE_DIR, key, host_snip_cache.LIBRARY_NAME)
+    assert os.listdir(os.path.dirname(lib)) == [host_snip_cache.LIBRARY_NAME]  # build tree removed
+    assert host_snip_cache.build_library(str(root)) == lib
+    assert builds(root) == ["lib"]
+    assert host_snip_cache.build_library(str(root), force=True) == lib
+    assert builds(root) == ["lib", "lib"]
+
+
+def test_changed_source_builds_and_old_key_is_reused(root):
+    first = host_snip_cache.build_library(str(root))
+    write(root / "host_snip.cpp", "int run() { return 1; }\n")
+    second = host_snip_cache.build_library(str(root))
+    assert second != first
+    write(root / "host_snip.cpp", "int run() { return 0; }\n")
+    assert host_snip_cache.build_library(str(root)) == first
+    assert builds(root) == ["lib", "lib"]
+
+
+def test_failed_build_leaves_nothing_behind(root, monkeypatch):
+    monkeypatch.setenv("FAIL_BUILD", "1")
+    with pytest.raises(subprocess.CalledProcessError):
+        host_snip_cache.build_library(str(root))
+    assert os.listdir(host_snip_cache.CACHE_DIR) == []
+    assert host_snip_cache.cached_library(host_snip_cache.build_hash(str(root))) is None
+
+
+def test_old_entries_are_pruned(root, monkeypatch):
+    monkeypatch.setattr(host_snip_cache, "MAX_CACHED_LIBRARIES", 2)
+    for version in range(3):
+        write(root / "host_snip.cpp", f"int run() {{ return {version}; }}\n")
+        host_snip_cache.build_library(str(root))
+    assert len(os.listdir(host_snip_cache.CACHE_DIR)) == 2
+
+
+FAKE_TOOLS = {
+    # build.sh asks python3 where nxsdk lives and copies its headers
+    "python3": '#!/usr/bin/env bash\necho "[\'$FAKE_NXSDK\']"\n',
+    "cmake": '#!/usr/bin/env bash\necho "$PWD $*" >> "$TOOL_LOG"\n'
+             'for arg in "$@"; do case "$arg" in -DHOST_SNIP_OUTPUT_DIR=*) echo "${arg#*=}" > output_dir;; esac; done\n',
+    "make": '#!/usr/bin/env bash\necho "$PWD make" >> "$TOOL_LOG"\n'
+            'mkdir -p "$(cat output_dir)" && echo library > "$(cat output_dir)/libhost_snip.so"\n',
+}
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    for name, script in FAKE_TOOLS.items():
+        write(bin_dir / name, script)
+        (bin_dir / name).chmod((bin_dir / name).stat().st_mode | stat.S_IEXEC)
+    nxsdk = tmp_path / "nxsdk"
+    write(nxsdk / "include" / "nxsdkhost.h", "#pragma once\n")
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_NXSDK", str(nxsdk))
+    monkeypatch.setenv("TOOL_LOG", str(tmp_path / "tools.log"))
+    return tmp_path / "tools.log"
+
+
+def test_build_script_configures_per_output_dir(tmp_path, fake_tools):
+    source = tmp_path / "source"
+    source.mkdir()
+    shutil.copy(os.path.join(PIPELINE, "build.sh"), source / "build.sh")
+    outputs = [tmp_path / "cache" / key for key in ("key1.tmp-1", "key2.tmp-2")]
+    for output in outputs:
+        subprocess.run(["/bin/bash", str(source / "build.sh"), "lib"], check=True, capture_output=True,
+                       env=dict(os.environ, HOST_SNIP_OUTPUT_DIR=str(output)))
+    tools = fake_tools.read_text().splitlines()
+    for output in outputs:
+        build_dir = output / host_snip_cache.BUILD_SUBDIR
+        assert f"{build_dir} -DHOST_SNIP_OUTPUT_DIR={output} {source}" in tools
+        assert (build_dir / "includes" / "nxsdk" / "include" / "nxsdkhost.h").exists()
+        assert (output / host_snip_cache.LIBRARY_NAME).exists()
+    # The shared build/ in the source tree is left alone
+    assert not (source / "build").exists()
@@ -0,0 +1,87 @@
+"""
+dummy-pipeline-1.0's latency_trace.py on known stamps: the stage rings, the hop pairing and the percentiles.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+                             'tutorials', 'dummy-pipeline-1.0'))
+import latency_trace
+from latency_trace import (LatencyTracer, LatencyHistogram, SERIAL_RX, ENCODER_WRITE, DECODER_READ, SERIAL_TX,
+                           SUB_BUCKET_BITS)
+
+
+@pytest.fixture
+def stamp_at(monkeypatch):
+    """stamp_at(tracer, stage, seq, t) stamps with perf_counter_ns() returning t."""
+    def stamp(tracer, stage, seq, t):
+        monkeypatch.setattr(latency_trace.time, "perf_counter_ns", lambda: t)
+        tracer.stamp(stage, seq)
+    return stamp
+
+
+@pytest.fixture
+def tracer(stamp_at):
+    # Two spikes from the Teensy, each read back from the decoder after its injection
+    tracer = LatencyTracer(capacity=16)
+    for stage, seq, t in [(SERIAL_RX, 0, 1000), (ENCODER_WRITE, 0, 1500), (DECODER_READ, 10, 1700),
+                          (SERIAL_TX, 10, 1900), (SERIAL_RX, 1, 2000), (ENCODER_WRITE, 1, 2600),
+                          (DECODER_READ, 11, 5000), (SERIAL_TX, 11, 5300)]:
+        stamp_at(tracer, stage, seq, t)
+    return tracer
+
+
+def test_ring_keeps_the_newest_stamps_oldest_first(stamp_at):
+    tracer = LatencyTracer(capacity=4)
+    for seq in range(6):
+        stamp_at(tracer, SERIAL_RX, seq, 100 * seq)
+    seqs, times = tracer.events(SERIAL_RX)
+    assert seqs.tolist() == [2, 3, 4, 5]
+    assert times.tolist() == [200, 300, 400, 500]
+    assert tracer.events(SERIAL_TX)[0].size == 0
+
+
+def test_hops_pair_the_stamps(tracer):
+    hops = {hop: latencies.tolist() for hop, latencies in tracer.hop_latencies().items()}
+    assert hops == {
+        "serial_rx -> encoder_write": [500, 600],
+        # Each read pairs with the latest injection before it
+        "encoder_write -> decoder_read": [200, 2400],
+        "decoder_read -> serial_tx": [200, 300],
+        "serial_rx -> serial_tx": [900, 3300],
+    }
+
+
+def test_unmatched_stamps_are_left_out(tracer, stamp_at):
+    # Read from the decoder but never sent back to the Teensy
+    stamp_at(tracer, DECODER_READ, 12, 6000)
+    hops = tracer.hop_latencies()
+    assert hops["decoder_read -> serial_tx"].tolist() == [200, 300]
+    assert hops["serial_rx -> serial_tx"].tolist() == [900, 3300]
+
+
+def test_summary(tracer):
+    lines = tracer.summary().splitlines()
+    assert lines[0] == "Latency trace [us]:"
+    e2e = next(line for line in lines if "serial_rx -> serial_tx" in line)
+    assert "n=2" in e2e and "p50=      0.9" in e2e and "max=      3.3" in e2e
+    assert "no events" in LatencyTracer(capacity=4).summary()
+
+
+def test_percentiles_are_exact_for_small_values():
+    hist = LatencyHistogram(np.arange(1, 101))
+    assert (hist.percentile(50), hist.percentile(99), hist.percentile(100)) == (50, 99, 100)
+    assert hist.total == 100 and hist.max == 100
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_percentiles_of_large_values_stay_within_a_bucket():
+    values = np.array([10 ** 6] * 90 + [5 * 10 ** 7] * 10)
+    hist = LatencyHistogram()
+    hist.record_many(values[:50])
+    hist.record_many(values[50:])
+    assert abs(hist.percentile(50) - 10 ** 6) <= 10 ** 6 / (1 << SUB_BUCKET_BITS)
+    assert abs(hist.percentile(99) - 5 * 10 ** 7) <= 5 * 10 ** 7 / (1 << SUB_BUCKET_BITS)
+    assert hist.percentile(100) == hist.max == 5 * 10 ** 7
@@ -0,0 +1,81 @@
+"""
+The analytic oscillator in tutorials/oscillator/OscGenProcess.py: spike timing, the duration of a run and the
+analytic mode of OscillatorBank.
+"""
+import os
+import sys
+import time
+import queue
+import numpy as np
+
+sys.path.append(os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')), 'tutorials', 'oscillator'))
+from OscGenProcess import oscillator, OscillatorBank
+
+
+def test_next_spike_time_respects_t_end_at_the_rate_cap():
+    # 500 Hz at the peak, every spike is held back by maxDT alone
+    osc = oscillator(500, 0.5, np.pi / 2)
+    assert osc.next_spike_time(0.0) == osc.maxDT
+    assert osc.next_spike_time(0.098, t_end=0.1) is None
+    assert osc.next_spike_time(0.09, t_end=0.1) == 0.09 + osc.maxDT
+
+
+def test_run_stops_at_its_duration():
+    spikes = queue.Queue()
+    osc = oscillator(500, 0.5, np.pi / 2, duration=0.1, spike_queue=spikes)
+    start = time.perf_counter()
+    osc.run()
+    osc.thread.join(2.0)
+    assert not osc.thread.is_alive()
+    assert time.perf_counter() - start < 0.3
+    # At most one spike per maxDT, all of them within the duration
+    assert spikes.qsize() <= round(0.1 / osc.maxDT)
+
+
+def brute_force_schedule(osc, duration, step=1e-6):
+    """The spike train from the definition on a fine time grid: the first t at least maxDT after t_last that crosses."""
+    grid = np.arange(1, int(duration / step) + 1) * step
+    times, t_last = [], 0.0
+    while True:
+        later = grid[grid >= t_last + osc.maxDT - step / 2]
+        crossed = np.flatnonzero(osc._spike_margin(later, t_last) > 0)
+        if not crossed.size:
+            return np.asarray(times)
+        t_last = later[crossed[0]]
+        times.append(t_last)
+
+
+def test_spike_schedule_stays_within_its_duration():
+    # 500 Hz, the schedule ends while the maxDT cap holds back every spike
+    osc = oscillator(500, 0.5, 2.0)
+    times, neuron_ids = osc.spike_schedule(0.1025)
+    assert times.size and times.max() <= 0.1025
+    assert np.all(np.diff(times) >= osc.maxDT - 1e-12)
+    expected = brute_force_schedule(osc, 0.1025)
+    assert times.size == expected.size
+    assert np.allclose(times, expected, atol=2e-6)
+    assert neuron_ids.tolist() == osc.neuron_ids(times).tolist()
+
+
+def test_bank_analytic_mode_sends_the_merged_member_schedules():
+    duration, tick = 0.15, 2e-3
+    spikes = queue.Queue()
+    bank = OscillatorBank([300, 500, 400], [2.0, 3.0, 5.0], [0.5, 2.0, 4.0], duration=duration,
+                          spike_queue=spikes, tick=tick)
+    bank.run(analytic=True)
+    bank.thread.join(2.0)
+    assert not bank.thread.is_alive()
+    batches = [spikes.get() for _ in range(spikes.qsize())]
+    assert len(batches) == bank.batches_sent
+
+    expected = []
+    for i, member in enumerate(bank.members):
+        times, neuron_ids = member.spike_schedule()
+        expected += zip(bank.neuron_map[i, neuron_ids].tolist(), times.tolist())
+    sent = [spike for batch in batches for spike in batch]
+    assert len(sent) == bank.spikes_sent > 0
+    assert sorted(sent, key=lambda s: (s[1], s[0])) == sorted(expected, key=lambda s: (s[1], s[0]))
+    # A batch holds the spikes due within one tick of its first
+    for batch in batches:
+        times = [t for _, t in batch]
+        assert max(times) - min(times) <= tick
@@ -0,0 +1,73 @@
+"""
+dummy-pipeline-1.0's pipeline_log.py: records come out in order, and a reader lapped by the writers resumes at
+the oldest record the ring still holds.
+"""
+import io
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+                             'tutorials', 'dummy-pipeline-1.0'))
+import pipeline_log
+from pipeline_log import PipelineLogger, DEBUG, INFO
+
+
+@pytest.fixture(autouse=True)
+def no_background_flush(monkeypatch):
+    # The writer thread only drains on close(), so the tests decide when the ring is read
+    monkeypatch.setattr(pipeline_log, "FLUSH_INTERVAL", 60.0)
+
+
+def lines(stream):
+    return stream.getvalue().splitlines()
+
+
+def test_records_are_written_in_order():
+    stream = io.StringIO()
+    logs = PipelineLogger(capacity=8, stream=stream)
+    log = logs.get_logger("encoder", DEBUG)
+    for i in range(5):
+        log.debug("value %d", i)
+    log.info("done")
+    logs.close()
+    assert lines(stream) == [f"[DEBUG] encoder: value {i}" for i in range(5)] + ["[INFO] encoder: done"]
+    assert logs.dropped_count == 0
+
+
+def test_disabled_level_appends_nothing():
+    stream = io.StringIO()
+    logs = PipelineLogger(capacity=8, stream=stream)
+    log = logs.get_logger("serial", INFO)
+    log.debug("hidden %d", 1)
+    logs.close()
+    assert stream.getvalue() == ""
+
+
+def test_lapped_reader_keeps_the_newest_records():
+    stream = io.StringIO()
+    logs = PipelineLogger(capacity=8, stream=stream)
+    log = logs.get_logger("decoder", DEBUG)
+    for i in range(20):
+        log.debug("record %d", i)
+    logs.flush()
+    # The ring holds records 12..19, only 0..11 were overwritten
+    assert lines(stream) == [f"[DEBUG] decoder: record {i}" for i in range(12, 20)]
+    assert logs.dropped_count == 12
+    logs.close()
+    assert lines(stream)[-1] == "[WARN] pipeline_log: 12 records dropped"
+
+
+def test_lapped_after_a_partial_read():
+    stream = io.StringIO()
+    logs = PipelineLogger(capacity=8, stream=stream)
+    log = logs.get_logger("decoder", DEBUG)
+    for i in range(3):
+        log.debug("record %d", i)
+    logs.flush()
+    for i in range(3, 30):
+        log.debug("record %d", i)
+    logs.flush()
+    assert lines(stream) == [f"[DEBUG] decoder: record {i}" for i in list(range(3)) + list(range(22, 30))]
+    assert logs.dropped_count == 19
+    logs.close()
@@ -0,0 +1,52 @@
+"""
+utils/resource_tables.py against a fake net whose resourceMap is a new object on every read, as nxsdk may do.
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.resource_tables import resource_tables
+
+
+class FakeResourceMap:
+    def __init__(self, net):
+        self.net = net
+
+    def compartment(self, node_id):
+        self.net.queries += 1
+        return (0, 0, self.net.core, node_id, 1, 2)
+
+    def inputAxon(self, node_id):
+        self.net.queries += 1
+        return [(0, 0, self.net.core, 100 + node_id), (0, 0, 9, 9)]
+
+    def synapse(self, node_id):
+        self.net.queries += 1
+        return (0, 0, self.net.core, 200 + node_id)
+
+
+class FakeNet:
+    def __init__(self):
+        self.queries = 0
+        self.core = 3
+
+    @property
+    def resourceMap(self):
+        return FakeResourceMap(self)
+
+
+def test_cache_hits_when_resource_map_is_a_new_object_per_read():
+    net, board = FakeNet(), object()
+    assert resource_tables(net, board).compartments([4, 2])["compartmentId"].tolist() == [4, 2]
+    assert resource_tables(net, board).compartments([2, 4, 4])["coreId"].tolist() == [3, 3, 3]
+    assert resource_tables(net).input_axons([1])["axonId"].tolist() == [101]
+    assert resource_tables(net, board) is resource_tables(net)
+    assert net.queries == 3
+
+
+def test_recompile_rebuilds_the_tables():
+    net = FakeNet()
+    assert resource_tables(net, object()).output_axons([5])["coreId"].tolist() == [3]
+    net.core = 7  # the compiler placed the network elsewhere
+    assert resource_tables(net, object()).output_axons([5])["coreId"].tolist() == [7]
+    assert net.queries == 2
@@ -0,0 +1,99 @@
+"""
+utils/shm_ring.py: the shared-memory ring behind the 1.0 --multiprocess mode and the oscillator's process mode.
+"""
+import os
+import sys
+import time
+import queue
+import multiprocessing
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.shm_ring import SharedRingBuffer
+
+COUNT = 5000
+
+
+def test_messages_keep_their_order_and_length():
+    ring = SharedRingBuffer(capacity=4, slot_size=8)
+    for message in (b"a", b"", b"12345678"):
+        ring.put(message)
+    assert ring.qsize() == 3
+    assert [ring.get(), ring.get(), ring.get()] == [b"a", b"", b"12345678"]
+    assert ring.empty()
+
+
+def test_wraparound():
+    ring = SharedRingBuffer(capacity=3, slot_size=4)
+    received = []
+    for i in range(10):
+        ring.put(i.to_bytes(4, "little"))
+        ring.put((i + 100).to_bytes(4, "little"))
+        received.append(int.from_bytes(ring.get(), "little"))
+        received.append(int.from_bytes(ring.get(), "little"))
+    assert received == [n for i in range(10) for n in (i, i + 100)]
+    assert ring.empty()
+
+
+def test_oversized_message_is_rejected():
+    ring = SharedRingBuffer(capacity=2, slot_size=4)
+    with pytest.raises(ValueError):
+        ring.put(b"12345")
+    with pytest.raises(ValueError):
+        SharedRingBuffer(capacity=2, slot_size=256)
+
+
+def test_full_ring_raises_full():
+    ring = SharedRingBuffer(capacity=2, slot_size=1)
+    ring.put(b"a")
+    ring.put(b"b")
+    assert ring.full()
+    with pytest.raises(queue.Full):
+        ring.put_nowait(b"c")
+    start = time.perf_counter()
+    with pytest.raises(queue.Full):
+        ring.put(b"c", timeout=0.05)
+    assert time.perf_counter() - start >= 0.05
+    assert ring.get() == b"a"
+    ring.put(b"c", timeout=0.05)
+    assert [ring.get(), ring.get()] == [b"b", b"c"]
+
+
+def test_empty_ring_raises_empty():
+    ring = SharedRingBuffer(capacity=2, slot_size=1)
+    with pytest.raises(queue.Empty):
+        ring.get_nowait()
+    start = time.perf_counter()
+    with pytest.raises(queue.Empty):
+        ring.get(timeout=0.05)
+    assert time.perf_counter() - start >= 0.04
+    with pytest.raises(queue.Empty):
+        ring.get_batch(block=False)
+
+
+def test_get_batch_takes_at_most_max_items():
+    ring = SharedRingBuffer(capacity=8, slot_size=1)
+    for i in range(5):
+        ring.put(bytes([i]))
+    assert ring.get_batch(max_items=3) == [b"\x00", b"\x01", b"\x02"]
+    assert ring.get_batch() == [b"\x03", b"\x04"]
+    assert ring.empty()
+
+
+def produce(ring, count):
+    for i in range(count):
+        ring.put(i.to_bytes(4, "little"))
+
+
+def test_child_process_producer():
+    # Smaller than COUNT, so the producer blocks on a full ring while the parent drains it
+    ring = SharedRingBuffer(capacity=64, slot_size=4)
+    producer = multiprocessing.Process(target=produce, args=(ring, COUNT))
+    producer.start()
+    received = []
+    while len(received) < COUNT:
+        received.extend(int.from_bytes(message, "little") for message in ring.get_batch(timeout=5.0))
+    producer.join(5.0)
+    assert producer.exitcode == 0
+    assert received == list(range(COUNT))
+    assert ring.empty()
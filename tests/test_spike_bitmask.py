@@ -0,0 +1,73 @@
+"""
+utils/spike_bitmask.py: one message per timestep round trips across word boundaries, as uint32 words and as the
+little-endian int a wide channel message reads back as.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils import spike_bitmask
+
+NUM_OUTPUTS = 70  # three bitmask words, the last one partly used
+
+
+def test_message_size():
+    assert [spike_bitmask.message_words(n) for n in (1, 32, 33, 64, NUM_OUTPUTS)] == [2, 2, 3, 3, 4]
+
+
+def test_pack_sets_bits_lsb_first_across_words():
+    message = spike_bitmask.pack(7, [0, 31, 32, 69], NUM_OUTPUTS)
+    assert message.dtype == np.dtype("<u4")
+    assert message.tolist() == [7, 1 | 1 << 31, 1, 1 << 5]
+
+
+@pytest.mark.parametrize("as_int", [False, True])
+def test_round_trip(as_int):
+    neuron_ids = [0, 5, 31, 32, 33, 63, 64, 69]
+    message = spike_bitmask.pack(123, neuron_ids, NUM_OUTPUTS)
+    if as_int:
+        message = spike_bitmask.to_int(message)
+    time_steps, ids = spike_bitmask.unpack([message], NUM_OUTPUTS)
+    assert ids.tolist() == neuron_ids
+    assert time_steps.tolist() == [123] * len(neuron_ids)
+    assert time_steps.dtype == ids.dtype == np.int64
+
+
+@pytest.mark.parametrize("as_int", [False, True])
+def test_unpack_many_messages_in_order(as_int):
+    spikes = {1: [40, 2], 2: [], 3: [69], 4: [0, 32, 64]}
+    messages = [spike_bitmask.pack(t, ids, NUM_OUTPUTS) for t, ids in spikes.items()]
+    if as_int:
+        messages = [spike_bitmask.to_int(m) for m in messages]
+    time_steps, ids = spike_bitmask.unpack(messages, NUM_OUTPUTS)
+    # Message order, ascending neuron ID within a message, nothing for an empty bitmask
+    assert time_steps.tolist() == [1, 1, 3, 4, 4, 4]
+    assert ids.tolist() == [2, 40, 69, 0, 32, 64]
+
+
+def test_bits_past_num_outputs_are_ignored():
+    message = spike_bitmask.pack(9, [3], 96)
+    time_steps, ids = spike_bitmask.unpack([message], 4)
+    assert ids.tolist() == [3]
+    message[1] |= 1 << 4
+    assert spike_bitmask.unpack([message], 4)[1].tolist() == [3]
+
+
+@pytest.mark.parametrize("neuron_ids", [[-1], [NUM_OUTPUTS], [3, 100]])
+def test_out_of_range_ids_raise(neuron_ids):
+    with pytest.raises(ValueError, match=r"\[0, 70\)"):
+        spike_bitmask.pack(0, neuron_ids, NUM_OUTPUTS)
+
+
+def test_message_words_array():
+    messages = [spike_bitmask.pack(t, [t], NUM_OUTPUTS) for t in range(3)]
+    words = spike_bitmask.message_words_array(messages, NUM_OUTPUTS)
+    assert words.shape == (3, 4) and words.dtype == np.dtype("<u4")
+    ints = spike_bitmask.message_words_array([spike_bitmask.to_int(m) for m in messages], NUM_OUTPUTS)
+    assert np.array_equal(ints, words)
+    # A generator works too, and nothing gives an empty array of the message width
+    assert np.array_equal(spike_bitmask.message_words_array(iter(messages), NUM_OUTPUTS), words)
+    assert spike_bitmask.message_words_array([], NUM_OUTPUTS).shape == (0, 4)
+    assert spike_bitmask.unpack([], NUM_OUTPUTS)[0].size == 0
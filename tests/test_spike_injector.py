@@ -0,0 +1,97 @@
+"""
+SpikeInjector (tutorials/oscillator/spike_injector.py) against utils.harness.MockSpikeGen: grouping per spike
+generator, port numbering as in main.py, and the counters.
+"""
+import os
+import sys
+import queue
+import pytest
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO)
+sys.path.append(os.path.join(REPO, 'tutorials', 'oscillator'))
+from OscGenProcess import SPIKE_MESSAGE, spike_ring
+from spike_injector import SpikeInjector
+from utils.harness import MockSpikeGen
+
+
+class Recorder:
+    """Listener keeping the (ports, counts) of every sendSpikes call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ports, counts):
+        self.calls.append((ports.tolist(), counts.tolist()))
+
+
+@pytest.fixture
+def generators():
+    # main.py: one port per neuron, port node ids count up across the generators
+    recorder = Recorder()
+    spike_gen1, spike_gen2 = MockSpikeGen.chain([1, 1], listener=recorder)
+    return spike_gen1, spike_gen2, recorder
+
+
+def test_chained_generators_number_ports_across_generators():
+    gens = MockSpikeGen.chain([2, 3, 1])
+    assert [gen.firstPort for gen in gens] == [0, 2, 5]
+    gens[1].sendSpikes(spikeInputPortNodeIds=[2, 4], numSpikes=[1, 3])
+    assert gens[1].port_counts.tolist() == [1, 0, 3]
+    with pytest.raises(ValueError):
+        gens[1].sendSpikes(spikeInputPortNodeIds=[1], numSpikes=[1])
+    with pytest.raises(ValueError):
+        gens[1].sendSpikes(spikeInputPortNodeIds=[5], numSpikes=[1])
+
+
+def test_main_routing_groups_one_call_per_generator(generators):
+    spike_gen1, spike_gen2, recorder = generators
+    spikes = queue.Queue()
+    injector = SpikeInjector(spikes, {0: (spike_gen1, 0), 1: (spike_gen2, 1)})
+    for neuron_id in (0, 1, 1, 0, 1):
+        spikes.put(neuron_id)
+    assert injector.flush(timeout=0) == 5
+    assert sorted(recorder.calls) == [([0], [2]), ([1], [3])]
+    assert (spike_gen1.call_count, spike_gen2.call_count) == (1, 1)
+    assert spike_gen1.port_counts.tolist() == [2] and spike_gen2.port_counts.tolist() == [3]
+    assert injector.calls == 2 and injector.flushes == 1 and injector.spikes_sent == 5
+    assert injector.neuron_counts.tolist() == [2, 3]
+
+
+def test_only_generators_with_spikes_are_called(generators):
+    spike_gen1, spike_gen2, recorder = generators
+    spikes = queue.Queue()
+    injector = SpikeInjector(spikes, {0: (spike_gen1, 0), 1: (spike_gen2, 1)})
+    spikes.put([(1, 0.1), (1, 0.2)])  # one OscillatorBank batch
+    assert injector.flush(timeout=0) == 2
+    assert recorder.calls == [([1], [2])]
+    assert spike_gen1.call_count == 0 and injector.calls == 1
+
+
+def test_unrouted_spikes_are_dropped(generators):
+    spike_gen1, spike_gen2, _ = generators
+    spikes = queue.Queue()
+    injector = SpikeInjector(spikes, {1: (spike_gen2, 1)})
+    for neuron_id in (0, 1, 7):
+        spikes.put(neuron_id)
+    assert injector.flush(timeout=0) == 1
+    assert injector.dropped == 2 and injector.spikes_sent == 1
+    assert spike_gen1.call_count == 0 and spike_gen2.spike_count == 1
+
+
+def test_empty_queue_sends_nothing(generators):
+    spike_gen1, spike_gen2, recorder = generators
+    injector = SpikeInjector(queue.Queue(), {0: (spike_gen1, 0), 1: (spike_gen2, 1)})
+    assert injector.flush(timeout=0) == 0
+    assert injector.flushes == 0 and recorder.calls == []
+
+
+def test_spike_ring_messages(generators):
+    spike_gen1, spike_gen2, recorder = generators
+    ring = spike_ring(16)
+    for neuron_id in (0, 0, 1):
+        ring.put(SPIKE_MESSAGE.pack(neuron_id, 0.0))
+    injector = SpikeInjector(ring, {0: (spike_gen1, 0), 1: (spike_gen2, 1)})
+    assert injector.flush(timeout=0.1) == 3
+    assert sorted(recorder.calls) == [([0], [2]), ([1], [1])]
+    assert injector.neuron_counts.tolist() == [2, 1]
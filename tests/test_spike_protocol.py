@@ -0,0 +1,111 @@
+"""
+Round trips dummy-pipeline-1.0's framed spike protocol, on its own and through SerialDataPipeline and the pty
+TeensyEmulator (utils/harness).
+"""
+import os
+import sys
+import time
+import queue
+import threading
+import pytest
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO)
+sys.path.append(os.path.join(REPO, 'tutorials', 'dummy-pipeline-1.0'))
+import spike_protocol
+from spike_protocol import FrameDecoder, encode_spikes, encode_spike_frames, FRAME_SPIKE_MASK, FRAME_SPIKE_LIST
+from serial_comm import SerialDataPipeline
+from pipeline_log import PipelineLogger, NONE
+from utils import spike_bitmask
+from utils.harness import TeensyEmulator
+
+TEENSY_H = os.path.join(REPO, 'tutorials', 'dummy-pipeline-1.0', 'teensy', 'SpikeFrame.h')
+NUM_OUTPUTS = 600
+WAIT = 5.0  # [sec]
+
+
+def decode_all(data):
+    decoder = FrameDecoder()
+    frames = decoder.feed(data)
+    assert decoder.error_count == 0
+    return frames
+
+
+def test_duplicate_spikes_merge_within_a_timestep():
+    (frame,) = decode_all(encode_spikes(7, [1, 0, 0]))
+    assert frame == (FRAME_SPIKE_MASK, 7, (0, 1))
+
+
+def test_sparse_high_ids_use_a_spike_list():
+    (frame,) = decode_all(encode_spikes(3, [9000, 12]))
+    assert frame == (FRAME_SPIKE_LIST, 3, (12, 9000))
+
+
+def test_frame_body_limit_matches_teensy():
+    with open(TEENSY_H) as header:
+        defines = dict(line.split()[1:3] for line in header if line.startswith("#define") and len(line.split()) > 2)
+    assert int(defines["MAX_FRAME_BODY"]) == spike_protocol.MAX_FRAME_BODY
+
+
+def test_oversized_timestep_is_rejected_or_split():
+    with pytest.raises(ValueError):
+        encode_spikes(1, range(NUM_OUTPUTS))
+    frames, spike_count = encode_spike_frames(1, range(NUM_OUTPUTS))
+    assert spike_count == NUM_OUTPUTS
+    assert all(len(frame) <= spike_protocol.MAX_FRAME_SIZE for frame in frames)
+    decoded = decode_all(b''.join(frames))
+    assert {frame.timestep for frame in decoded} == {1}
+    assert sorted(i for frame in decoded for i in frame.neuron_ids) == list(range(NUM_OUTPUTS))
+
+
+def wait_for(condition, timeout=WAIT):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_pty_loopback_sends_one_frame_per_loihi_timestep():
+    # Loihi time step -> neurons that spiked in it, as the decoder thread queues them
+    sent = {5: [0, 1], 6: [1], 9: [], 12: list(range(0, NUM_OUTPUTS, 3))}
+    logs = PipelineLogger()
+    logs.set_all_levels(NONE)
+    teensy = TeensyEmulator(frequency=5.0, protocol=spike_protocol, max_neurons=NUM_OUTPUTS)
+    teensy.start()
+    stop_event = threading.Event()
+    encoder_queue = queue.Queue()
+    decoder_queue = queue.Queue()
+    pipeline = SerialDataPipeline(teensy.port, 1000000, stop_event, encoder_queue, decoder_queue,
+                                  logs.get_logger("serial"))
+    serial_thr = threading.Thread(target=pipeline.run)
+    serial_thr.start()
+    try:
+        assert teensy.started.wait(WAIT)
+        for time_step, neuron_ids in sent.items():
+            decoder_queue.put(spike_bitmask.pack(time_step, neuron_ids, NUM_OUTPUTS).tobytes())
+        expected = sum(len(neuron_ids) for neuron_ids in sent.values())
+        assert wait_for(lambda: teensy.spikes_received.sum() == expected and len(teensy.received_frames) >= 5)
+        assert wait_for(lambda: teensy.spikes_sent >= 2 and encoder_queue.qsize() >= 2)
+    finally:
+        stop_event.set()
+        serial_thr.join(WAIT)
+        teensy.stopped.wait(WAIT)
+        teensy.stop()
+        logs.close()
+
+    received = {}
+    for time_step, neuron_ids in teensy.received_frames:
+        received.setdefault(time_step, []).extend(neuron_ids)
+    assert received == sent
+    # Only timestep 12 is over MAX_FRAME_BODY, a mask for 0-511 plus one list frame for the rest
+    assert [time_step for time_step, _ in teensy.received_frames] == [5, 6, 9, 12, 12]
+    assert pipeline.send_data_count == sum(len(neuron_ids) for neuron_ids in sent.values())
+    assert pipeline.send_frame_count == len(teensy.received_frames)
+    assert teensy.stopped.is_set()
+
+    # And the other way, every spike the Teensy sent reached the encoder queue in order
+    forwarded = [int.from_bytes(encoder_queue.get_nowait(), byteorder='little') for _ in range(encoder_queue.qsize())]
+    assert forwarded == [neuron_id for _, neuron_id in teensy.sent_log][:len(forwarded)]
+    assert pipeline.recv_data_count == len(forwarded)
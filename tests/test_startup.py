@@ -0,0 +1,104 @@
+"""
+utils/startup.py: StartupPlan ordering, overlap of independent steps, failure handling and the saved timeline.
+"""
+import os
+import sys
+import json
+import time
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.startup import StartupPlan, StartupError
+
+STEP_TIME = 0.1  # [sec] each sleeping step
+
+
+def sleeper(result, seconds=STEP_TIME):
+    def step(*deps):
+        time.sleep(seconds)
+        return (result,) + deps
+    return step
+
+
+def test_dependencies_run_first_and_get_their_results():
+    plan = StartupPlan()
+    plan.add("net", sleeper("net"))
+    plan.add("firmware", sleeper("firmware"))
+    plan.add("compile", sleeper("compile"), deps=["net"])
+    plan.add("channels", sleeper("channels"), deps=["compile", "firmware"])
+    results = plan.run()
+    assert results["compile"] == ("compile", ("net",))
+    assert results["channels"] == ("channels", ("compile", ("net",)), ("firmware",))
+    steps = plan.steps
+    assert steps["compile"].start >= steps["net"].end
+    assert steps["channels"].start >= max(steps["compile"].end, steps["firmware"].end)
+
+
+def test_independent_steps_overlap():
+    plan = StartupPlan(max_workers=4)
+    for name in ("firmware", "host_snip", "net"):
+        plan.add(name, sleeper(name))
+    plan.run()
+    # Three STEP_TIME steps side by side, not back to back
+    assert plan.wall_time < 2 * STEP_TIME
+    assert "overlap" in plan.timeline()
+
+
+def test_max_workers_bounds_the_overlap():
+    plan = StartupPlan(max_workers=1)
+    for name in ("a", "b", "c"):
+        plan.add(name, sleeper(name, 0.05))
+    plan.run()
+    assert plan.wall_time >= 3 * 0.05
+
+
+def test_unknown_and_duplicate_steps_are_rejected():
+    plan = StartupPlan()
+    plan.add("net", sleeper("net"))
+    with pytest.raises(ValueError, match="duplicate"):
+        plan.add("net", sleeper("net"))
+    with pytest.raises(ValueError, match="unknown step"):
+        plan.add("compile", sleeper("compile"), deps=["missing"])
+
+
+def fail():
+    raise OSError("arduino-cli not found")
+
+
+def test_failure_raises_startup_error_and_skips_dependents():
+    plan = StartupPlan()
+    plan.add("firmware", fail)
+    plan.add("net", sleeper("net"))
+    plan.add("upload", sleeper("upload"), deps=["firmware"])
+    with pytest.raises(StartupError) as info:
+        plan.run()
+    assert info.value.step == "firmware"
+    assert isinstance(info.value.__cause__, OSError)
+    # Already running steps finish, dependents of the failed step never start
+    assert plan.results["net"] == ("net",)
+    assert plan.steps["upload"].skipped and "upload" not in plan.results
+    assert "skipped" in plan.timeline()
+
+
+def test_exit_in_a_step_becomes_startup_error():
+    plan = StartupPlan()
+    plan.add("firmware", lambda: exit(1))
+    with pytest.raises(StartupError) as info:
+        plan.run()
+    assert isinstance(info.value.__cause__, SystemExit)
+
+
+def test_save_appends_one_line_per_run(tmp_path):
+    path = str(tmp_path / "startup_times.jsonl")
+    plan = StartupPlan()
+    plan.add("net", sleeper("net", 0.01))
+    plan.add("compile", sleeper("compile", 0.01), deps=["net"])
+    for _ in range(2):
+        plan.results.clear()
+        plan.run()
+        plan.save(path)
+    records = [json.loads(line) for line in open(path)]
+    assert len(records) == 2
+    assert set(records[-1]["steps"]) == {"net", "compile"}
+    start, end = records[-1]["steps"]["compile"]
+    assert records[-1]["steps"]["net"][1] <= start < end <= records[-1]["total"]
@@ -0,0 +1,99 @@
+"""
+utils/topology.py: spec validation, nxEncoder port packing, and the generated headers, including that the committed
+ones are what the committed topology.json files generate.
+"""
+import os
+import sys
+import filecmp
+import pytest
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(REPO)
+from utils.topology import Topology, DEFAULTS, EMPTY_PORT, pack_ports, unpack_ports
+
+PIPELINES = [os.path.join(REPO, 'tutorials', name) for name in ('dummy-pipeline-1.0', 'dummy-pipeline-2.0')]
+
+
+@pytest.mark.parametrize("ports_per_message", [1, 3, 4])
+def test_pack_ports_round_trip(ports_per_message):
+    ports = [0, 1, 7, 2 ** 31, 5]
+    messages = pack_ports(ports, ports_per_message)
+    assert len(messages) == -(-len(ports) // ports_per_message)
+    assert all(0 <= m < 1 << (32 * ports_per_message) for m in messages)
+    assert [p for m in messages for p in unpack_ports(m, ports_per_message)] == ports
+
+
+def test_pack_ports_pads_the_last_message():
+    assert pack_ports([3, 4, 5], 2) == [3 | 4 << 32, 5 | EMPTY_PORT << 32]
+    assert unpack_ports(5 | EMPTY_PORT << 32, 2) == [5]
+    assert unpack_ports(EMPTY_PORT | 6 << 32, 2) == [6]
+    assert pack_ports([], 2) == []
+
+
+@pytest.mark.parametrize("spec, match", [
+    ({"num_input": 2}, "unknown topology keys"),
+    ({"num_inputs": 0}, "at least one input"),
+    ({"num_outputs": 0}, "at least one input"),
+    ({"host_snip_schedule": "sometimes"}, "host_snip_schedule must be one of"),
+    ({"host_snip_stride": 0}, "at least 1"),
+    ({"host_snip_max_stride": 0}, "at least 1"),
+    ({"host_snip_stride": 33}, "must not exceed channel_buffer_size"),
+    ({"host_snip_max_stride": 64}, "must not exceed channel_buffer_size"),
+    ({"channel_buffer_size": 16}, "must not exceed channel_buffer_size"),
+    ({"encoder_msg_size": 6}, "multiple of 4"),
+    ({"encoder_msg_size": 0}, "multiple of 4"),
+])
+def test_invalid_specs_raise(spec, match):
+    with pytest.raises(ValueError, match=match):
+        Topology(**spec)
+
+
+def test_strides_up_to_the_channel_buffer():
+    topology = Topology(channel_buffer_size=8, host_snip_stride=8, host_snip_max_stride=8)
+    assert topology.host_snip_max_stride == 8
+    with pytest.raises(ValueError, match="channel_buffer_size"):
+        topology.replace(channel_buffer_size=4)
+
+
+def test_derived_sizes_and_replace():
+    topology = Topology(num_outputs=33, encoder_msg_size=16)
+    assert (topology.ports_per_message, topology.bitmask_words, topology.decoder_msg_size) == (4, 2, 12)
+    wider = topology.replace(num_inputs=8)
+    assert (wider.num_inputs, wider.num_outputs, topology.num_inputs) == (8, 33, DEFAULTS["num_inputs"])
+
+
+def test_port_header_columns(tmp_path):
+    topology = Topology(num_inputs=3)
+    assert topology.write_port_header(str(tmp_path), [10, 11, 12], [0, 1, 1], [4, 5, 6])
+    text = (tmp_path / "topology_ports.h").read_text()
+    assert "static const int INPUT_AXON[NUM_INPUTS] = {10, 11, 12};\n" in text
+    assert "static const int INPUT_CHIP[NUM_INPUTS] = {0, 1, 1};\n" in text
+    assert "static const int INPUT_CORE[NUM_INPUTS] = {4, 5, 6};\n" in text
+    # Unchanged content leaves the file alone
+    assert not topology.write_port_header(str(tmp_path), [10, 11, 12], [0, 1, 1], [4, 5, 6])
+    assert topology.write_port_header(str(tmp_path))
+    assert "INPUT_AXON[NUM_INPUTS] = {0, 1, 2};" in (tmp_path / "topology_ports.h").read_text()
+
+
+@pytest.mark.parametrize("columns", [
+    ([0, 1], None, None),
+    (None, [0, 0, 0, 0], None),
+    (None, None, []),
+])
+def test_port_header_length_must_match_inputs(tmp_path, columns):
+    with pytest.raises(ValueError, match="the topology has 3 inputs"):
+        Topology(num_inputs=3).write_port_header(str(tmp_path), *columns)
+    assert not (tmp_path / "topology_ports.h").exists()
+
+
+@pytest.mark.parametrize("pipeline", PIPELINES, ids=os.path.basename)
+def test_committed_headers_are_up_to_date(tmp_path, pipeline):
+    topology = Topology.load(os.path.join(pipeline, "topology.json"))
+    generated = [("snips", "topology.h", topology.write_snip_header),
+                 ("snips", "topology_ports.h", topology.write_port_header)]
+    if os.path.exists(os.path.join(pipeline, "include", "host_snip_config.h")):
+        generated.append(("include", "host_snip_config.h", topology.write_host_config))
+    for subdir, name, write in generated:
+        assert write(str(tmp_path))
+        assert filecmp.cmp(str(tmp_path / name), os.path.join(pipeline, subdir, name), shallow=False), \
+            f"{subdir}/{name} is stale, regenerate it from topology.json"
@@ -14,6 +14,13 @@
     - run this in a terminal to allow user level permission of the device driver: 
         sudo chmod 666 /dev/ttyACM0
 
+  Firmware query:
+    - arduino_manager.py compiles the sketch with -DFIRMWARE_ID (the first 64 bits of the sketch's hash) and
+      only skips the upload when the board itself reports that id. It sends 0x00 0x00 FIRMWARE_QUERY, the
+      sketch answers FIRMWARE_REPLY and the 8 id bytes (little-endian) instead of forwarding the query.
+    - The host never sends an empty frame, so two 0x00 delimiters in a row never occur in spike traffic. The
+      delimiters are still forwarded, the Teensy skips empty frames.
+
 */
 
 #include <Arduino.h>
@@ -22,30 +29,49 @@
 #define HOST_COM Serial
 #define DATA_PIPELINE_BUS Serial1
 
+#ifndef FIRMWARE_ID
+#define FIRMWARE_ID 0ULL // built without arduino_manager.py, never matches a sketch hash
+#endif
+#define FIRMWARE_QUERY '?'
+#define FIRMWARE_REPLY "FW"
+
 //Fifo buffers
 #define BUFFER_SIZE 100
 byte read_buffer[BUFFER_SIZE];
 int read_head = 0;
 byte write_buffer[BUFFER_SIZE];
 int write_head = 0;
+int host_delimiters = 0; // 0x00 bytes in a row from the host
+
 
+//Answers the firmware query, forwards every other byte to the teensy. Returns true if the byte was forwarded.
+bool from_host(byte data) {
+  if (host_delimiters >= 2 && data == FIRMWARE_QUERY) {
+    host_delimiters = 0;
+    HOST_COM.write(FIRMWARE_REPLY);
+    for (int i = 0; i < 8; i++) {
+      HOST_COM.write((byte)(FIRMWARE_ID >> (8 * i)));
+    }
+    return false;
+  }
+  host_delimiters = (data == 0x00) ? host_delimiters + 1 : 0;
+  DATA_PIPELINE_BUS.write(data);
+  return true;
+}
 
 void setup() {
   HOST_COM.begin(BAUD_RATE);
   DATA_PIPELINE_BUS.begin(BAUD_RATE);
-  while(HOST_COM.available() == 0){
-     //busy wait for first command to start pipeline
+  while(!(HOST_COM.available() && from_host(HOST_COM.read()))){
+     //busy wait for first command to start pipeline, answering firmware queries
   }
-  byte pass_to_teensy = HOST_COM.read();  //start command received
-  DATA_PIPELINE_BUS.write(pass_to_teensy);
 }
 
 void loop() {
   //peripheral bound spike train
   if (HOST_COM.available()) {
-    byte pass_to_teensy = HOST_COM.read(); 
     //send to teensy
-    DATA_PIPELINE_BUS.write(pass_to_teensy);
+    from_host(HOST_COM.read());
   }
   //incoming spike train
   if (DATA_PIPELINE_BUS.available()) {
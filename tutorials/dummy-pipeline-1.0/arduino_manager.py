@@ -1,12 +1,38 @@
 import subprocess
 import os
 import glob
+import json
+import time
+import hashlib
 
 # This script is designed to compile and upload Arduino code to a coprocessor
 # on a LattePanda Delta 3 board. The coprocessor is connected via an internal USB bus,
 # which might be confusing to users at first, as it's not an external connection.
 # This script uses the arduino-cli tool and shows how these can be used to avoid having to 
 # manually compile and upload Arduino code to the coprocessor via the Arduino IDE.
+#
+# Compiling and uploading takes tens of seconds, so both are skipped when they are not needed:
+#   - The sketch sources and FQBN are hashed, and the sketch is compiled with the first 64 bits of that hash as
+#     FIRMWARE_ID. The board is asked for its id first (see arduino/arduino.ino), and nothing is done if it
+#     reports this one. Other firmware, e.g. the Firmata that pinpong flashes for the oscillator and led-blink
+#     tutorials, never answers, so the sketch is uploaded again.
+#   - Compiled artifacts are kept per hash under FIRMWARE_CACHE_DIR, so a changed sketch is compiled once
+#     and switching back to an older version only needs an upload.
+#   - `arduino-cli board list` is run once per session and its JSON output is parsed.
+# Set ARDUINO_FORCE_UPLOAD=1 (or call run(force=True)) to rebuild and upload regardless.
+# Tests can put a fake `arduino-cli` on PATH, every call goes through ARDUINO_CLI.
+
+ARDUINO_CLI = os.environ.get("ARDUINO_CLI", "arduino-cli")
+FIRMWARE_CACHE_DIR = os.environ.get("ARDUINO_CACHE_DIR",
+                                    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".firmware_cache"))
+FIRMWARE_QUERY = b"\x00\x00?"   # two frame delimiters and '?', answered by the sketch instead of forwarded
+FIRMWARE_REPLY = b"FW"           # followed by the FIRMWARE_ID bytes, little-endian
+FIRMWARE_ID_BYTES = 8
+QUERY_TIMEOUT = 0.5  # [sec] for the board to answer
+SKETCH_EXTENSIONS = (".ino", ".h", ".hpp", ".c", ".cpp", ".S")
+
+_board_list_cache = None  # parsed `arduino-cli board list` output for this session
+
 
 def find_arduino_sketch():
     """
@@ -24,6 +50,68 @@ def find_arduino_sketch():
         print("Multiple Arduino sketches found. Using the first one found.")
     return sketch_files[0]
 
+def firmware_hash(sketch_path, fqbn):
+    """
+    Hashes every source file in the sketch folder together with the FQBN.
+
+    Args:
+        sketch_path (str): Path to the Arduino sketch (.ino) or its folder.
+        fqbn (str): Fully Qualified Board Name.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the firmware this sketch builds.
+    """
+    sketch_dir = sketch_path if os.path.isdir(sketch_path) else os.path.dirname(sketch_path)
+    digest = hashlib.sha256(fqbn.encode())
+    for root, dirs, files in os.walk(sketch_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if not name.endswith(SKETCH_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            # Relative names are hashed too, so renaming or moving a file counts as a change
+            digest.update(os.path.relpath(path, sketch_dir).encode() + b"\0")
+            with open(path, "rb") as f:
+                digest.update(f.read())
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+def list_boards(refresh=False):
+    """
+    Runs `arduino-cli board list --format json` once per session.
+
+    Args:
+        refresh (bool): Rescan the ports even if a result is cached.
+
+    Returns:
+        list: (port, board name, fqbn) tuples, one per board matched on a port. None if the scan failed.
+    """
+    global _board_list_cache
+    if _board_list_cache is not None and not refresh:
+        return _board_list_cache
+
+    result = subprocess.run([ARDUINO_CLI, "board", "list", "--format", "json"], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Failed to list connected boards:\n{result.stderr}")
+        return None
+    try:
+        detected = json.loads(result.stdout or "[]")
+    except ValueError as e:
+        print(f"Could not parse arduino-cli board list output: {e}")
+        return None
+
+    # arduino-cli 1.x wraps the list in {"detected_ports": [...]}, 0.x returns the list itself
+    if isinstance(detected, dict):
+        detected = detected.get("detected_ports", [])
+    boards = []
+    for entry in detected:
+        port = entry.get("port", entry)
+        address = port.get("address")
+        for board in entry.get("matching_boards") or entry.get("boards") or []:
+            boards.append((address, board.get("name", ""), board.get("fqbn", "")))
+    _board_list_cache = boards
+    return boards
+
 def detect_board_and_port(target_board_name="Arduino Leonardo"):
     """
     Detects the connected Arduino board type and port using arduino-cli.
@@ -34,56 +122,99 @@ def detect_board_and_port(target_board_name="Arduino Leonardo"):
     Returns:
         tuple: (fqbn, port) if found, or (None, None) if not found.
     """
-    # Detect the connected board type and port using arduino-cli
-    board_list_cmd = "arduino-cli board list"
-    result = subprocess.run(board_list_cmd.split(), capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"Failed to list connected boards:\n{result.stderr}")
+    boards = list_boards()
+    if boards is None:
         return None, None
     
-    lines = result.stdout.splitlines()
-    for line in lines:
-        if target_board_name.lower() in line.lower() and "/dev" in line:
-            parts = line.split()
-            port = parts[0]
-            fqbn = parts[-2]
+    for port, name, fqbn in boards:
+        if target_board_name.lower() in name.lower() and port and port.startswith("/dev"):
             return fqbn, port
     
     print(f"No connected {target_board_name} board found.")
     return None, None
 
-def compile_and_upload(sketch_path, fqbn, port):
+def firmware_id(sketch_hash):
+    """The 64-bit FIRMWARE_ID compiled into the sketch, the first 16 hex digits of its hash."""
+    return int(sketch_hash[:16], 16)
+
+def board_firmware_id(port, timeout=QUERY_TIMEOUT):
+    """
+    Asks the sketch running on the board for its FIRMWARE_ID.
+
+    Args:
+        port (str): Port where the board is connected.
+        timeout (float): Seconds to wait for the answer.
+
+    Returns:
+        int: The id the board reported, or None if it did not answer (other firmware, no board or no pyserial).
+    """
+    try:
+        import serial
+    except ImportError:
+        return None
+    try:
+        with serial.Serial(port, timeout=timeout) as ser:
+            ser.reset_input_buffer()
+            ser.write(FIRMWARE_QUERY)
+            reply = bytearray()
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                reply += ser.read(max(ser.in_waiting, 1))
+                start = reply.find(FIRMWARE_REPLY) + len(FIRMWARE_REPLY)
+                if start >= len(FIRMWARE_REPLY) and len(reply) >= start + FIRMWARE_ID_BYTES:
+                    return int.from_bytes(reply[start:start + FIRMWARE_ID_BYTES], "little")
+    except (serial.SerialException, OSError) as e:
+        print(f"Could not query the firmware on {port}: {e}")
+    return None
+
+def compile_and_upload(sketch_path, fqbn, port, force=False):
     """
-    Compiles and uploads the Arduino sketch to the detected board.
+    Compiles and uploads the Arduino sketch to the detected board, skipping whatever the cache makes redundant.
     
     Args:
         sketch_path (str): Path to the Arduino sketch.
         fqbn (str): Fully Qualified Board Name.
         port (str): Port where the board is connected.
+        force (bool): Compile and upload even if the board reports this firmware.
     
     Returns:
-        bool: True if compilation and upload succeed, False otherwise.
+        bool: True if the board runs the sketch afterwards, False otherwise.
     """
-    # Compile the Arduino sketch
-    compile_cmd = f'arduino-cli compile --fqbn {fqbn} {sketch_path}'
-    compile_process = subprocess.run(compile_cmd.split(), capture_output=True, text=True)
-    if compile_process.returncode != 0:
-        print(f"Compilation failed:\n{compile_process.stderr}")
-        return False
-    else:
+    force = force or os.environ.get("ARDUINO_FORCE_UPLOAD") == "1"
+    sketch_hash = firmware_hash(sketch_path, fqbn)
+    if not force and board_firmware_id(port) == firmware_id(sketch_hash):
+        print(f"Firmware on {port} is up to date ({sketch_hash[:12]}), skipping compile and upload.")
+        return True
+
+    # Compile the Arduino sketch, unless this exact firmware was built before
+    build_dir = os.path.join(FIRMWARE_CACHE_DIR, sketch_hash)
+    build_marker = os.path.join(build_dir, ".complete")
+    if force or not os.path.exists(build_marker):
+        os.makedirs(build_dir, exist_ok=True)
+        # The id the sketch answers the firmware query with
+        id_flag = f"compiler.cpp.extra_flags=-DFIRMWARE_ID=0x{firmware_id(sketch_hash):016x}ULL"
+        compile_cmd = [ARDUINO_CLI, "compile", "--fqbn", fqbn, "--output-dir", build_dir,
+                       "--build-property", id_flag, sketch_path]
+        compile_process = subprocess.run(compile_cmd, capture_output=True, text=True)
+        if compile_process.returncode != 0:
+            print(f"Compilation failed:\n{compile_process.stderr}")
+            return False
+        open(build_marker, "w").close()
         print("Compilation succeeded.")
+    else:
+        print(f"Using cached build {sketch_hash[:12]}.")
     
     # Upload the compiled sketch to the board
-    upload_cmd = f'arduino-cli upload -p {port} --fqbn {fqbn} {sketch_path}'
-    upload_process = subprocess.run(upload_cmd.split(), capture_output=True, text=True)
+    upload_cmd = [ARDUINO_CLI, "upload", "-p", port, "--fqbn", fqbn, "--input-dir", build_dir, sketch_path]
+    upload_process = subprocess.run(upload_cmd, capture_output=True, text=True)
     if upload_process.returncode != 0:
         print(f"Upload failed:\n{upload_process.stderr}")
         return False
-    else:
-        print("Upload succeeded.")
-        return True
 
-def run():
+    print("Upload succeeded.")
+    return True
+
+def run(force=False):
     """
     Main function to run the entire process of finding, compiling, and uploading the Arduino sketch.
     """
@@ -100,7 +231,7 @@ def run():
         exit(1)
     
     # Compile and upload the Arduino sketch
-    if compile_and_upload(arduino_sketch_path, board_type, port):
+    if compile_and_upload(arduino_sketch_path, board_type, port, force):
         print("Arduino sketch compiled and uploaded successfully.")
     else:
         print("Failed to compile or upload the Arduino sketch.")
@@ -0,0 +1,254 @@
+"""
+@Brief: Autotuner for the nxEncoder/nxDecoder channel settings. Sweeps channel depth, encoder message size and
+        write batch size against a replayed input trace, and reports throughput, lost spikes and latency for each.
+
+@Notes:
+    - Each setting runs the production encoder_thread/decoder_thread (channel_threads.py) between a trace replayer
+      and a collector. By default the chip is the mock harness in utils/harness, so no hardware is needed.
+      With --hardware the same replay runs against the real snips on the Kapoho Bay, one compile per setting.
+    - The knobs, as they appear in topology.json:
+        channel_buffer_size  messages each channel buffers (both channels)
+        encoder_msg_size     bytes per nxEncoder message, the encoder snip injects encoder_msg_size / 4 spikes
+                             from the one message it reads per timestep
+        encoder_batch_size   messages encoder_thread hands to one channel write
+      The decoder message size is fixed by num_outputs (one spike bitmask per timestep, see utils/spike_bitmask.py).
+    - The trace is (time [s], neuron ID) pairs, from --trace (a .npy array or a time,neuron_id .csv) or a
+      synthetic bursty trace. Bursts faster than one message per timestep are what separate the settings.
+    - Offline, every replayed spike carries its own index as the port number and MockLoihi maps it back to the
+      neuron, so latency (replay -> injection on chip) and lost spikes are exact per spike. The decoder can't
+      distinguish two spikes of one neuron in one timestep, so its side is reported as channel overflows.
+    - On hardware the port has to be the neuron ID. Output spikes are matched FIFO per neuron and latency runs to
+      the decoder queue, both are upper bounds there (lost includes spikes merged by the bitmask).
+    - Recommendation: fewest lost spikes, then lowest p99 latency (to 0.1ms), then least channel memory.
+    - Run with `python benchmark_channels.py [--depths 8 16 32 64] [--msg-sizes 4 8 16] [--batches 1 4] [--rate 2000]`
+
+@Author: Reece Wayt
+"""
+import os
+import sys
+import time
+import json
+import queue
+import argparse
+import threading
+import collections
+import itertools
+import numpy as np
+from channel_threads import encoder_thread, decoder_thread, unpack_decoder_message, ENDIANNESS, QUEUE_MSG_SIZE
+from pipeline_log import PipelineLogger, NONE
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.topology import Topology
+from utils.harness import MockChannel, TO_CHIP, FROM_CHIP, MockLoihi, MockBoard
+
+TOPOLOGY = Topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology.json'))
+TIMESTEP = 1e-3       # [sec] per timestep of the mock board
+DRAIN_STEPS = 200     # extra timesteps after the trace, for spikes still in flight
+COLLECT_TIMEOUT = 0.5 # [sec] the collector waits for stragglers once the run is over
+
+ChannelConfig = collections.namedtuple("ChannelConfig", ["depth", "msg_size", "batch"])
+Result = collections.namedtuple("Result", ["config", "sent", "delivered", "lost", "overflows", "throughput",
+                                           "p50", "p99", "max", "memory"])
+
+
+def synthetic_trace(duration, rate, burst, num_neurons, seed=0):
+    """
+    Spike bursts at random times: `burst` spikes within 0.2ms, on random neurons, `rate` spikes/s on average.
+    Returns an (n, 2) array of (time [s], neuron ID), sorted by time.
+    """
+    rng = np.random.default_rng(seed)
+    onsets = np.sort(rng.uniform(0, duration, int(duration * rate / burst)))
+    times = (onsets[:, None] + rng.uniform(0, 2e-4, (onsets.size, burst))).ravel()
+    neurons = rng.integers(0, num_neurons, times.size)
+    order = np.argsort(times, kind="stable")
+    return np.column_stack([times[order], neurons[order]])
+
+
+def load_trace(path):
+    """Reads a (time [s], neuron ID) trace from a .npy array or a .csv with a time,neuron_id header."""
+    if path.endswith(".npy"):
+        trace = np.load(path)
+    else:
+        trace = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    trace = trace[np.argsort(trace[:, 0], kind="stable")]
+    trace[:, 0] -= trace[0, 0]
+    return trace
+
+
+def replay(trace, ports, encoderChannel, decoderChannel, board, num_steps, config, num_outputs):
+    """
+    Puts ports[i] on the encoder queue at trace time i while `board` runs num_steps timesteps, and collects
+    what comes back on the decoder queue.
+
+    Returns:
+        (start, outputs): perf_counter at trace time 0 and a list of (perf_counter, neuron ID) per output spike.
+    """
+    logs = PipelineLogger()
+    logs.set_all_levels(NONE)  # a lossy setting would log every missed write
+    stop_event = threading.Event()
+    done = threading.Event()
+    encoder_queue = queue.Queue()
+    decoder_queue = queue.Queue()
+    outputs = []
+
+    def replayer(start):
+        for spike_time, port in zip(trace[:, 0], ports):
+            delay = start + spike_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            encoder_queue.put(int(port).to_bytes(QUEUE_MSG_SIZE, byteorder=ENDIANNESS, signed=False))
+
+    def collector():
+        while True:
+            try:
+                data = decoder_queue.get(timeout=COLLECT_TIMEOUT if done.is_set() else 0.01)
+            except queue.Empty:
+                if done.is_set():
+                    return
+                continue
+            now = time.perf_counter()
+            outputs.extend((now, neuron_id) for neuron_id in unpack_decoder_message(data)[1])
+
+    threads = [threading.Thread(target=encoder_thread,
+                                args=(encoderChannel, stop_event, encoder_queue, logs.get_logger("encoder"), None,
+                                      config.msg_size // 4, config.batch)),
+               threading.Thread(target=decoder_thread,
+                                args=(decoderChannel, stop_event, decoder_queue, logs.get_logger("decoder"),
+                                      num_outputs))]
+    collector_thr = threading.Thread(target=collector)
+    board.start()
+    for thread in threads + [collector_thr]:
+        thread.start()
+    start = time.perf_counter()
+    replay_thr = threading.Thread(target=replayer, args=(start,))
+    replay_thr.start()
+    try:
+        board.run(num_steps, aSync=True)
+        board.finishRun()
+    finally:
+        replay_thr.join()
+        done.set()
+        collector_thr.join()
+        stop_event.set()
+        board.disconnect()
+        for thread in threads:
+            thread.join()
+        logs.close()
+    return start, outputs
+
+
+def run_mock(trace, config, num_outputs):
+    """
+    One setting against MockLoihi. Returns (latencies, overflows), latencies holding replay -> injection [s]
+    for every spike that reached the chip.
+    """
+    neurons = trace[:, 1].astype(np.int64)
+    injected = np.full(len(trace), np.nan)
+
+    def network(port):
+        injected[port] = time.perf_counter()
+        return (int(neurons[port]),)
+
+    encoderChannel = MockChannel(TOPOLOGY.encoder_channel.encode(), config.msg_size, config.depth, TO_CHIP)
+    decoderChannel = MockChannel(TOPOLOGY.decoder_channel.encode(), TOPOLOGY.decoder_msg_size, config.depth,
+                                 FROM_CHIP)
+    loihi = MockLoihi(encoderChannel, decoderChannel, network=network, num_outputs=num_outputs,
+                      ports_per_message=config.msg_size // 4)
+    board = MockBoard(loihi, TIMESTEP)
+    num_steps = int(np.ceil(trace[-1, 0] / TIMESTEP)) + DRAIN_STEPS
+    start, _ = replay(trace, np.arange(len(trace)), encoderChannel, decoderChannel, board, num_steps, config,
+                      num_outputs)
+    latencies = injected - (start + trace[:, 0])
+    return latencies[~np.isnan(latencies)], decoderChannel.overflow_count
+
+
+def run_hardware(trace, config, num_outputs, num_steps):
+    """
+    One setting on the Kapoho Bay, the snip headers are regenerated and the network recompiled for it.
+    Returns (latencies, 0), latencies holding replay -> decoder queue [s] per output spike matched FIFO.
+    """
+    import main  # imports nxsdk, only needed here
+    from loihi_utils import store_resource_maps
+    topology = TOPOLOGY.replace(channel_buffer_size=config.depth, encoder_msg_size=config.msg_size,
+                                encoder_batch_size=config.batch)
+    try:
+        topology.write_snip_header(main.INCLUDE_DIR)
+        network = main.build_network(probe_enabled=False)
+        board = main.compile_network(network)
+        encoderChannel, decoderChannel = main.create_snips_and_channels(board, topology)
+        main.write_port_header(store_resource_maps(*network[:4], board))
+        neurons = trace[:, 1].astype(np.int64)
+        start, outputs = replay(trace, neurons, encoderChannel, decoderChannel, board, num_steps, config,
+                                num_outputs)
+    finally:
+        TOPOLOGY.write_snip_header(main.INCLUDE_DIR)
+
+    sent = collections.defaultdict(collections.deque)
+    for spike_time, neuron_id in zip(trace[:, 0], neurons):
+        sent[int(neuron_id)].append(start + spike_time)
+    latencies = [received - sent[neuron_id].popleft() for received, neuron_id in outputs if sent[neuron_id]]
+    return np.asarray(latencies), 0
+
+
+def summarize(config, trace, latencies, overflows):
+    delivered = latencies.size
+    if delivered:
+        p50, p99, worst = np.percentile(latencies, [50, 99, 100])
+    else:
+        p50 = p99 = worst = np.inf
+    return Result(config, len(trace), delivered, len(trace) - delivered, overflows,
+                  delivered / max(trace[-1, 0], TIMESTEP), p50, p99, worst,
+                  config.depth * (config.msg_size + TOPOLOGY.decoder_msg_size))
+
+
+def recommend(results):
+    return min(results, key=lambda r: (r.lost + r.overflows, round(r.p99 * 1e4), r.memory, r.config.batch))
+
+
+def sweep(trace, configs, hardware=False, num_steps=None):
+    print(f"{'depth':>6} {'msg_size':>9} {'batch':>6} {'delivered':>10} {'lost':>6} {'overflow':>9} "
+          f"{'p50[ms]':>8} {'p99[ms]':>8} {'max[ms]':>8} {'bytes':>7}")
+    results = []
+    for config in configs:
+        if hardware:
+            latencies, overflows = run_hardware(trace, config, TOPOLOGY.num_outputs, num_steps)
+        else:
+            latencies, overflows = run_mock(trace, config, TOPOLOGY.num_outputs)
+        r = summarize(config, trace, latencies, overflows)
+        print(f"{config.depth:>6} {config.msg_size:>9} {config.batch:>6} {r.delivered:>10} {r.lost:>6} "
+              f"{r.overflows:>9} {r.p50 * 1e3:>8.2f} {r.p99 * 1e3:>8.2f} {r.max * 1e3:>8.2f} {r.memory:>7}")
+        results.append(r)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the channel settings against a replayed spike trace.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[8, 16, 32, 64], help="channel_buffer_size values")
+    parser.add_argument("--msg-sizes", type=int, nargs="+", default=[4, 8, 16],
+                        help="encoder_msg_size values [bytes], multiples of 4")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4], help="encoder_batch_size values")
+    parser.add_argument("--trace", help="Replay this .npy/.csv trace instead of a synthetic one")
+    parser.add_argument("--duration", type=float, default=1.0, help="Synthetic trace length [sec]")
+    parser.add_argument("--rate", type=float, default=2000, help="Synthetic trace spikes/s")
+    parser.add_argument("--burst", type=int, default=8, help="Spikes per synthetic burst")
+    parser.add_argument("--hardware", action="store_true", help="Run on the Kapoho Bay instead of the mock harness")
+    parser.add_argument("--hardware-steps", type=int,
+                        help="Timesteps per hardware run, defaults to the trace length at 1ms per timestep")
+    args = parser.parse_args()
+
+    for msg_size in args.msg_sizes:
+        TOPOLOGY.replace(encoder_msg_size=msg_size)  # rejects sizes the encoder snip can't read
+    trace = load_trace(args.trace) if args.trace else \
+        synthetic_trace(args.duration, args.rate, args.burst, TOPOLOGY.num_inputs)
+    num_steps = args.hardware_steps or int(np.ceil(trace[-1, 0] / TIMESTEP)) + DRAIN_STEPS
+    configs = [ChannelConfig(*values) for values in itertools.product(args.depths, args.msg_sizes, args.batches)]
+    print(f"[INFO] {len(trace)} spikes over {trace[-1, 0]:.2f}s, {len(configs)} settings"
+          f"{' on hardware' if args.hardware else ''}")
+    results = sweep(trace, configs, args.hardware, num_steps)
+
+    best = recommend(results)
+    print(f"[INFO] Recommended setting, {best.lost} lost, {best.overflows} overflows, "
+          f"p99 {best.p99 * 1e3:.2f}ms, {best.throughput:.0f} spikes/s. For topology.json:")
+    print(json.dumps({"channel_buffer_size": best.config.depth,
+                      "encoder_msg_size": best.config.msg_size,
+                      "encoder_batch_size": best.config.batch}, indent=4))
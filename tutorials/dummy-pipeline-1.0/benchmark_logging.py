@@ -0,0 +1,51 @@
+"""
+@Brief: Per-call cost of hot-path logging, comparing the old debug_logger(f"...", debug_enabled) helper
+        with pipeline_log.py, both with the level disabled and enabled.
+
+@Notes:
+    - Enabled pipeline_log calls only append to the ring; the writer thread formats into /dev/null, so the
+      number shown is the cost paid by the pipeline thread.
+    - No hardware is needed, run with `python benchmark_logging.py [--calls 1000000]`
+
+@Author: Reece Wayt
+"""
+import os
+import argparse
+import timeit
+from pipeline_log import PipelineLogger, DEBUG, ERROR
+
+
+def debug_logger(message, debug_enabled):
+    # Copy of the helper main.py used before pipeline_log
+    if debug_enabled:
+        print(f"[DEBUG] {message}")
+
+
+def per_call_ns(stmt, calls, namespace):
+    best = min(timeit.repeat(stmt, number=calls, repeat=5, globals=namespace))
+    return best / calls * 1e9
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call overhead of pipeline logging.")
+    parser.add_argument("--calls", type=int, default=1000000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        logs = PipelineLogger(stream=devnull)
+        namespace = {
+            "debug_logger": debug_logger,
+            "log_off": logs.get_logger("disabled", ERROR),
+            "log_on": logs.get_logger("enabled", DEBUG),
+            "data_32bit": 123456,
+        }
+        cases = [
+            ("debug_logger(f-string), disabled", 'debug_logger(f"Data received from pipeline: {data_32bit}", False)'),
+            ("pipeline_log, disabled", 'log_off.debug("Data received from pipeline: %d", data_32bit)'),
+            ("pipeline_log, enabled (append only)", 'log_on.debug("Data received from pipeline: %d", data_32bit)'),
+        ]
+        print(f"[INFO] {args.calls} calls per case, best of 5")
+        for name, stmt in cases:
+            print(f"{name:>38}: {per_call_ns(stmt, args.calls, namespace):7.1f} ns/call")
+        logs.close()
+        print(f"{'records dropped while enabled':>38}: {logs.dropped_count}")
@@ -0,0 +1,140 @@
+"""
+@Brief: Runs the whole dummy pipeline without hardware: an emulated Teensy on a pty, the real SerialDataPipeline
+        and channel threads, and a mock Loihi behind mock nxEncoder/nxDecoder channels.
+
+@Notes:
+    - Everything except nxsdk and the boards is the production code, so this is the place to check throughput,
+      drops and per-hop latency before (or instead of) booking time on the Kapoho Bay.
+    - The emulated Teensy speaks spike_protocol.py and models its 1Mbaud UART and transmit buffer. MockLoihi
+      runs the encoder/decoder snip logic once per timestep with the identity wiring of the real network,
+      and writes spike bitmask messages like snips/decoder.c.
+    - --multiprocess runs the serial pipeline in its own process through utils/shm_ring.py, as in main.py.
+    - --frequency raises the oscillator's spike rate to stress the link, e.g. --frequency 50.
+    - Run with `python benchmark_loopback.py [--steps 2000] [--timestep 1e-3] [--multiprocess]`
+
+@Author: Reece Wayt
+"""
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from serial_comm import SerialDataPipeline
+from channel_threads import encoder_thread, decoder_thread
+from latency_trace import LatencyTracer
+from pipeline_log import PipelineLogger, parse_level
+import spike_protocol
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.shm_ring import SharedRingBuffer
+from utils.topology import Topology
+from utils.harness import MockChannel, TO_CHIP, FROM_CHIP, MockLoihi, MockBoard, TeensyEmulator
+
+"""CONSTANTS, same as main.py"""
+TOPOLOGY = Topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology.json'))
+BAUD_RATE = 1000000
+CHANNEL_BUFFER_SIZE = TOPOLOGY.channel_buffer_size
+ENCODER_MSG_SIZE = TOPOLOGY.encoder_msg_size
+NUM_NEURONS = TOPOLOGY.num_inputs
+DECODER_MSG_SIZE = TOPOLOGY.decoder_msg_size
+QUEUE_MSG_SIZE = 4
+RING_BUFFER_CAPACITY = 1024
+SHUTDOWN_TIMEOUT = 5.0
+DRAIN_TIME = 0.2  # [sec] after the run for spikes still in flight to reach the Teensy
+
+
+def serial_process_main(serial_pipeline, logs):
+    try:
+        serial_pipeline.run()
+    finally:
+        logs.close()
+
+
+def run_loopback(steps, timestep, frequency, multiprocess_enabled, log_level):
+    logs = PipelineLogger()
+    logs.set_all_levels(log_level)
+
+    teensy = TeensyEmulator(frequency=frequency, protocol=spike_protocol, baud_rate=BAUD_RATE,
+                            max_neurons=NUM_NEURONS)
+    teensy.start()
+
+    encoderChannel = MockChannel(TOPOLOGY.encoder_channel.encode(), ENCODER_MSG_SIZE, CHANNEL_BUFFER_SIZE, TO_CHIP)
+    decoderChannel = MockChannel(TOPOLOGY.decoder_channel.encode(), DECODER_MSG_SIZE, CHANNEL_BUFFER_SIZE, FROM_CHIP)
+    loihi = MockLoihi(encoderChannel, decoderChannel, num_outputs=NUM_NEURONS,
+                      ports_per_message=TOPOLOGY.ports_per_message)
+    board = MockBoard(loihi, timestep)
+
+    if multiprocess_enabled:
+        stop_event = multiprocessing.Event()
+        encoder_queue = SharedRingBuffer(RING_BUFFER_CAPACITY, slot_size=QUEUE_MSG_SIZE)
+        decoder_queue = SharedRingBuffer(RING_BUFFER_CAPACITY, slot_size=DECODER_MSG_SIZE)
+    else:
+        stop_event = threading.Event()
+        encoder_queue = queue.Queue()
+        decoder_queue = queue.Queue()
+
+    tracer = LatencyTracer()
+    encoder_thr = threading.Thread(target=encoder_thread,
+                                   args=(encoderChannel, stop_event, encoder_queue, logs.get_logger("encoder"), tracer,
+                                         TOPOLOGY.ports_per_message, TOPOLOGY.encoder_batch_size))
+    decoder_thr = threading.Thread(target=decoder_thread,
+                                   args=(decoderChannel, stop_event, decoder_queue, logs.get_logger("decoder"),
+                                         NUM_NEURONS, tracer))
+    serial_pipeline = SerialDataPipeline(teensy.port, BAUD_RATE, stop_event, encoder_queue, decoder_queue,
+                                         logs.get_logger("serial"), tracer)
+    if multiprocess_enabled:
+        serial_thr = multiprocessing.Process(target=serial_process_main, args=(serial_pipeline, logs),
+                                             name="serial_pipeline")
+    else:
+        serial_thr = threading.Thread(target=serial_pipeline.run)
+
+    serial_thr.start()  # forked before the board and channel threads start, as in main.py
+    board.start()
+    encoder_thr.start()
+    decoder_thr.start()
+    start = time.perf_counter()
+    try:
+        if not teensy.started.wait(SHUTDOWN_TIMEOUT):
+            raise RuntimeError("Emulated Teensy never received the start frame")
+        board.run(steps, aSync=True)
+        board.finishRun()
+        time.sleep(DRAIN_TIME)
+    finally:
+        elapsed = time.perf_counter() - start
+        stop_event.set()
+        encoder_thr.join(SHUTDOWN_TIMEOUT)
+        decoder_thr.join(SHUTDOWN_TIMEOUT)
+        serial_thr.join(SHUTDOWN_TIMEOUT)
+        if multiprocess_enabled and serial_thr.is_alive():
+            serial_thr.terminate()
+            serial_thr.join()
+        teensy.stopped.wait(0.5)
+        board.disconnect()
+        teensy.stop()
+        logs.close()
+
+    print(f"[INFO] {steps} timesteps in {elapsed:.2f}s, {board.clock.late_steps} late timesteps")
+    print(f"{'teensy spikes sent':>28}: {teensy.spikes_sent}")
+    print(f"{'teensy spikes dropped':>28}: {teensy.spikes_dropped}")
+    print(f"{'injected on loihi':>28}: {loihi.spikes_injected}")
+    print(f"{'output by loihi':>28}: {loihi.spikes_output}")
+    print(f"{'decoder channel overflows':>28}: {decoderChannel.overflow_count}")
+    print(f"{'teensy spikes received':>28}: {int(teensy.spikes_received.sum())}")
+    print(f"{'throughput':>28}: {teensy.spikes_received.sum() / elapsed:.1f} spikes/s")
+    print(tracer.summary())
+    return teensy, loihi, tracer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hardware-free loopback run of the dummy pipeline.")
+    parser.add_argument("--steps", type=int, default=2000, help="Timesteps to run the mock Loihi for")
+    parser.add_argument("--timestep", type=float, default=1e-3,
+                        help="Wall-clock seconds per timestep, 0 to free-run")
+    parser.add_argument("--frequency", type=float, default=1.0, help="Oscillator frequency [Hz]")
+    parser.add_argument("--multiprocess", action="store_true", help="Run the serial pipeline in its own process")
+    parser.add_argument("--log", default="error", help="Log level for every subsystem")
+    args = parser.parse_args()
+
+    run_loopback(args.steps, args.timestep or None, args.frequency, args.multiprocess, parse_level(args.log))
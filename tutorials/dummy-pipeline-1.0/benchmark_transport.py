@@ -0,0 +1,90 @@
+"""
+@Brief: Compares tail latency of the two ways the serial pipeline can hand data to the channel threads:
+        a queue.Queue between threads (default mode) and a SharedRingBuffer between processes (--multiprocess).
+
+@Notes:
+    - A producer stands in for SerialDataPipeline.run and emits timestamped messages at a fixed rate.
+      The consumer stands in for encoder_thread and records how long each message took to arrive.
+    - Busy Python threads are started in the consumer's process to emulate the channel threads and nxsdk
+      fighting over the GIL. This is where the threaded mode falls behind.
+    - No hardware is needed, run with `python benchmark_transport.py [--rate 1000] [--count 5000] [--load-threads 2]`
+
+@Author: Reece Wayt
+"""
+import os
+import sys
+import time
+import queue
+import struct
+import argparse
+import threading
+import multiprocessing
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.shm_ring import SharedRingBuffer
+
+STAMP_FORMAT = "<q"  # perf_counter_ns at the time of the put
+STAMP_SIZE = struct.calcsize(STAMP_FORMAT)
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+def producer(out_queue, rate, count):
+    period_ns = int(1e9 / rate)
+    next_send = time.perf_counter_ns()
+    for _ in range(count):
+        while time.perf_counter_ns() < next_send:
+            pass
+        out_queue.put(struct.pack(STAMP_FORMAT, time.perf_counter_ns()))
+        next_send += period_ns
+
+
+def gil_load(stop_event):
+    x = 0
+    while not stop_event.is_set():
+        x = (x + 1) % 1000003
+
+
+def measure(mode, rate, count, load_threads):
+    if mode == "thread":
+        transport = queue.Queue()
+        worker = threading.Thread(target=producer, args=(transport, rate, count))
+    else:
+        transport = SharedRingBuffer(capacity=4096, slot_size=STAMP_SIZE)
+        worker = multiprocessing.Process(target=producer, args=(transport, rate, count))
+
+    stop_load = threading.Event()
+    loaders = [threading.Thread(target=gil_load, args=(stop_load,)) for _ in range(load_threads)]
+    for loader in loaders:
+        loader.start()
+
+    latencies = np.empty(count, dtype=np.int64)
+    worker.start()
+    try:
+        for i in range(count):
+            data = transport.get(timeout=5.0)
+            latencies[i] = time.perf_counter_ns() - struct.unpack(STAMP_FORMAT, data)[0]
+    finally:
+        stop_load.set()
+        for loader in loaders:
+            loader.join()
+        worker.join()
+    return latencies
+
+
+def report(mode, latencies):
+    values = np.percentile(latencies, PERCENTILES) / 1e3
+    columns = "  ".join(f"p{p}={v:9.1f}" for p, v in zip(PERCENTILES, values))
+    print(f"{mode:>8}: {columns}  max={latencies.max() / 1e3:9.1f} [us]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail latency of threaded vs multi-process serial transport.")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Messages per second")
+    parser.add_argument("--count", type=int, default=5000, help="Messages per mode")
+    parser.add_argument("--load-threads", type=int, default=2, help="Busy threads competing for the GIL")
+    args = parser.parse_args()
+
+    print(f"[INFO] {args.count} messages at {args.rate:.0f} Hz with {args.load_threads} GIL load threads")
+    for mode in ("thread", "process"):
+        report(mode, measure(mode, args.rate, args.count, args.load_threads))
@@ -0,0 +1,84 @@
+"""
+@Brief: Channel threads that move neuron IDs between the serial pipeline's queues and the Loihi channels.
+
+@Notes:
+    - Kept free of nxsdk imports so the same threads can be driven by the loopback harness in utils/harness
+      (see benchmark_loopback.py) as well as by main.py on the board.
+    - The channels only need probe(), read(n) and write(n, data), the queues only need empty(), get() and put().
+
+@Author: Reece Wayt
+"""
+import os
+import sys
+import time
+import queue
+import numpy as np
+from latency_trace import ENCODER_WRITE, DECODER_READ
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils import spike_bitmask
+from utils.topology import pack_ports
+
+ENDIANNESS = 'little'
+QUEUE_MSG_SIZE = 4  # neuron IDs on the encoder queue
+
+
+def decoder_queue_msg_size(num_outputs):
+    """Bytes of one decoder queue message, a whole spike bitmask message with its Loihi time step."""
+    return 4 * spike_bitmask.message_words(num_outputs)
+
+
+def unpack_decoder_message(message):
+    """(Loihi time step, neuron IDs) of one decoder queue message."""
+    words = np.frombuffer(bytes(message), dtype="<u4")
+    num_outputs = (words.size - 1) * spike_bitmask.WORD_BITS  # bits past num_outputs are never set
+    time_steps, neuron_ids = spike_bitmask.unpack([words], num_outputs)
+    return int(words[0]), neuron_ids.tolist()
+
+
+def encoder_thread(encoderChannel, stop_event, encoder_queue, log, tracer=None, ports_per_message=1, batch_size=1):
+    # Whatever is queued, up to ports_per_message * batch_size neuron IDs, goes out in one channel write: IDs are
+    # packed ports_per_message to a message (utils/topology.pack_ports), batch_size messages per write.
+    # The defaults write one ID per message and per call. benchmark_channels.py picks the two sizes.
+    seq = 0  # matches the serial pipeline's receive count, the queue is FIFO
+    max_ports = ports_per_message * batch_size
+    while not stop_event.is_set():
+        if not encoder_queue.empty():
+            try:
+                ports = [int.from_bytes(encoder_queue.get(timeout = 0.01), byteorder=ENDIANNESS, signed=False)]
+                while len(ports) < max_ports and not encoder_queue.empty():
+                    ports.append(int.from_bytes(encoder_queue.get_nowait(), byteorder=ENDIANNESS, signed=False))
+            except queue.Empty:
+                continue
+            log.debug("Data received from pipeline: %s", ports)
+            messages = pack_ports(ports, ports_per_message)
+            if encoderChannel.probe():
+                encoderChannel.write(len(messages), messages)
+                if tracer:
+                    for ii in range(len(ports)):
+                        tracer.stamp(ENCODER_WRITE, seq + ii)
+
+            else:
+                if not stop_event.is_set():  
+                    log.error("encoderChannel not ready for data....data missed!!!!")
+            seq += len(ports)
+        time.sleep(0.001)
+
+def decoder_thread(decoderChannel, stop_event, decoder_queue, log, num_outputs, tracer=None):
+    # The decoder snip writes one time step + spike bitmask message per timestep (see utils/spike_bitmask.py),
+    # each goes on the queue whole (decoder_queue_msg_size bytes) so the serial pipeline sends the spikes of one
+    # Loihi timestep as one frame stamped with that timestep
+    seq = 0  # matches the serial pipeline's send count, the queue is FIFO
+    while not stop_event.is_set():
+        if decoderChannel.probe():
+            data = decoderChannel.read(1) 
+            for message in spike_bitmask.message_words_array(data, num_outputs):
+                time_steps, neuron_ids = spike_bitmask.unpack([message], num_outputs)
+                log.debug("Data received from Loihi: %s", neuron_ids)
+                if tracer:
+                    for ii in range(neuron_ids.size):
+                        tracer.stamp(DECODER_READ, seq + ii)
+                seq += neuron_ids.size
+                decoder_queue.put(message.astype("<u4").tobytes())
+            log.debug("Data send to peripheral...")
+        time.sleep(0.001)
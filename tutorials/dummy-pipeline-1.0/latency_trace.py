@@ -0,0 +1,181 @@
+"""
+@Brief: Per-event latency tracing for the Teensy -> Loihi -> Teensy pipeline.
+
+@Notes:
+    - Each pipeline stage stamps time.perf_counter_ns() into its own fixed-size ring in shared memory. Every
+      stage has exactly one writer (serial thread/process, encoder thread or decoder thread), so stamping
+      takes no lock. A stamp is a few ctypes stores, which is cheap enough to leave on during real runs.
+    - perf_counter_ns is CLOCK_MONOTONIC on Linux, so stamps from the --multiprocess serial process can be
+      compared directly with stamps from the channel threads.
+    - Stages are matched when a summary is built, not at runtime:
+        serial_rx -> encoder_write   FIFO, the n-th spike read from the Teensy is the n-th one the encoder takes
+        encoder_write -> decoder_read   each read is paired with the latest injection before it. Loihi does
+                                        not tag spikes, so this hop covers both channels and the network.
+        decoder_read -> serial_tx    FIFO, the decoder queue preserves order
+    - Latencies are summarized in HDR-style log-linear histograms (SUB_BUCKET_BITS of precision per power
+      of two), reporting p50/p99/p99.9.
+
+@Usage:
+    tracer = LatencyTracer()
+    tracer.stamp(SERIAL_RX, seq)
+    print(tracer.summary())
+
+@Author: Reece Wayt
+"""
+import ctypes
+import multiprocessing
+import time
+import numpy as np
+
+"""Pipeline stages, in the order an event passes through them"""
+SERIAL_RX = 0       # spike unpacked from a Teensy frame in SerialDataPipeline.run
+ENCODER_WRITE = 1   # encoderChannel.write returned
+DECODER_READ = 2    # decoderChannel.read returned
+SERIAL_TX = 3       # spike framed and written back to the Teensy
+STAGE_NAMES = ["serial_rx", "encoder_write", "decoder_read", "serial_tx"]
+
+DEFAULT_CAPACITY = 1 << 16  # events kept per stage, oldest are overwritten
+SUB_BUCKET_BITS = 7         # ~0.8% relative bucket width
+SUMMARY_PERCENTILES = [50, 99, 99.9]
+
+
+def _lookup(keys, values, query):
+    """Maps each query through ascending `keys` to `values`, returns (found mask, values of found queries)."""
+    if keys.size == 0:
+        return np.zeros(query.shape, dtype=bool), values[:0]
+    pos = np.minimum(np.searchsorted(keys, query), keys.size - 1)
+    found = keys[pos] == query
+    return found, values[pos[found]]
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram over integer nanosecond values. Values below 2^(SUB_BUCKET_BITS+1) get their
+    own bucket, above that each power of two is split into 2^SUB_BUCKET_BITS equal buckets.
+    """
+
+    def __init__(self, values=None):
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.total = 0
+        self.max = 0
+        if values is not None:
+            self.record_many(values)
+
+    @staticmethod
+    def bucket_index(values):
+        values = np.maximum(np.asarray(values, dtype=np.int64), 0)
+        msb = np.zeros(values.shape, dtype=np.int64)
+        nonzero = values > 0
+        msb[nonzero] = np.floor(np.log2(values[nonzero])).astype(np.int64)
+        shift = np.maximum(msb - SUB_BUCKET_BITS, 0)
+        return (shift << SUB_BUCKET_BITS) + (values >> shift)
+
+    @staticmethod
+    def bucket_highest_value(index):
+        shift = max(index // (1 << SUB_BUCKET_BITS) - 1, 0)
+        sub = index - (shift << SUB_BUCKET_BITS)
+        return ((sub + 1) << shift) - 1
+
+    def record_many(self, values):
+        values = np.asarray(values, dtype=np.int64)
+        if values.size == 0:
+            return
+        counts = np.bincount(self.bucket_index(values))
+        if counts.size > self.counts.size:
+            counts[:self.counts.size] += self.counts
+            self.counts = counts
+        else:
+            self.counts[:counts.size] += counts
+        self.total += int(values.size)
+        self.max = max(self.max, int(values.max()))
+
+    def percentile(self, p):
+        """Returns the highest value equivalent to the p-th percentile bucket, in nanoseconds."""
+        if self.total == 0:
+            return 0
+        rank = max(int(np.ceil(p / 100.0 * self.total)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.bucket_highest_value(index), self.max)
+
+
+class LatencyTracer:
+    """
+    Attributes:
+        capacity (int): Number of stamps kept per stage.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, ctx=None):
+        """
+        Allocates one ring per stage in shared memory. Create it before starting a --multiprocess worker
+        so the child inherits the same rings.
+        """
+        ctx = ctx or multiprocessing
+        self.capacity = capacity
+        num_stages = len(STAGE_NAMES)
+        self._seqs = [ctx.RawArray(ctypes.c_int64, capacity) for _ in range(num_stages)]
+        self._times = [ctx.RawArray(ctypes.c_int64, capacity) for _ in range(num_stages)]
+        self._counts = ctx.RawArray(ctypes.c_int64, num_stages)
+
+    def stamp(self, stage, seq):
+        """Records that event `seq` passed `stage` now. Only one thread or process may stamp a given stage."""
+        n = self._counts[stage]
+        slot = n % self.capacity
+        self._seqs[stage][slot] = seq
+        self._times[stage][slot] = time.perf_counter_ns()
+        self._counts[stage] = n + 1
+
+    def events(self, stage):
+        """Returns (seqs, times) of the stamps still held for `stage`, oldest first."""
+        n = self._counts[stage]
+        seqs = np.frombuffer(self._seqs[stage], dtype=np.int64)
+        times = np.frombuffer(self._times[stage], dtype=np.int64)
+        if n <= self.capacity:
+            return seqs[:n].copy(), times[:n].copy()
+        start = n % self.capacity
+        return np.roll(seqs, -start), np.roll(times, -start)
+
+    def _fifo_pairs(self, src, dst):
+        src_seqs, src_times = self.events(src)
+        dst_seqs, dst_times = self.events(dst)
+        _, src_idx, dst_idx = np.intersect1d(src_seqs, dst_seqs, assume_unique=True, return_indices=True)
+        return src_seqs[src_idx], src_times[src_idx], dst_seqs[dst_idx], dst_times[dst_idx]
+
+    def _preceding_pairs(self, src, dst):
+        src_seqs, src_times = self.events(src)
+        dst_seqs, dst_times = self.events(dst)
+        idx = np.searchsorted(src_times, dst_times, side='right') - 1
+        valid = idx >= 0
+        idx = idx[valid]
+        return src_seqs[idx], src_times[idx], dst_seqs[valid], dst_times[valid]
+
+    def hop_latencies(self):
+        """
+        Returns:
+            dict: hop name -> np.ndarray of latencies in nanoseconds, including the end-to-end hop.
+        """
+        _, rx_t, enc_seq_a, enc_t_a = self._fifo_pairs(SERIAL_RX, ENCODER_WRITE)
+        enc_seq_b, enc_t_b, dec_seq_b, dec_t_b = self._preceding_pairs(ENCODER_WRITE, DECODER_READ)
+        dec_seq_c, dec_t_c, _, tx_t = self._fifo_pairs(DECODER_READ, SERIAL_TX)
+        hops = {
+            "serial_rx -> encoder_write": enc_t_a - rx_t,
+            "encoder_write -> decoder_read": dec_t_b - enc_t_b,
+            "decoder_read -> serial_tx": tx_t - dec_t_c,
+        }
+
+        # Chain the hops: tx -> its decoder read -> the injection before that read -> the byte injected
+        found_read, enc_seq = _lookup(dec_seq_b, enc_seq_b, dec_seq_c)
+        found_rx, rx_time = _lookup(enc_seq_a, rx_t, enc_seq)
+        hops["serial_rx -> serial_tx"] = tx_t[found_read][found_rx] - rx_time
+        return hops
+
+    def summary(self):
+        """Formats per-hop p50/p99/p99.9 latencies in microseconds, callable at any time during a run."""
+        lines = ["Latency trace [us]:"]
+        for hop, latencies in self.hop_latencies().items():
+            hist = LatencyHistogram(latencies)
+            if hist.total == 0:
+                lines.append(f"  {hop:<32} no events")
+                continue
+            columns = "  ".join(f"p{p}={hist.percentile(p) / 1e3:9.1f}" for p in SUMMARY_PERCENTILES)
+            lines.append(f"  {hop:<32} n={hist.total:<7} {columns}  max={hist.max / 1e3:9.1f}")
+        return "\n".join(lines)
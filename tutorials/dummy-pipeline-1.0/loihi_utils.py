@@ -1,4 +1,6 @@
 import os
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 from nxsdk.utils.plotutils import plotRaster
@@ -7,6 +9,10 @@ import nxsdk.api.n2a as nx
 from nxsdk.arch.n2a.n2board import N2Board
 from nxsdk.graph.processes.phase_enums import Phase
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.resource_tables import resource_tables, node_ids
+from utils import connection_masks
+
 haveDisplay = "DISPLAY" in os.environ
 if not haveDisplay:
     mpl.use('Agg')
@@ -32,46 +38,69 @@ def create_output_layer(net, neurons):
         outputSynapseIds.append(spikeOutputPort.nodeId)
     return outputSynapseIds
 
+def create_neuron_group(net, prototype, size):
+    return net.createCompartmentGroup(size=size, prototype=prototype)
+
+"""
+@Brief:
+    Group versions of create_input_layer/create_output_layer. All ports of a layer are created as one port
+    group and wired with a single connect() call and a connection mask, so the number of Python-level graph
+    calls no longer grows with the number of neurons.
+
+@Parameters:
+    neuron_group (nx.CompartmentGroup): Compartments to connect, e.g. from create_neuron_group().
+    connection_mask (array or scipy.sparse matrix, optional): (num destinations, num sources) mask as nxsdk
+        expects it, i.e. (neurons, ports) for input ports and (ports, neurons) for output ports. Defaults to
+        port i <-> neuron i, which is what the per-neuron versions build. Any other shape raises ValueError.
+    num_ports (int, optional): Ports in the group, defaults to one per neuron.
+
+@Returns:
+    np.ndarray: Contiguous int64 array of the port nodeIds, usable directly with store_resource_maps.
+"""
+def create_input_port_group(net, prototype, neuron_group, connection_mask=None, num_ports=None):
+    num_ports = neuron_group.numNodes if num_ports is None else num_ports
+    connection_mask = connection_masks.connection_mask(connection_mask, neuron_group.numNodes, num_ports)
+    port_group = net.createSpikeInputPortGroup(size=num_ports)
+    port_group.connect(neuron_group, prototype=prototype, connectionMask=connection_mask)
+    return node_ids(port_group)
+
+def create_output_port_group(net, neuron_group, connection_mask=None, num_ports=None):
+    num_ports = neuron_group.numNodes if num_ports is None else num_ports
+    connection_mask = connection_masks.connection_mask(connection_mask, num_ports, neuron_group.numNodes)
+    port_group = net.createSpikeOutputPortGroup(size=num_ports)
+    neuron_group.connect(port_group, connectionMask=connection_mask)
+    return node_ids(port_group)
+
 
 def get_resource_map(net, neuron, inputSynapseId, outputSynapseId):
-    boardId, chipId, coreId, compartmentId, cxProfileCfgId, vthProfileCfgId = net.resourceMap.compartment(neuron.nodeId)
-    inputSynapseData = net.resourceMap.inputAxon(inputSynapseId)
-    inputSynapseId = inputSynapseData[0][3]  # Unpack the inputAxonId from the inputAxonData
-    outputSynapseData = net.resourceMap.synapse(outputSynapseId)
-    return {
-        "boardId": boardId,
-        "chipId": chipId,
-        "coreId": coreId,
-        "compartmentId": compartmentId,
-        "cxProfileCfgId": cxProfileCfgId,
-        "vthProfileCfgId": vthProfileCfgId,
-        "inputSynapseId": inputSynapseId,
-        "outputSynapseId": outputSynapseId
-    }
+    resource_map = store_resource_maps(net, [neuron], [inputSynapseId], [outputSynapseId])
+    return {field: int(column[0]) for field, column in resource_map.items()}
 
 """
 @Brief:
     This function takes a neural network, a list of neurons, and their corresponding
     input and output synapse IDs, and maps the logical IDs to physical hardware IDs. 
-    The mappings are then stored in a dictionary with neuron names as keys.
+    The lookups go through utils/resource_tables.py, which asks nxsdk about each node once per
+    compiled network and answers everything after that from cached NumPy arrays.
 
 @Parameters:
     net (nx.NxNet): The neural network object containing the neurons and synapses.
-    neurons (list of nx.NxCompartment): A list of neuron objects to be mapped.
-    inputSynapseIds (list of int): A list of input synapse logical IDs corresponding to the neurons.
-    outputSynapseIds (list of int): A list of output synapse logical IDs corresponding to the neurons.
+    neurons (list of nx.NxCompartment or nx.CompartmentGroup): The neurons to be mapped.
+    inputSynapseIds (list or array of int): Input synapse logical IDs corresponding to the neurons.
+    outputSynapseIds (list or array of int): Output synapse logical IDs corresponding to the neurons.
+    board (N2Board, optional): The board net was compiled to, so a recompile refreshes the cached tables.
 
 @Returns:
-    dict: A dictionary containing the resource mappings for each neuron. The keys are 
-          neuron names (e.g., "Neuron0", "Neuron1"), and the values are the results 
-          of the `get_resource_map` function, which maps the logical IDs to physical IDs.
+    dict: Struct-of-arrays table with one entry per neuron, in order. The columns are nodeId, boardId,
+          chipId, coreId, compartmentId, cxProfileCfgId, vthProfileCfgId, and the physical axon IDs
+          inputSynapseId and outputSynapseId.
 """
-def store_resource_maps(net, neurons, inputSynapseIds, outputSynapseIds):
-    resource_maps = {}
-    for idx, (neuron, inputSynapseId, outputSynapseId) in enumerate(zip(neurons, inputSynapseIds, outputSynapseIds)):
-        neuron_name = f"Neuron{idx}"
-        resource_maps[neuron_name] = get_resource_map(net, neuron, inputSynapseId, outputSynapseId)
-    return resource_maps
+def store_resource_maps(net, neurons, inputSynapseIds, outputSynapseIds, board=None):
+    tables = resource_tables(net, board)
+    resource_map = tables.compartments(node_ids(neurons))
+    resource_map["inputSynapseId"] = tables.input_axons(inputSynapseIds)["axonId"]
+    resource_map["outputSynapseId"] = tables.output_axons(outputSynapseIds)["axonId"]
+    return resource_map
 
 """
 @Brief: 
@@ -11,21 +11,43 @@
         - The pipeline is managed and compiled by the arduino_manager module.
         - See documentation on Arduion CLI for more context - https://arduino.github.io/arduino-cli/0.34/installation/
 
-@Options: When running the python script there are two options by default debugging and probes are disabled
-          to enable both run `python main.py --debug --probe
+    - With --multiprocess the serial pipeline runs in its own process instead of a thread, so it no longer
+      competes with the channel threads and nxsdk for the GIL. The two processes exchange bytes through
+      shared-memory ring buffers (see utils/shm_ring.py). Use benchmark_transport.py to compare tail latency.
+    - The Teensy link uses COBS framed packets with a CRC, each carrying a timestep and the neurons that fired
+      in it (see spike_protocol.py). Start/stop are their own frame types, so they never collide with neuron IDs.
+    - Every spike is stamped as it passes the serial, encoder and decoder stages (see latency_trace.py). Per-hop
+      p50/p99/p99.9 latencies are printed at shutdown, or mid-run with `kill -USR1 <pid>`.
+    - Hot-path logging goes through pipeline_log.py, disabled levels cost a single compare and messages are
+      formatted on a background thread. Levels are set per subsystem (serial, encoder, decoder).
+    - Startup runs as a small dependency graph (utils/startup.py): the Arduino upload overlaps the network build
+      and compile, and everything joins before board.start(). The timeline is printed and appended to
+      startup_times.jsonl.
+    - Port counts, channel sizes and names come from topology.json, which also generates snips/topology.h and
+      snips/topology_ports.h (utils/topology.py). Edit the spec, not the headers or the constants below.
+
+@Options: When running the python script there are three options by default debugging, probes and multiprocessing are disabled
+          to enable all run `python main.py --debug --probe --multiprocess`
           --debug [Enables debug logger]
+          --log SUBSYSTEM=LEVEL [Sets one subsystem's log level, e.g. --log serial=debug, can be repeated]
           --probe [Enables probe collection on Loihi]
+          --multiprocess [Runs the serial pipeline in a separate process]
 
 @Author: Reece Wayt        
 """
 import os
-import time
+import sys
+import signal
 import threading
+import multiprocessing
 import queue
 import argparse
 from loihi_utils import *
 import arduino_manager
 from serial_comm import SerialDataPipeline
+from channel_threads import encoder_thread, decoder_thread
+from latency_trace import LatencyTracer
+from pipeline_log import PipelineLogger, parse_level, DEBUG
 
 from nxsdk.utils.plotutils import plotRaster
 from nxsdk.graph.channel import Channel
@@ -33,88 +55,87 @@ import nxsdk.api.n2a as nx
 from nxsdk.arch.n2a.n2board import N2Board
 from nxsdk.graph.processes.phase_enums import Phase
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.shm_ring import SharedRingBuffer
+from utils.resource_tables import resource_tables
+from utils.startup import StartupPlan, StartupError
+from utils.topology import Topology
+
 """CONSTANTS"""
 USB_SERIAL_PORT = '/dev/ttyACM0'  # Device driver for the USB serial port to Arduino Coprocessor
 BAUD_RATE = 1000000
 ENDIANNESS = 'little'
 
 INCLUDE_DIR = os.path.join(os.getcwd(), 'snips/')
+TOPOLOGY = Topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology.json'))
 ENCODER_FUNC_NAME = "run_encoding"
 ENCODER_GUARD_NAME = "do_encoding"
 DECODER_FUNC_NAME = "run_decoding"
 DECODER_GUARD_NAME = "do_decoding"
 
-CHANNEL_BUFFER_SIZE = 32
-ENCODER_MSG_SIZE = 4
-DECODER_MSG_SIZE = 4
+CHANNEL_BUFFER_SIZE = TOPOLOGY.channel_buffer_size
+ENCODER_MSG_SIZE = TOPOLOGY.encoder_msg_size
 
 NUM_STEP = 1000
-NUM_NEURONS = 2
+NUM_NEURONS = TOPOLOGY.num_inputs  # every neuron has one input and one output port
+if TOPOLOGY.num_outputs != NUM_NEURONS:
+    raise ValueError("topology.json: this pipeline needs num_inputs == num_outputs")
 
-def debug_logger(message, debug_enabled):
-    if debug_enabled:
-        print(f"[DEBUG] {message}")
+DECODER_MSG_SIZE = TOPOLOGY.decoder_msg_size  # time step + spike bitmask, see snips/spike_bitmask.h
+QUEUE_MSG_SIZE = 4                                  # neuron IDs on the encoder queue, the decoder
+                                                    # queue carries whole DECODER_MSG_SIZE messages
+
+RING_BUFFER_CAPACITY = 1024  # slots per direction when running with --multiprocess
+SHUTDOWN_TIMEOUT = 5.0       # [sec] to wait on each worker before giving up on a clean exit
+STARTUP_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_times.jsonl')
 
 # Logs non-fatal error
 def error_logger(message):
     print(f"[ERROR] {message}")
 
-def encoder_thread(encoderChannel, stop_event, encoder_queue, debug_enabled):
-    while not stop_event.is_set():
-        if not encoder_queue.empty():
-            try:
-                data = encoder_queue.get(timeout = 0.01)
-                data_32bit = int.from_bytes(data, byteorder=ENDIANNESS, signed=False)
-                debug_logger(f"Data received from pipeline: {data_32bit}", debug_enabled)
-                if encoderChannel.probe():
-                    encoderChannel.write(1, [data_32bit])
-
-                else:
-                    if not stop_event.is_set():  
-                        error_logger(f"encoderChannel not ready for data....data missed!!!!")
-            except queue.Empty:
-                continue
-        time.sleep(0.001)
-
-def decoder_thread(decoderChannel, stop_event, decoder_queue, debug_enabled):
-    while not stop_event.is_set():
-        if decoderChannel.probe():
-            data = decoderChannel.read(1) 
-            low_8_bits = data[0] & 0xFF
-            debug_logger(f"Data received from Loihi: {low_8_bits}", debug_enabled)
-            decoder_queue.put(low_8_bits.to_bytes(1, byteorder=ENDIANNESS, signed=False))
-            debug_logger(f"Data send to peripheral...", debug_enabled)
-        time.sleep(0.001)
-
 def cli_parser():
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Dummy pipeline for communication between Loihi and Teensy boards.")
     parser.add_argument("--debug", action="store_true", help="Enable debugging output")
     parser.add_argument("--probe", action="store_true", help="Enable probes")
+    parser.add_argument("--multiprocess", action="store_true", help="Run the serial pipeline in its own process")
+    parser.add_argument("--log", action="append", default=[], metavar="SUBSYSTEM=LEVEL",
+                        help="Set a subsystem's log level (serial, encoder, decoder)")
     args = parser.parse_args()
     if not args.debug:
         print("[INFO] Running without debugging enabled...")
     if not args.probe: 
         print("[INFO] Running without probes enabled, this should make network faster...")
+    if args.multiprocess:
+        print("[INFO] Running serial pipeline in a separate process...")
     debug_enabled = args.debug
     probe_enabled = args.probe
+    multiprocess_enabled = args.multiprocess
+    log_levels = {}
+    for entry in args.log:
+        subsystem, _, level = entry.partition("=")
+        log_levels[subsystem] = parse_level(level)
 
-    return debug_enabled, probe_enabled
+    return debug_enabled, probe_enabled, multiprocess_enabled, log_levels
 
 
-if __name__ == "__main__":
-    
-    debug_enabled, probe_enabled = cli_parser()
-
-    # Compiles arduino.ino code and uploads it to the board
-    print("Starting Coprocessor...")
-    try: 
-        arduino_manager.run()
-    except Exception as e:
-        print(f"An error occurred during Arduino compilation or upload: {e}")
-        exit(1)
+def serial_process_main(serial_pipeline, logs):
+    # Entry point of the --multiprocess serial worker, drains its own log ring before exiting
+    try:
+        serial_pipeline.run()
+    finally:
+        logs.close()
 
-    # Start network
+
+def write_port_header(network, board):
+    """Generates snips/topology_ports.h from where the compiler placed the input ports, before board.start()"""
+    net, inputSynapseIds = network[0], network[2]
+    inputs = resource_tables(net, board).input_axons(inputSynapseIds)
+    TOPOLOGY.write_port_header(INCLUDE_DIR, inputs["axonId"], inputs["chipId"], inputs["coreId"])
+
+
+def build_network(probe_enabled):
+    """Builds the NUM_NEURONS neuron network, returns (net, neurons, inputSynapseIds, outputSynapseIds, probes)."""
     net = nx.NxNet()
 
     prototype = nx.CompartmentPrototype(biasMant=0,
@@ -124,40 +145,41 @@ if __name__ == "__main__":
                                         compartmentVoltageDecay=256,
                                         compartmentCurrentDecay=4096)
 
-    neurons = [create_neuron(net, prototype) for _ in range(NUM_NEURONS)]
+    # One compartment group and one port group per layer, a handful of graph calls whatever NUM_NEURONS is
+    neuron_group = create_neuron_group(net, prototype, NUM_NEURONS)
+    neurons = [neuron_group[ii] for ii in range(NUM_NEURONS)]
 
     input_conn_proto = nx.ConnectionPrototype(weight=255)
-    inputSynapseIds = create_input_layer(net, input_conn_proto, neurons)
-    print("Logical Input Synapse IDs:", inputSynapseIds)
-
-    outputSynapseIds = create_output_layer(net, neurons)
-    print("Logical Output Synapse IDs:", outputSynapseIds)
+    inputSynapseIds = create_input_port_group(net, input_conn_proto, neuron_group)
+    outputSynapseIds = create_output_port_group(net, neuron_group)
 
     #Track probes if command line argument is TRUE
+    probes = None
     if probe_enabled:
         probe_parameters = [nx.ProbeParameter.COMPARTMENT_CURRENT,
                             nx.ProbeParameter.COMPARTMENT_VOLTAGE,
                             nx.ProbeParameter.SPIKE]
         probes = create_probes(neurons, probe_parameters)
-        u_probes, v_probes, s_probes = zip(*probes)
 
+    return net, neurons, inputSynapseIds, outputSynapseIds, probes
 
+
+def compile_network(network):
     compiler = nx.N2Compiler()
-    board = compiler.compile(net)
+    return compiler.compile(network[0])
 
-    resource_maps = store_resource_maps(net, neurons, inputSynapseIds, outputSynapseIds)
-    print("Resource Maps:")
-    print(resource_maps)
 
+def create_snips_and_channels(board, topology=TOPOLOGY):
+    """Creates the encoder/decoder snips and their channels, returns (encoderChannel, decoderChannel)."""
     encoderSnip = board.createSnip(phase=Phase.EMBEDDED_SPIKING,
                                    includeDir=INCLUDE_DIR,
                                    cFilePath=INCLUDE_DIR + "encoder.c",
                                    funcName=ENCODER_FUNC_NAME,
                                    guardName=ENCODER_GUARD_NAME)
 
-    encoderChannel = board.createChannel(name=b'nxEncoder',
-                                         messageSize=ENCODER_MSG_SIZE,
-                                         numElements=CHANNEL_BUFFER_SIZE)
+    encoderChannel = board.createChannel(name=topology.encoder_channel.encode(),
+                                         messageSize=topology.encoder_msg_size,
+                                         numElements=topology.channel_buffer_size)
     encoderChannel.connect(None, encoderSnip)
 
     decoderSnip = board.createSnip(phase=Phase.EMBEDDED_MGMT,
@@ -166,32 +188,94 @@ if __name__ == "__main__":
                                    funcName=DECODER_FUNC_NAME,
                                    guardName=DECODER_GUARD_NAME)
 
-    decoderChannel = board.createChannel(name=b'nxDecoder',
-                                         messageSize=DECODER_MSG_SIZE,
-                                         numElements=CHANNEL_BUFFER_SIZE)
+    decoderChannel = board.createChannel(name=topology.decoder_channel.encode(),
+                                         messageSize=topology.decoder_msg_size,
+                                         numElements=topology.channel_buffer_size)
     decoderChannel.connect(decoderSnip, None)
 
+    return encoderChannel, decoderChannel
 
-    # Used to halt the pipeline processes
-    stop_event = threading.Event()
-    # Used for inter-thread communication between the pipeline processes
-    encoder_queue = queue.Queue()
-    decoder_queue = queue.Queue()
+
+if __name__ == "__main__":
+    
+    debug_enabled, probe_enabled, multiprocess_enabled, log_levels = cli_parser()
+
+    logs = PipelineLogger()
+    if debug_enabled:
+        logs.set_all_levels(DEBUG)
+    for subsystem, level in log_levels.items():
+        logs.set_level(subsystem, level)
+
+    # Firmware upload and the network build don't depend on each other, run them side by side
+    plan = StartupPlan()
+    plan.add("firmware", arduino_manager.run)
+    plan.add("topology", lambda: TOPOLOGY.write_snip_header(INCLUDE_DIR))
+    plan.add("net", lambda: build_network(probe_enabled))
+    plan.add("compile", compile_network, deps=["net"])
+    plan.add("channels", create_snips_and_channels, deps=["compile"])
+    # Reads the compiled maps, kept after the snips so nxsdk never sees two threads on one board
+    plan.add("resource_maps", lambda network, board, channels: store_resource_maps(*network[:4], board),
+             deps=["net", "compile", "channels"])
+    plan.add("snip_ports", lambda network, board, resource_map, topology: write_port_header(network, board),
+             deps=["net", "compile", "resource_maps", "topology"])
+    print("Starting Coprocessor and building network...")
+    try:
+        results = plan.run()
+    except StartupError as e:
+        print(f"An error occurred during startup: {e}")
+        print(plan.timeline())
+        exit(1)
+    print(plan.timeline())
+    plan.save(STARTUP_LOG)
+
+    net, neurons, inputSynapseIds, outputSynapseIds, probes = results["net"]
+    board = results["compile"]
+    encoderChannel, decoderChannel = results["channels"]
+    print("Logical Input Synapse IDs:", inputSynapseIds)
+    print("Logical Output Synapse IDs:", outputSynapseIds)
+    print("Resource Maps:")
+    print(results["resource_maps"])
+    if probe_enabled:
+        u_probes, v_probes, s_probes = zip(*probes)
+
+    if multiprocess_enabled:
+        # Serial pipeline lives in a child process, so the stop flag and both queues must be shared memory
+        stop_event = multiprocessing.Event()
+        encoder_queue = SharedRingBuffer(RING_BUFFER_CAPACITY, slot_size=QUEUE_MSG_SIZE)
+        decoder_queue = SharedRingBuffer(RING_BUFFER_CAPACITY, slot_size=DECODER_MSG_SIZE)
+    else:
+        # Used to halt the pipeline processes
+        stop_event = threading.Event()
+        # Used for inter-thread communication between the pipeline processes
+        encoder_queue = queue.Queue()
+        decoder_queue = queue.Queue()
+
+    # Shared memory, so the serial stages are traced in either mode
+    tracer = LatencyTracer()
+    signal.signal(signal.SIGUSR1, lambda signum, frame: print(tracer.summary()))
 
     encoder_thr = threading.Thread(target=encoder_thread, 
-                                   args=(encoderChannel, stop_event, encoder_queue, debug_enabled))
+                                   args=(encoderChannel, stop_event, encoder_queue, logs.get_logger("encoder"), tracer,
+                                         TOPOLOGY.ports_per_message, TOPOLOGY.encoder_batch_size))
     
     decoder_thr = threading.Thread(target=decoder_thread, 
-                                   args=(decoderChannel, stop_event, decoder_queue, debug_enabled))
+                                   args=(decoderChannel, stop_event, decoder_queue, logs.get_logger("decoder"), NUM_NEURONS, tracer))
 
-    serial_pipeline = SerialDataPipeline(USB_SERIAL_PORT, BAUD_RATE, stop_event, encoder_queue, decoder_queue, debug_enabled)
-    serial_thr = threading.Thread(target=serial_pipeline.run)
+    serial_pipeline = SerialDataPipeline(USB_SERIAL_PORT, BAUD_RATE, stop_event, encoder_queue, decoder_queue,
+                                         logs.get_logger("serial"), tracer)
+    if multiprocess_enabled:
+        serial_thr = multiprocessing.Process(target=serial_process_main, args=(serial_pipeline, logs),
+                                             name="serial_pipeline")
+    else:
+        serial_thr = threading.Thread(target=serial_pipeline.run)
 
     
+    # The serial process is forked first, before board.start() and the channel threads, so it inherits none of
+    # nxsdk's connection threads or a lock held mid-operation. The queues buffer until the board runs.
+    serial_thr.start()
     board.start()
     encoder_thr.start()
     decoder_thr.start()
-    serial_thr.start()
     try:
         # Run the board and the pipeline threads
         board.run(NUM_STEP, aSync=True)
@@ -204,12 +288,19 @@ if __name__ == "__main__":
         print("Run finished")
     
     finally:
-        #Stop the pipeline threads
-        encoder_thr.join()
-        decoder_thr.join()
-        serial_thr.join()
+        #Stop the pipeline threads, also covers KeyboardInterrupt or a failed run
+        stop_event.set()
+        encoder_thr.join(SHUTDOWN_TIMEOUT)
+        decoder_thr.join(SHUTDOWN_TIMEOUT)
+        serial_thr.join(SHUTDOWN_TIMEOUT)
+        if multiprocess_enabled and serial_thr.is_alive():
+            error_logger("Serial pipeline process did not exit, terminating it")
+            serial_thr.terminate()
+            serial_thr.join()
 
         board.disconnect()
+        logs.close()
+        print(tracer.summary())
 
         # Plot the probes
         if probe_enabled:
@@ -0,0 +1,207 @@
+"""
+@Brief: Low-overhead logging for the pipeline hot paths (serial loop, encoder and decoder threads).
+
+@Notes:
+    - debug_logger(f"...", debug_enabled) builds its f-string on every byte even when debugging is off.
+      Here the level check comes first and the message is never formatted on the calling thread, so a
+      disabled call costs a method call and one compare. Where even that matters, guard the call with
+      `if log.level >= DEBUG:`.
+    - An enabled call appends a raw record (sequence, perf_counter_ns, level, subsystem, format string, args)
+      to a preallocated ring. Slots are claimed with next() on an itertools.count, which is atomic in CPython,
+      so writers never take a lock. If the writer thread falls a full ring behind, the oldest records are
+      dropped and counted rather than blocking the pipeline.
+    - A background thread drains the ring every FLUSH_INTERVAL and does the %-formatting and printing.
+    - Levels are per subsystem ("serial", "encoder", "decoder", ...) and match include/Logging.h in dummy-pipeline-2.0.
+    - The logger can be handed to a --multiprocess worker (forked or spawned). Each process gets its own ring
+      and writer thread, which is started on the first enabled record. Call close() before the worker exits.
+
+@Usage:
+    logs = PipelineLogger()
+    log = logs.get_logger("encoder", DEBUG)
+    log.debug("Data received from pipeline: %d", value)
+    logs.close()
+
+@Author: Reece Wayt
+"""
+import os
+import sys
+import time
+import itertools
+import weakref
+import threading
+
+"""Log levels"""
+NONE = 0
+ERROR = 1
+WARN = 2
+INFO = 3
+DEBUG = 4
+LEVEL_NAMES = {ERROR: "ERROR", WARN: "WARN", INFO: "INFO", DEBUG: "DEBUG"}
+
+DEFAULT_CAPACITY = 1 << 14  # records held between flushes
+FLUSH_INTERVAL = 0.05       # [sec] between background drains
+
+
+def parse_level(name):
+    """Accepts a level name ("debug", "INFO", ...) or number, returns the level number."""
+    if str(name).isdigit():
+        return int(name)
+    levels = {v: k for k, v in LEVEL_NAMES.items()}
+    levels["NONE"] = NONE
+    try:
+        return levels[str(name).upper()]
+    except KeyError:
+        raise ValueError(f"unknown log level: {name}")
+
+
+class SubsystemLogger:
+    """Handle for one subsystem. The level is a plain attribute so the disabled check stays cheap."""
+    __slots__ = ("name", "level", "_sink")
+
+    def __init__(self, name, level, sink):
+        self.name = name
+        self.level = level
+        self._sink = sink
+
+    def enabled_for(self, level):
+        return self.level >= level
+
+    def error(self, fmt, *args):
+        if self.level >= ERROR:
+            self._sink.append(ERROR, self.name, fmt, args)
+
+    def warn(self, fmt, *args):
+        if self.level >= WARN:
+            self._sink.append(WARN, self.name, fmt, args)
+
+    def info(self, fmt, *args):
+        if self.level >= INFO:
+            self._sink.append(INFO, self.name, fmt, args)
+
+    def debug(self, fmt, *args):
+        if self.level >= DEBUG:
+            self._sink.append(DEBUG, self.name, fmt, args)
+
+
+# A forked worker inherits the parent's rings but not their writer threads, every live logger starts clean in the
+# child. One hook for the module, the WeakSet does not keep loggers alive.
+_live_loggers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for logger in list(_live_loggers):
+        logger._reset_ring()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class PipelineLogger:
+    """
+    Attributes:
+        capacity (int): Number of records the ring holds before the oldest are overwritten.
+        dropped_count (int): Records overwritten before the writer thread got to them.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, stream=None, default_level=ERROR):
+        self.capacity = capacity
+        self.stream = stream
+        self.default_level = default_level
+        self._loggers = {}
+        self._reset_ring()
+        _live_loggers.add(self)
+
+    def _reset_ring(self):
+        self._ring = [None] * self.capacity
+        self._next_seq = itertools.count()
+        self._read_seq = 0
+        self.dropped_count = 0
+        self._stop_event = threading.Event()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Rings and threads are per process, a child starts with an empty ring and its own writer
+        state = self.__dict__.copy()
+        for key in ("_ring", "_next_seq", "_stop_event", "_writer", "_writer_lock"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_ring()
+        _live_loggers.add(self)
+
+    def get_logger(self, subsystem, level=None):
+        """Returns the logger for `subsystem`, creating it at `level` (or the default level) if needed."""
+        logger = self._loggers.get(subsystem)
+        if logger is None:
+            logger = SubsystemLogger(subsystem, self.default_level if level is None else level, self)
+            self._loggers[subsystem] = logger
+        elif level is not None:
+            logger.level = level
+        return logger
+
+    def set_level(self, subsystem, level):
+        self.get_logger(subsystem).level = level
+
+    def set_all_levels(self, level):
+        self.default_level = level
+        for logger in self._loggers.values():
+            logger.level = level
+
+    def append(self, level, subsystem, fmt, args):
+        """Called by SubsystemLogger once the level check has passed. Never formats or blocks."""
+        seq = next(self._next_seq)
+        self._ring[seq % self.capacity] = (seq, time.perf_counter_ns(), level, subsystem, fmt, args)
+        if self._writer is None:
+            self._start_writer()
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="pipeline_log", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while not self._stop_event.wait(FLUSH_INTERVAL):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Formats and writes every record published so far. Safe to call from any one thread at a time."""
+        stream = self.stream or sys.stdout
+        lines = []
+        while True:
+            record = self._ring[self._read_seq % self.capacity]
+            if record is None or record[0] < self._read_seq:
+                break  # slot not written yet
+            if record[0] > self._read_seq:
+                # Writers lapped us: the ring still holds the newest `capacity` records, resume at the oldest of
+                # them and count only what was overwritten
+                newest = max(record[0], max(r[0] for r in self._ring if r is not None))
+                oldest = newest - self.capacity + 1
+                self.dropped_count += oldest - self._read_seq
+                self._read_seq = oldest
+                continue
+            _, _, level, subsystem, fmt, args = record
+            try:
+                message = fmt % args if args else fmt
+            except (TypeError, ValueError) as e:
+                message = f"{fmt!r} % {args!r} failed: {e}"
+            lines.append(f"[{LEVEL_NAMES.get(level, level)}] {subsystem}: {message}\n")
+            self._read_seq += 1
+        if lines:
+            stream.write("".join(lines))
+            stream.flush()
+
+    def close(self):
+        """Stops the writer thread after a final drain."""
+        self._stop_event.set()
+        if self._writer is not None:
+            self._writer.join()
+        else:
+            self.flush()
+        if self.dropped_count:
+            (self.stream or sys.stdout).write(f"[WARN] pipeline_log: {self.dropped_count} records dropped\n")
@@ -1,54 +1,75 @@
 import serial
 import multiprocessing
 import time
+from latency_trace import SERIAL_RX, SERIAL_TX
+from channel_threads import unpack_decoder_message
+from spike_protocol import FrameDecoder, encode_control, encode_spike_frames, FRAME_START, FRAME_STOP
+
+QUEUE_MSG_SIZE = 4  # neuron IDs on the encoder queue, matches the channel message size
+ENDIANNESS = 'little'
 
 
 class SerialDataPipeline:
-    def __init__(self, port, baud_rate, stop_event, encoder_queue, decoder_queue, debug_enabled):
+    def __init__(self, port, baud_rate, stop_event, encoder_queue, decoder_queue, log, tracer=None):
         self.port = port
         self.baud_rate = baud_rate
         self.stop_event = stop_event
         self.encoder_queue = encoder_queue
         self.decoder_queue = decoder_queue
-        self.debug_enabled = debug_enabled
+        self.log = log
+        self.tracer = tracer
         self.recv_data_count = 0
         self.send_data_count = 0
-
-    def debug_logger(self, message):
-        if self.debug_enabled: 
-            print(f"[DEBUG] {message}")
+        self.send_frame_count = 0
 
     def run(self):
+        """
+        Bridges the Teensy and the channel threads. Spike frames from the Teensy are unpacked into one
+        queue message (neuron ID) per spike. Each decoder queue message holds the spikes of one Loihi timestep
+        (a spike bitmask message, see channel_threads.py) and goes back as one spike frame stamped with that
+        timestep, split only if it is over the frame size limit. See spike_protocol.py for the wire format.
+        """
+        ser = None
+        frame_decoder = FrameDecoder()
         try:
             ser = serial.Serial(self.port, self.baud_rate, timeout=1)
             print(f"Connected to {self.port} at {self.baud_rate} baud.")
-            ser.write(b'\x00')
+            ser.write(encode_control(FRAME_START))
             print("Sent start signal to peripheral device.")
             
             while not self.stop_event.is_set():
                 if ser.in_waiting > 0:
-                    data = ser.read(1)
-                    self.encoder_queue.put(data)  # Pass raw bytes to encoder process
-                    self.debug_logger(f"Data received from teensy: {data}")
-                    self.recv_data_count += 1
-                if not self.decoder_queue.empty():
-                    data_to_send = self.decoder_queue.get()
-                    ser.write(data_to_send)
-                    self.send_data_count += 1
-                    self.debug_logger(f"Data sent to teensy: {data_to_send}")
+                    for frame in frame_decoder.feed(ser.read(ser.in_waiting)):
+                        for neuron_id in frame.neuron_ids:
+                            if self.tracer:
+                                self.tracer.stamp(SERIAL_RX, self.recv_data_count)
+                            self.encoder_queue.put(neuron_id.to_bytes(QUEUE_MSG_SIZE, byteorder=ENDIANNESS))
+                            self.recv_data_count += 1
+                        self.log.debug("Frame received from teensy: %s", frame)
+                while not self.decoder_queue.empty():
+                    time_step, neuron_ids = unpack_decoder_message(self.decoder_queue.get())
+                    frames, spike_count = encode_spike_frames(time_step, neuron_ids)
+                    ser.write(b''.join(frames))
+                    if self.tracer:
+                        for ii in range(spike_count):
+                            self.tracer.stamp(SERIAL_TX, self.send_data_count + ii)
+                    self.send_data_count += spike_count
+                    self.send_frame_count += len(frames)
+                    self.log.debug("Spikes sent to teensy at timestep %d: %s", time_step, neuron_ids)
 
 
         except serial.SerialException as e:
             print(f"Error opening serial port: {e}")
 
         finally:
-            if ser.is_open:
-                ser.write(b'\xFF')
+            if ser is not None and ser.is_open:
+                ser.write(encode_control(FRAME_STOP, self.send_frame_count))
                 print("Sent shutdown signal to peripheral device.")
                 ser.close()
             print("Serial port closed, pipeline exiting.")
-            print(f"Total data received: {self.recv_data_count} bytes")
-            print(f"Total data sent: {self.send_data_count} bytes")
+            print(f"Total spikes received: {self.recv_data_count} in {frame_decoder.frame_count} frames")
+            print(f"Total spikes sent: {self.send_data_count} in {self.send_frame_count} frames")
+            print(f"Corrupt frames dropped: {frame_decoder.error_count}")
 
 
     def get_recv_data_count(self):
@@ -4,32 +4,38 @@
 #include <time.h>
 #include <unistd.h>
 
-#define OUTPUT_DIM 2
-
 int spikeCountCx = 0;
 int channelID = -1;
-int data[4] = {1, 2, 3, 4};
 
 int output_spike_activity[OUTPUT_DIM] = {0};
+static uint32_t spike_message[DECODER_MSG_WORDS]; // time step + spike bitmask, see spike_bitmask.h
                   
 
 int do_decoding(runState *s) {
     if (s->time_step==1){
-        channelID = getChannelID("nxDecoder"); 
+        channelID = getChannelID(DECODER_CHANNEL); 
     }
     return 1;
 }
 
 void run_decoding(runState *s) {
     int time = s->time_step;
+    int spiked = 0;
+    memset(spike_message, 0, sizeof(spike_message));
+    spike_message[0] = time;
     for(int ii = 0; ii < OUTPUT_DIM; ii++){
-        if(SPIKE_COUNT[(time)&3][0x20+ii] > 0){
+        // output synapse counters start at SPIKE_COUNTER_OFFSET, in the order they are created
+        if(SPIKE_COUNT[(time)&3][SPIKE_COUNTER_OFFSET+ii] > 0){
             //printf("Spike output here\n");
-            writeChannel(channelID, &ii, 1); // Outputs which neuron spiked
-            //writeChannel(channelID, &s->time_step, 1); // Outputs the time step
-            SPIKE_COUNT[(s->time_step-1)&3][0x20+ii] = 0;    // Lakemont spike counters need to be cleared after reading to prevent overflow 
+            spike_message[1 + ii / 32] |= 1u << (ii % 32); // Marks which neuron spiked
+            spiked = 1;
+            SPIKE_COUNT[(s->time_step-1)&3][SPIKE_COUNTER_OFFSET+ii] = 0;    // Lakemont spike counters need to be cleared after reading to prevent overflow 
         }
     }
+    // One message per timestep however many neurons spiked, nothing on quiet timesteps
+    if(spiked){
+        writeChannel(channelID, spike_message, 1);
+    }
     /*
     int time = s->time_step;
     for(int ii = 0; ii < OUTPUT_DIM; ii++){
@@ -1,4 +1,5 @@
 #include "nxsdk.h"
+#include "spike_bitmask.h"
 
 int do_decoding(runState *s);
 void run_decoding(runState *s);
@@ -10,17 +10,16 @@
 #include <string.h>
 #include "nxsdk.h"
 #include "encoder.h"
+#include "topology_ports.h"  // generated from topology.json by utils/topology.py
 
 static int time= 0; // Global time variable
-static int chip = 0;
-static int core = 0; 
-static int axon;
+static int ports[ENCODER_MSG_WORDS]; // input port numbers, index the INPUT_* placement tables
 static int channelId = -1; // Encoder channel ID
 
 int do_encoding(runState *s){
     if((s->time_step >= 0) & (channelId = -1)){
         // Get the channel ID of the encoder
-        channelId = getChannelID("nxEncoder");
+        channelId = getChannelID(ENCODER_CHANNEL);
     }
     if(channelId == -1){
         printf("Error: Could not find encoder channel\n");
@@ -35,12 +34,23 @@ int do_encoding(runState *s){
 void run_encoding(runState *s){
     //printf("Running spiking process\n"); // Debugging
     time = s->time_step;
-    readChannel(channelId, &axon, 1);
-    //printf("Read channel axonId %d\n", axon); // Debugging
-    uint16_t axonId = 1 << 14 | (axon & 0x3FFF);
-    ChipId chipId = nx_nth_chipid(chip);
-    //printf("Sending spike at time : %d, axonId %d\n", time, axonId);
+    readChannel(channelId, ports, 1);
+    // One message carries up to ENCODER_MSG_WORDS spikes, unused words are EMPTY_PORT
+    for(int ii = 0; ii < ENCODER_MSG_WORDS; ii++){
+        int port = ports[ii];
+        //printf("Read channel port %d\n", port); // Debugging
+        if(port == EMPTY_PORT){
+            continue;
+        }
+        if(port < 0 || port >= NUM_INPUTS){
+            printf("Error: input port %d out of range, NUM_INPUTS is %d\n", port, NUM_INPUTS);
+            continue;
+        }
+        uint16_t axonId = 1 << 14 | (INPUT_AXON[port] & 0x3FFF);
+        ChipId chipId = nx_nth_chipid(INPUT_CHIP[port]);
+        //printf("Sending spike at time : %d, axonId %d\n", time, axonId);
 
-    //send spike
-    nx_send_remote_event(time, chipId, (CoreId){.id=4+core}, axonId);
+        //send spike
+        nx_send_remote_event(time, chipId, (CoreId){.id=CORE_ID_OFFSET+INPUT_CORE[port]}, axonId);
+    }
 }
@@ -0,0 +1,234 @@
+"""
+@Brief: Framed binary protocol for the Teensy <-> LattePanda serial link.
+
+@Notes:
+    - Replaces the one-raw-byte-per-spike link, where 0x00 (start) and 0xFF (shutdown) shared the byte
+      space with neuron IDs and IDs were capped at 256.
+    - Frame layout before framing, all fields little-endian:
+          type (u8) | timestep (u32) | body | crc16 (u16)
+      The CRC is CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) over type, timestep and body.
+    - Frames are COBS encoded and end with a 0x00 delimiter. COBS output never contains 0x00, so a reader
+      can always resynchronise on the next delimiter after a dropped or corrupted byte.
+    - Spike frames carry every neuron that fired in one timestep. The body is either a bitmask (bit i of
+      byte i//8 set means neuron i fired) or a spike list of a u16 count followed by u16 neuron IDs.
+      encode_spikes picks whichever is shorter.
+    - Bodies are capped at MAX_FRAME_BODY bytes, the size of the Teensy's frame buffers (MAX_FRAME_BODY in
+      teensy/SpikeFrame.h, keep the two equal). A mask frame covers neurons 0-511, a list frame up to 31 IDs.
+      encode_spikes rejects a timestep that fits neither, encode_spike_frames splits it over several frames
+      with the same timestep.
+    - The matching C++ implementation for the Teensy lives in teensy/SpikeFrame.{h,cpp}.
+
+@Author: Reece Wayt
+"""
+import binascii
+import struct
+from collections import namedtuple
+
+"""Frame types"""
+FRAME_START = 0x01        # host -> teensy, start the oscillator
+FRAME_STOP = 0x02         # host -> teensy, shut down
+FRAME_SPIKE_MASK = 0x03   # body is a neuron bitmask
+FRAME_SPIKE_LIST = 0x04   # body is a u16 count followed by u16 neuron IDs
+CONTROL_FRAMES = (FRAME_START, FRAME_STOP)
+
+FRAME_DELIMITER = b'\x00'
+HEADER_FORMAT = "<BI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CRC_FORMAT = "<H"
+CRC_SIZE = struct.calcsize(CRC_FORMAT)
+MAX_NEURON_ID = 0xFFFF
+MAX_FRAME_BODY = 64  # bytes, MAX_FRAME_BODY in teensy/SpikeFrame.h
+MAX_FRAME_PAYLOAD = HEADER_SIZE + MAX_FRAME_BODY + CRC_SIZE
+MAX_FRAME_SIZE = MAX_FRAME_PAYLOAD + MAX_FRAME_PAYLOAD // 254 + 2  # encoded bytes, MAX_ENCODED_FRAME on the Teensy
+
+Frame = namedtuple("Frame", ["type", "timestep", "neuron_ids"])
+
+
+class FrameError(ValueError):
+    """Raised when a frame fails COBS decoding, CRC check or has an invalid body."""
+
+
+def crc16(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data):
+    out = bytearray(b'\x00')
+    code_index = 0
+    code = 1
+    for byte in data:
+        if byte:
+            out.append(byte)
+            code += 1
+        if not byte or code == 0xFF:
+            out[code_index] = code
+            code_index = len(out)
+            out.append(0)
+            code = 1
+    out[code_index] = code
+    return bytes(out)
+
+
+def cobs_decode(data):
+    out = bytearray()
+    index = 0
+    while index < len(data):
+        code = data[index]
+        if code == 0 or index + code > len(data):
+            raise FrameError("malformed COBS block")
+        out += data[index + 1:index + code]
+        index += code
+        if code < 0xFF and index < len(data):
+            out.append(0)
+    return bytes(out)
+
+
+def _pack(frame_type, timestep, body=b''):
+    payload = struct.pack(HEADER_FORMAT, frame_type, timestep & 0xFFFFFFFF) + body
+    payload += struct.pack(CRC_FORMAT, crc16(payload))
+    return cobs_encode(payload) + FRAME_DELIMITER
+
+
+def encode_control(frame_type, timestep=0):
+    """Encodes a FRAME_START or FRAME_STOP frame ready to write to the serial port."""
+    if frame_type not in CONTROL_FRAMES:
+        raise ValueError(f"not a control frame type: {frame_type}")
+    return _pack(frame_type, timestep)
+
+
+def _body_size(count, max_id):
+    """Bytes of the shorter body for `count` unique IDs up to `max_id`, and whether that is the bitmask."""
+    mask_size = (max_id // 8 + 1) if count else 0
+    list_size = 2 + 2 * count
+    return min(mask_size, list_size), mask_size <= list_size
+
+
+def _spike_ids(neuron_ids):
+    ids = sorted(set(neuron_ids))
+    if ids and not 0 <= ids[0] <= ids[-1] <= MAX_NEURON_ID:
+        raise ValueError(f"neuron IDs must be in [0, {MAX_NEURON_ID}]")
+    return ids
+
+
+def encode_spikes(timestep, neuron_ids):
+    """
+    Encodes the neurons that fired in one timestep as a single frame.
+
+    Parameters:
+        timestep (int): Sender's timestep counter, wraps at 2^32.
+        neuron_ids (iterable of int): IDs in [0, MAX_NEURON_ID]. A neuron fires at most once per timestep, so
+            duplicates are merged.
+
+    Returns:
+        bytes: The encoded frame including its delimiter.
+
+    Raises:
+        ValueError: If the spikes need a body over MAX_FRAME_BODY, use encode_spike_frames for those.
+    """
+    ids = _spike_ids(neuron_ids)
+    size, as_mask = _body_size(len(ids), ids[-1] if ids else 0)
+    if size > MAX_FRAME_BODY:
+        raise ValueError(f"{len(ids)} spikes up to neuron {ids[-1]} need a {size} byte body, "
+                         f"over MAX_FRAME_BODY ({MAX_FRAME_BODY})")
+    if as_mask:
+        mask = bytearray(size)
+        for neuron_id in ids:
+            mask[neuron_id >> 3] |= 1 << (neuron_id & 7)
+        return _pack(FRAME_SPIKE_MASK, timestep, bytes(mask))
+    return _pack(FRAME_SPIKE_LIST, timestep, struct.pack(f"<H{len(ids)}H", len(ids), *ids))
+
+
+def encode_spike_frames(timestep, neuron_ids):
+    """
+    Encodes the neurons that fired in one timestep as few frames as fit in MAX_FRAME_BODY, all carrying
+    `timestep`. One frame whenever encode_spikes would accept the spikes.
+
+    Returns:
+        (list of bytes, int): The encoded frames, and the number of spikes they carry.
+    """
+    ids = _spike_ids(neuron_ids)
+    frames = []
+    first = 0
+    # IDs are sorted, so both body sizes only grow as a frame takes more of them
+    for last in range(1, len(ids) + 1):
+        if _body_size(last - first, ids[last - 1])[0] > MAX_FRAME_BODY:
+            frames.append(encode_spikes(timestep, ids[first:last - 1]))
+            first = last - 1
+    if first < len(ids) or not ids:
+        frames.append(encode_spikes(timestep, ids[first:]))
+    return frames, len(ids)
+
+
+def decode_frame(encoded):
+    """
+    Decodes one frame without its delimiter.
+
+    Returns:
+        Frame: (type, timestep, neuron_ids), neuron_ids is empty for control frames.
+
+    Raises:
+        FrameError: If the frame is corrupt.
+    """
+    payload = cobs_decode(encoded)
+    if len(payload) < HEADER_SIZE + CRC_SIZE:
+        raise FrameError(f"frame too short ({len(payload)} bytes)")
+    (crc,) = struct.unpack_from(CRC_FORMAT, payload, len(payload) - CRC_SIZE)
+    if crc != crc16(payload[:-CRC_SIZE]):
+        raise FrameError("CRC mismatch")
+    frame_type, timestep = struct.unpack_from(HEADER_FORMAT, payload)
+    body = payload[HEADER_SIZE:-CRC_SIZE]
+    if len(body) > MAX_FRAME_BODY:
+        raise FrameError(f"body of {len(body)} bytes is over MAX_FRAME_BODY ({MAX_FRAME_BODY})")
+
+    if frame_type in CONTROL_FRAMES:
+        neuron_ids = ()
+    elif frame_type == FRAME_SPIKE_MASK:
+        neuron_ids = tuple(8 * i + bit for i, byte in enumerate(body) if byte for bit in range(8) if byte >> bit & 1)
+    elif frame_type == FRAME_SPIKE_LIST:
+        if len(body) < 2 or len(body) != 2 + 2 * struct.unpack_from("<H", body)[0]:
+            raise FrameError("spike list length does not match its count")
+        neuron_ids = struct.unpack_from(f"<{(len(body) - 2) // 2}H", body, 2)
+    else:
+        raise FrameError(f"unknown frame type 0x{frame_type:02X}")
+    return Frame(frame_type, timestep, neuron_ids)
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for a byte stream. Feed it whatever the serial port returned and it yields the
+    complete frames, keeping any partial frame for the next call. Corrupt frames are counted and skipped.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.frame_count = 0
+        self.error_count = 0
+
+    def feed(self, data):
+        """
+        Parameters:
+            data (bytes): Newly received bytes.
+
+        Returns:
+            list of Frame: Frames completed by this chunk, in arrival order.
+        """
+        self._buffer += data
+        frames = []
+        while True:
+            end = self._buffer.find(FRAME_DELIMITER)
+            if end < 0:
+                if len(self._buffer) > MAX_FRAME_SIZE:
+                    # Lost a delimiter, drop what we have and resync on the next one
+                    self._buffer.clear()
+                    self.error_count += 1
+                break
+            encoded = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            if not encoded:
+                continue  # back-to-back delimiters, used as a resync preamble
+            try:
+                frames.append(decode_frame(encoded))
+                self.frame_count += 1
+            except FrameError:
+                self.error_count += 1
+        return frames
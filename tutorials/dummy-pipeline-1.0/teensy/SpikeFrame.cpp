@@ -0,0 +1,143 @@
+/*
+COBS framing and CRC for the Teensy side of the spike protocol, see SpikeFrame.h
+*/
+
+#include "SpikeFrame.h"
+
+uint16_t crc16(const uint8_t* data, size_t len) {
+    uint16_t crc = 0xFFFF;
+    for (size_t i = 0; i < len; i++) {
+        crc ^= (uint16_t)data[i] << 8;
+        for (int bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+        }
+    }
+    return crc;
+}
+
+size_t cobsEncode(const uint8_t* in, size_t len, uint8_t* out) {
+    size_t codeIndex = 0;
+    size_t outLen = 1;
+    uint8_t code = 1;
+    for (size_t i = 0; i < len; i++) {
+        if (in[i]) {
+            out[outLen++] = in[i];
+            code++;
+        }
+        if (!in[i] || code == 0xFF) {
+            out[codeIndex] = code;
+            codeIndex = outLen++;
+            code = 1;
+        }
+    }
+    out[codeIndex] = code;
+    return outLen;
+}
+
+size_t cobsDecode(const uint8_t* in, size_t len, uint8_t* out) {
+    size_t index = 0;
+    size_t outLen = 0;
+    while (index < len) {
+        uint8_t code = in[index];
+        if (code == 0 || index + code > len) {
+            return 0;
+        }
+        for (uint8_t i = 1; i < code; i++) {
+            out[outLen++] = in[index + i];
+        }
+        index += code;
+        if (code < 0xFF && index < len) {
+            out[outLen++] = 0;
+        }
+    }
+    return outLen;
+}
+
+size_t buildFrame(uint8_t type, uint32_t timestep, const uint8_t* body, size_t bodyLen, uint8_t* out) {
+    uint8_t payload[MAX_FRAME_PAYLOAD];
+    if (bodyLen > MAX_FRAME_BODY) {
+        return 0;
+    }
+    payload[0] = type;
+    for (int i = 0; i < 4; i++) {
+        payload[1 + i] = (timestep >> (8 * i)) & 0xFF;
+    }
+    memcpy(payload + FRAME_HEADER_SIZE, body, bodyLen);
+    size_t len = FRAME_HEADER_SIZE + bodyLen;
+    uint16_t crc = crc16(payload, len);
+    payload[len++] = crc & 0xFF;
+    payload[len++] = crc >> 8;
+
+    size_t encodedLen = cobsEncode(payload, len, out);
+    out[encodedLen++] = 0x00; // delimiter
+    return encodedLen;
+}
+
+size_t buildSpikeMaskFrame(uint32_t timestep, uint32_t neuronMask, uint8_t* out) {
+    uint8_t mask[4];
+    size_t maskLen = 0;
+    for (int i = 0; i < 4; i++) {
+        mask[i] = (neuronMask >> (8 * i)) & 0xFF;
+        if (mask[i]) {
+            maskLen = i + 1; // trailing zero bytes are implied
+        }
+    }
+    return buildFrame(FRAME_SPIKE_MASK, timestep, mask, maskLen, out);
+}
+
+FrameReader::FrameReader()
+    : encodedLen(0), bodyLen(0), frameType(0), frameTimestep(0), errors(0), overflow(false) {}
+
+bool FrameReader::feed(uint8_t byte) {
+    if (byte != 0x00) {
+        if (encodedLen < sizeof(encoded)) {
+            encoded[encodedLen++] = byte;
+        } else {
+            overflow = true;
+        }
+        return false;
+    }
+
+    // Delimiter: decode whatever was collected, then reset for the next frame
+    size_t len = overflow ? 0 : cobsDecode(encoded, encodedLen, payload);
+    bool wasEmpty = encodedLen == 0 && !overflow;
+    encodedLen = 0;
+    overflow = false;
+    if (wasEmpty) {
+        return false;
+    }
+    if (len < FRAME_HEADER_SIZE + FRAME_CRC_SIZE) {
+        errors++;
+        return false;
+    }
+    uint16_t crc = payload[len - 2] | (payload[len - 1] << 8);
+    if (crc != crc16(payload, len - FRAME_CRC_SIZE)) {
+        errors++;
+        return false;
+    }
+    frameType = payload[0];
+    frameTimestep = 0;
+    for (int i = 0; i < 4; i++) {
+        frameTimestep |= (uint32_t)payload[1 + i] << (8 * i);
+    }
+    bodyLen = len - FRAME_HEADER_SIZE - FRAME_CRC_SIZE;
+    return true;
+}
+
+void FrameReader::forEachSpike(void (*callback)(uint16_t)) const {
+    const uint8_t* body = payload + FRAME_HEADER_SIZE;
+    if (frameType == FRAME_SPIKE_MASK) {
+        for (size_t i = 0; i < bodyLen; i++) {
+            for (int bit = 0; bit < 8; bit++) {
+                if (body[i] & (1 << bit)) {
+                    callback(8 * i + bit);
+                }
+            }
+        }
+    } else if (frameType == FRAME_SPIKE_LIST && bodyLen >= 2) {
+        uint16_t count = body[0] | (body[1] << 8);
+        for (uint16_t i = 0; i < count && (size_t)(3 + 2 * i) < bodyLen; i++) {
+            callback(body[2 + 2 * i] | (body[3 + 2 * i] << 8));
+        }
+    }
+}
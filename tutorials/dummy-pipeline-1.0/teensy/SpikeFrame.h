@@ -0,0 +1,57 @@
+/*
+Framed serial protocol shared with the LattePanda, see spike_protocol.py for the reference implementation.
+
+Frame layout before framing (little-endian):
+    type (u8) | timestep (u32) | body | crc16 (u16)
+- The CRC is CRC-16/CCITT-FALSE over type, timestep and body
+- Frames are COBS encoded and terminated with a 0x00 delimiter, so control frames can never be confused with data
+- Spike bodies are either a neuron bitmask (FRAME_SPIKE_MASK) or a u16 count followed by u16 IDs (FRAME_SPIKE_LIST)
+*/
+
+#ifndef SPIKE_FRAME_H
+#define SPIKE_FRAME_H
+
+#include <Arduino.h>
+
+#define FRAME_START 0x01
+#define FRAME_STOP 0x02
+#define FRAME_SPIKE_MASK 0x03
+#define FRAME_SPIKE_LIST 0x04
+
+#define FRAME_HEADER_SIZE 5
+#define FRAME_CRC_SIZE 2
+#define MAX_FRAME_BODY 64                                   // enough for a 512 neuron bitmask
+#define MAX_FRAME_PAYLOAD (FRAME_HEADER_SIZE + MAX_FRAME_BODY + FRAME_CRC_SIZE)
+#define MAX_ENCODED_FRAME (MAX_FRAME_PAYLOAD + MAX_FRAME_PAYLOAD / 254 + 2)
+
+uint16_t crc16(const uint8_t* data, size_t len);
+size_t cobsEncode(const uint8_t* in, size_t len, uint8_t* out);
+size_t cobsDecode(const uint8_t* in, size_t len, uint8_t* out);     // returns 0 on a malformed block
+
+// Builds a complete encoded frame (including delimiter) into out, returns its length
+size_t buildFrame(uint8_t type, uint32_t timestep, const uint8_t* body, size_t bodyLen, uint8_t* out);
+size_t buildSpikeMaskFrame(uint32_t timestep, uint32_t neuronMask, uint8_t* out);
+
+// Accumulates received bytes and decodes a frame each time a delimiter arrives
+class FrameReader {
+public:
+    FrameReader();
+    bool feed(uint8_t byte);                                // true once a valid frame is ready
+    uint8_t type() const { return frameType; }
+    uint32_t timestep() const { return frameTimestep; }
+    // Calls callback once per neuron in the last spike frame
+    void forEachSpike(void (*callback)(uint16_t)) const;
+    uint32_t errorCount() const { return errors; }
+
+private:
+    uint8_t encoded[MAX_ENCODED_FRAME];
+    uint8_t payload[MAX_ENCODED_FRAME];                     // decoded size never exceeds the encoded size
+    size_t encodedLen;
+    size_t bodyLen;
+    uint8_t frameType;
+    uint32_t frameTimestep;
+    uint32_t errors;
+    bool overflow;
+};
+
+#endif // SPIKE_FRAME_H
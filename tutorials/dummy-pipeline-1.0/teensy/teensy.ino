@@ -22,6 +22,7 @@ Teensy Code
 
 #include <Arduino.h>
 #include "Oscillator.h"
+#include "SpikeFrame.h"
 #include <arm_math.h>
 
 #define DATA_PIPELINE_BUS Serial2           //Pins:{7(Rx),8(Tx)}
@@ -39,16 +40,40 @@ byte write_buffer[BUFFER_SIZE];
 //to track data packet loss and integrity
 volatile long int sent_data_count = 0;
 volatile long int recv_data_count = 0;
+volatile long int dropped_frame_count = 0;
 
+FrameReader frame_reader;
+uint32_t start_millis = 0;
 
+
+// Each spike goes out as one frame stamped with the oscillator's 1ms timestep
 void spikeCallback(byte neuronId) {
-  if(DATA_PIPELINE_BUS.availableForWrite()){
-    DATA_PIPELINE_BUS.write(neuronId & 0x01);
+  uint8_t frame[MAX_ENCODED_FRAME];
+  size_t frame_len = buildSpikeMaskFrame(millis() - start_millis, 1UL << neuronId, frame);
+  if(DATA_PIPELINE_BUS.availableForWrite() >= (int)frame_len){
+    DATA_PIPELINE_BUS.write(frame, frame_len);
     sent_data_count++; 
     //HOST_COM.printf("Data sent %ld\n", sent_data_count); //debugging 
   }
   else{
-    //do nothing but add error logging soon
+    dropped_frame_count++; //never send a partial frame
+  }
+}
+
+void blinkForSpike(uint16_t neuronId) {
+  recv_data_count++;
+  //HOST_COM.printf("Data received from host, %d\n", neuronId);
+  if(neuronId == 1){
+    //HOST_COM.println("Blinking LED 1");
+    digitalWrite(LED1, HIGH);
+    delay(1);
+    digitalWrite(LED1, LOW);
+  }
+  else if(neuronId == 0){
+    //HOST_COM.println("Blinking LED 2");
+    digitalWrite(LED2, HIGH);
+    delay(1);
+    digitalWrite(LED2, LOW);
   }
 }
 
@@ -69,13 +94,17 @@ void setup() {
     DATA_PIPELINE_BUS.addMemoryForWrite(write_buffer, BUFFER_SIZE); //total is 139 bytes
     HOST_COM.println("Waiting for start command...\n");
     //HOST_COM.printf("Num bytes available for write...%d\n", DATA_PIPELINE_BUS.availableForWrite());
-    while(DATA_PIPELINE_BUS.available() == 0){
-        //busy waiting for start command
+    bool started = false;
+    while(!started){
+        //busy waiting for start frame, anything else is discarded
+        if(DATA_PIPELINE_BUS.available() > 0 && frame_reader.feed(DATA_PIPELINE_BUS.read())){
+            started = frame_reader.type() == FRAME_START;
+        }
     }
-    DATA_PIPELINE_BUS.read(); //flush out start command
     HOST_COM.println("Starting Oscillator Process...");
     delay(5);
     //start oscillator process
+    start_millis = millis();
     osc.setSpikeCallback(spikeCallback);
     osc.begin();
 }
@@ -83,25 +112,14 @@ void setup() {
 void loop() {
 
     while(DATA_PIPELINE_BUS.available() > 0){
-        byte data = DATA_PIPELINE_BUS.read();
-        recv_data_count++;
-        //HOST_COM.printf("Data received from host, %d\n", data);
-        if(data == 0x01){
-          //HOST_COM.println("Blinking LED 1");
-          digitalWrite(LED1, HIGH);
-          delay(1);
-          digitalWrite(LED1, LOW);
-        }
-        else if(data == 0x00){
-          //HOST_COM.println("Blinking LED 2");
-          digitalWrite(LED2, HIGH);
-          delay(1);
-          digitalWrite(LED2, LOW);
+        if(!frame_reader.feed(DATA_PIPELINE_BUS.read())){
+          continue; //frame not complete yet, or dropped by the CRC check
         }
-        else if(data == 0xFF){
+        if(frame_reader.type() == FRAME_STOP){
           //kill command
           handleKillCommand();
         }
+        frame_reader.forEachSpike(blinkForSpike);
     }
 
 }
@@ -116,6 +134,7 @@ void handleKillCommand(){
     HOST_COM.println("Kill command received. Shutting Down.");
     HOST_COM.printf("Recevied this many datas: %ld\n", recv_data_count);
     HOST_COM.printf("Send this many datas: %ld\n", sent_data_count);
+    HOST_COM.printf("Frames dropped (tx full / rx corrupt): %ld / %lu\n", dropped_frame_count, frame_reader.errorCount());
 
     while(true){
         __WFI();
@@ -0,0 +1,97 @@
+"""
+@Brief: Binary axon map handed from the superhost (main.py) to the host snips, replacing precomputed_axons.txt.
+
+@Notes:
+    - Layout, all little-endian, must match include/AxonMap.h:
+        header (32 bytes): magic "AXMP", uint16 version, uint16 header size, uint32 input count N,
+                           uint32 output count M, 16 reserved bytes
+        uint32[N] input axon IDs, uint32[N] input chip IDs, uint32[N] input core IDs
+        uint32[M] output axon IDs, uint32[M] output chip IDs, uint32[M] output core IDs
+    - Port i of each array belongs together, i.e. input port i is axon input_axons[i] on chip input_chips[i],
+      core input_cores[i]. The chip and core are the ones the encoder snip used to hard-code.
+    - The host snip mmaps the file and uses the arrays in place, so load cost does not grow with the number
+      of ports. Bump VERSION whenever the layout changes; both sides refuse a version they don't know.
+
+@Author: Reece Wayt
+"""
+import os
+import numpy as np
+from collections import namedtuple
+
+MAGIC = b"AXMP"
+VERSION = 1
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("header_size", "<u2"),
+    ("num_inputs", "<u4"),
+    ("num_outputs", "<u4"),
+    ("reserved", "<u4", (4,)),
+])
+ID_DTYPE = np.dtype("<u4")
+assert HEADER_DTYPE.itemsize == 32, "header layout must match AxonMapHeader in include/AxonMap.h"
+
+AxonMap = namedtuple("AxonMap", ["input_axons", "input_chips", "input_cores",
+                                 "output_axons", "output_chips", "output_cores"])
+
+
+def _ids(values, count, name):
+    ids = np.asarray(values if values is not None else np.zeros(count), dtype=np.int64)
+    if ids.shape != (count,):
+        raise ValueError(f"{name} has {ids.size} entries, expected {count}")
+    if ids.size and (ids.min() < 0 or ids.max() > np.iinfo(ID_DTYPE).max):
+        raise ValueError(f"{name} does not fit in uint32")
+    return ids.astype(ID_DTYPE)
+
+
+def write_axon_map(path, input_axons, output_axons, input_chips=None, input_cores=None,
+                   output_chips=None, output_cores=None):
+    """
+    Writes the axon map. Chip and core IDs default to 0 (single chip, first core) when not given.
+    The file is written to a temporary name and renamed, so a host snip never maps a half written file.
+    """
+    num_inputs, num_outputs = len(input_axons), len(output_axons)
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["header_size"] = HEADER_DTYPE.itemsize
+    header["num_inputs"] = num_inputs
+    header["num_outputs"] = num_outputs
+
+    # Validated before anything is written, a rejected map leaves no temporary file behind
+    arrays = [_ids(values, count, name) for values, count, name in [(input_axons, num_inputs, "input_axons"),
+                                                                    (input_chips, num_inputs, "input_chips"),
+                                                                    (input_cores, num_inputs, "input_cores"),
+                                                                    (output_axons, num_outputs, "output_axons"),
+                                                                    (output_chips, num_outputs, "output_chips"),
+                                                                    (output_cores, num_outputs, "output_cores")]]
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        header.tofile(f)
+        for ids in arrays:
+            ids.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def read_axon_map(path):
+    """Maps the file read-only and returns an AxonMap of uint32 views into it."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if data.size < HEADER_DTYPE.itemsize:
+        raise ValueError(f"{path}: too short for an axon map header")
+    header = data[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError(f"{path}: not an axon map (magic {header['magic']!r})")
+    if header["version"] != VERSION:
+        raise ValueError(f"{path}: axon map version {header['version']}, expected {VERSION}")
+
+    num_inputs, num_outputs = int(header["num_inputs"]), int(header["num_outputs"])
+    offset = int(header["header_size"])
+    expected_size = offset + 3 * ID_DTYPE.itemsize * (num_inputs + num_outputs)
+    if data.size != expected_size:
+        raise ValueError(f"{path}: {data.size} bytes, expected {expected_size}")
+
+    arrays = []
+    for count in (num_inputs,) * 3 + (num_outputs,) * 3:
+        arrays.append(data[offset:offset + count * ID_DTYPE.itemsize].view(ID_DTYPE))
+        offset += count * ID_DTYPE.itemsize
+    return AxonMap(*arrays)
@@ -0,0 +1,121 @@
+"""
+@Brief: Timesteps/sec against injection latency for each host snip schedule (every k, data-driven, adaptive),
+        so the trade can be made on purpose when setting host_snip_schedule in topology.json.
+
+@Notes:
+    - Runs on a virtual clock, no board or nxsdk needed. A timestep costs --step-us, every sequential host snip
+      run adds --sync-us during which the chip waits (the serialization the schedule is meant to avoid).
+      The data-driven mode polls from a concurrent snip every --poll-us and never holds up a timestep.
+    - The sequential modes use host_schedule.HostSnipSchedule, the mirror of include/HostSnipSchedule.h, and
+      ask it for a schedule every ADAPTIVE_CHUNK_STEPS timesteps as main.py does with board.run chunks.
+    - Spikes arrive from the Teensy as a Poisson process (--rate) with optional quiet periods (--duty), which
+      is where the adaptive stride earns its keep. A spike is injected on the first timestep after the host
+      snip that picked it up, latency is measured from arrival to that timestep.
+    - The default costs are placeholders. Time a board.run() with the host snips scheduled every timestep and
+      never to get --sync-us and --step-us for your own board.
+    - Run with `python benchmark_host_schedule.py [--steps 20000] [--rate 200] [--strides 1 2 4 8 16]`
+
+@Author: Reece Wayt
+"""
+import os
+import sys
+import argparse
+import collections
+import numpy as np
+from host_schedule import HostSnipSchedule, EVERY_K, ADAPTIVE, ADAPTIVE_CHUNK_STEPS
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.topology import Topology
+
+TOPOLOGY = Topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology.json'))
+PERCENTILES = [50, 99]
+
+Result = collections.namedtuple("Result", ["label", "steps_per_sec", "host_runs", "p50", "p99"])
+
+
+def arrival_times(duration, rate, duty, period=0.5, seed=0):
+    """Poisson arrivals at `rate` spikes/s, active for the first `duty` fraction of every `period` seconds."""
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.exponential(1.0 / rate, int(duration * rate * 2) + 1))
+    times = times[times < duration]
+    return times[(times % period) < duty * period]
+
+
+def run_sequential(schedule, arrivals, steps, step_cost, sync_cost):
+    """Returns (elapsed, host_runs, latencies) for the pre/post execution host snips on `schedule`."""
+    now = 0.0
+    next_arrival = 0
+    host_runs = 0
+    latencies = []
+    for chunk_start in range(1, steps + 1, ADAPTIVE_CHUNK_STEPS):
+        chunk = np.arange(chunk_start, min(chunk_start + ADAPTIVE_CHUNK_STEPS, steps + 1))
+        scheduled = set(schedule.select(chunk).tolist())
+        for timestep in chunk.tolist():
+            if timestep in scheduled:
+                now += sync_cost
+                host_runs += 1
+                picked = np.searchsorted(arrivals, now, side="right")
+                spikes = picked - next_arrival
+                latencies.append(now + step_cost - arrivals[next_arrival:picked])
+                next_arrival = picked
+                schedule.record(timestep, spikes)
+            now += step_cost
+    return now, host_runs, np.concatenate(latencies) if latencies else np.empty(0)
+
+
+def run_data_driven(arrivals, steps, step_cost, poll):
+    """Returns (elapsed, polls, latencies) for the concurrent SpikeStreamer snip."""
+    elapsed = steps * step_cost
+    arrivals = arrivals[arrivals < elapsed]
+    picked_up = np.ceil(arrivals / poll) * poll
+    # injected on the first timestep boundary after the write
+    injected = (np.floor(picked_up / step_cost) + 1) * step_cost
+    return elapsed, int(elapsed / poll), injected - arrivals
+
+
+def summarize(label, elapsed, steps, host_runs, latencies):
+    if latencies.size:
+        p50, p99 = np.percentile(latencies, PERCENTILES)
+    else:
+        p50 = p99 = np.nan
+    return Result(label, steps / elapsed, host_runs, p50, p99)
+
+
+def benchmark(steps, rate, duty, strides, step_cost, sync_cost, poll, max_stride, target_spikes):
+    duration = steps * (step_cost + sync_cost)  # long enough for the slowest schedule
+    arrivals = arrival_times(duration, rate, duty)
+    results = []
+    for stride in strides:
+        elapsed, runs, latencies = run_sequential(HostSnipSchedule(EVERY_K, stride), arrivals, steps,
+                                                  step_cost, sync_cost)
+        results.append(summarize(f"every_k k={stride}", elapsed, steps, runs, latencies))
+    elapsed, runs, latencies = run_sequential(HostSnipSchedule(ADAPTIVE, 1, max_stride, target_spikes),
+                                              arrivals, steps, step_cost, sync_cost)
+    results.append(summarize(f"adaptive max={max_stride} target={target_spikes:g}", elapsed, steps, runs,
+                             latencies))
+    elapsed, polls, latencies = run_data_driven(arrivals, steps, step_cost, poll)
+    results.append(summarize(f"data poll={poll * 1e6:.0f}us", elapsed, steps, polls, latencies))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare host snip schedules, timesteps/sec vs injection latency.")
+    parser.add_argument("--steps", type=int, default=20000, help="Timesteps per schedule")
+    parser.add_argument("--rate", type=float, default=200, help="Spikes/s from the Teensy while active")
+    parser.add_argument("--duty", type=float, default=0.5, help="Fraction of every 0.5s the Teensy is active")
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="every_k strides")
+    parser.add_argument("--step-us", type=float, default=20, help="Chip time per timestep [us]")
+    parser.add_argument("--sync-us", type=float, default=150, help="Cost of one sequential host snip run [us]")
+    parser.add_argument("--poll-us", type=float, default=TOPOLOGY.host_snip_poll_us,
+                        help="Idle poll period of the data-driven snip [us]")
+    parser.add_argument("--max-stride", type=int, default=TOPOLOGY.host_snip_max_stride)
+    parser.add_argument("--target-spikes", type=float, default=TOPOLOGY.host_snip_target_spikes)
+    args = parser.parse_args()
+
+    results = benchmark(args.steps, args.rate, args.duty, args.strides, args.step_us * 1e-6, args.sync_us * 1e-6,
+                        args.poll_us * 1e-6, args.max_stride, args.target_spikes)
+    print(f"[INFO] {args.steps} timesteps, {args.rate:g} spikes/s at {args.duty:.0%} duty, "
+          f"step {args.step_us:g}us, host snip run {args.sync_us:g}us")
+    print(f"{'schedule':>32} {'steps/s':>10} {'host runs':>10} {'p50[ms]':>9} {'p99[ms]':>9}")
+    for r in results:
+        print(f"{r.label:>32} {r.steps_per_sec:>10.0f} {r.host_runs:>10} {r.p50 * 1e3:>9.3f} {r.p99 * 1e3:>9.3f}")
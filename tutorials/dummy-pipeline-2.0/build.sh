@@ -2,12 +2,22 @@
 
 #!/usr/bin/env bash
 
+# Usage: build.sh [all|arduino|lib]
+#   arduino  compile and upload the Arduino sketch only
+#   lib      build the host snip shared library only, into $HOST_SNIP_OUTPUT_DIR if set (default build/).
+#            CMake is configured in $HOST_SNIP_OUTPUT_DIR/cmake-build then, so builds for different cache keys
+#            never share a build directory.
+#   all      both, one after the other (default)
+# main.py runs the two modes concurrently, they share nothing but this script.
+MODE="${1:-all}"
+case "$MODE" in
+    all|arduino|lib) ;;
+    *) echo "Unknown build mode: $MODE (expected all, arduino or lib)"; exit 1 ;;
+esac
+
 # Get the directory this script resides in
 DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 
-# nxsdk should be available in python path
-nxsdk_path=`python3 -c "import nxsdk; print(nxsdk.__path__)"`
-
 # Update this to your actual source directory path
 SKETCH_PATH="${DIR}/arduino/arduino.ino"
 
@@ -15,33 +25,48 @@ SKETCH_PATH="${DIR}/arduino/arduino.ino"
 COMPILE_CMD="arduino-cli compile --fqbn arduino:avr:leonardo ${SKETCH_PATH}"
 UPLOAD_CMD="arduino-cli upload -p /dev/ttyACM0 --fqbn arduino:avr:leonardo ${SKETCH_PATH}"
 
-# Compile and upload the Arduino sketch
-echo "Compiling Arduino sketch..."
-eval $COMPILE_CMD
-COMPILE_RESULT=$?
-if [ $COMPILE_RESULT -ne 0 ]; then
-    echo "Compilation failed."
-    exit 1
-else
-    echo "Compilation succeeded."
+if [ "$MODE" != "lib" ]; then
+    # Compile and upload the Arduino sketch
+    echo "Compiling Arduino sketch..."
+    eval $COMPILE_CMD
+    COMPILE_RESULT=$?
+    if [ $COMPILE_RESULT -ne 0 ]; then
+        echo "Compilation failed."
+        exit 1
+    else
+        echo "Compilation succeeded."
+    fi
+
+    echo "Uploading Arduino sketch..."
+    eval $UPLOAD_CMD
+    UPLOAD_RESULT=$?
+    if [ $UPLOAD_RESULT -ne 0 ]; then
+        echo "Upload failed."
+        exit 1
+    else
+        echo "Upload succeeded."
+    fi
 fi
 
-echo "Uploading Arduino sketch..."
-eval $UPLOAD_CMD
-UPLOAD_RESULT=$?
-if [ $UPLOAD_RESULT -ne 0 ]; then
-    echo "Upload failed."
-    exit 1
-else
-    echo "Upload succeeded."
+if [ "$MODE" = "arduino" ]; then
+    exit 0
 fi
 
+# nxsdk should be available in python path
+nxsdk_path=`python3 -c "import nxsdk; print(nxsdk.__path__)"`
+
 pushd $DIR
 
-# Wipe out and re-create the build directory
-rm -rf build
-mkdir build
-cd build
+# Wipe out and re-create the build directory, one per output directory
+OUTPUT_DIR="${HOST_SNIP_OUTPUT_DIR:-${DIR}/build}"
+if [ -n "$HOST_SNIP_OUTPUT_DIR" ]; then
+    BUILD_DIR="${HOST_SNIP_OUTPUT_DIR}/cmake-build"
+else
+    BUILD_DIR="${DIR}/build"
+fi
+rm -rf "$BUILD_DIR"
+mkdir -p "$BUILD_DIR"
+cd "$BUILD_DIR"
 
 # Copy headers (nxsdkhost.h)
 mkdir -p includes/nxsdk
@@ -50,8 +75,11 @@ cp -v -R ${nxsdk_path:2:-2}/include includes/nxsdk
 # Run CMake/Make
 echo "Building Shared Library.............."
 
-cmake ..
-make
+cmake -DHOST_SNIP_OUTPUT_DIR="$OUTPUT_DIR" "$DIR" && make
+if [ $? -ne 0 ]; then
+    echo "Shared Library build failed."
+    exit 1
+fi
 
 echo "Shared Library Built................."
 
@@ -0,0 +1,60 @@
+"""
+@Brief: Python mirror of include/HostSnipSchedule.h, the policy deciding which timesteps the sequential host snips
+        run on. Used by benchmark_host_schedule.py to weigh the modes without a board.
+
+@Notes:
+    - Modes, selected by host_snip_schedule in topology.json:
+        every_k   every host_snip_stride timesteps (1 is every timestep, the old behaviour)
+        data      never, the concurrent SpikeStreamer snip moves spikes as they arrive
+        adaptive  stride = target_spikes / (recent spikes per timestep), within [1, max_stride]
+    - nxsdk asks schedule() once per board.run() call, so main.py runs adaptive schedules in chunks of
+      ADAPTIVE_CHUNK_STEPS timesteps for the stride to follow the spike rate.
+    - Keep select()/record() in step with the C++ class, the benchmark is only as good as the mirror.
+
+@Author: Reece Wayt
+"""
+import numpy as np
+
+EVERY_K = "every_k"
+DATA = "data"
+ADAPTIVE = "adaptive"
+RATE_SMOOTHING = 0.25  # EWMA weight of the newest spike rate sample
+ADAPTIVE_CHUNK_STEPS = 50
+
+
+class HostSnipSchedule:
+    """
+    Attributes:
+        mode (str): EVERY_K, DATA or ADAPTIVE.
+        stride (int): Current timesteps between runs.
+    """
+
+    def __init__(self, mode=EVERY_K, stride=1, max_stride=32, target_spikes=4):
+        self.mode = mode
+        self.stride = max(int(stride), 1)
+        self.max_stride = max(int(max_stride), 1)
+        self.target_spikes = float(target_spikes)
+        self._last_timestep = 0
+        self._rate = 0.0
+
+    @classmethod
+    def from_topology(cls, topology):
+        return cls(topology.host_snip_schedule, topology.host_snip_stride, topology.host_snip_max_stride,
+                   topology.host_snip_target_spikes)
+
+    def select(self, timesteps):
+        """Subset of `timesteps` the host snips run on, as HostSnipSchedule::select."""
+        timesteps = np.asarray(timesteps, dtype=np.uint32)
+        if self.mode == DATA:
+            return timesteps[:0]
+        return timesteps[timesteps % self.stride == 0]
+
+    def record(self, timestep, spikes):
+        """Spikes one run moved, updates the adaptive stride as HostSnipSchedule::record."""
+        if self.mode != ADAPTIVE:
+            return
+        elapsed = 1 if self._last_timestep == 0 or timestep <= self._last_timestep else timestep - self._last_timestep
+        self._last_timestep = timestep
+        self._rate += RATE_SMOOTHING * (spikes / elapsed - self._rate)
+        stride = np.floor(self.target_spikes / self._rate) if self._rate > 0 else self.max_stride
+        self.stride = int(min(max(stride, 1), self.max_stride))
@@ -13,16 +13,21 @@
 #include <iomanip> // for std::setw and std::setfill
 #include <cstdlib> // for system()
 #include <numeric> // for std::accumulate
+#include <atomic>
+#include <mutex> // for std::call_once
+#include <algorithm> // for std::fill
 #include "include/Logging.h"
+#include "include/AxonMap.h"
+#include "include/HostSnipSchedule.h"
+#include "include/host_snip_config.h"  // generated from topology.json by utils/topology.py
+#include "snips/spike_bitmask.h"
 //******************************CONSTANTS***************************************//
-#define USB_SERIAL_PORT "/dev/ttyACM0"
-#define BAUD_RATE 1000000
 #define START_DATA_PIPE 0xFF
 
 LibSerial::SerialPort serial_port;
 
 
-static std::string precomputed_axons_file = "precomputed_axons.txt";  // NOLINT
+static std::string axon_map_file = AXON_MAP_FILE;  // NOLINT, written by main.py (see axon_map.py)
 
 //****************************FUNCTIONS***************************************//
 // Set up the serial port with specified settings
@@ -39,127 +44,175 @@ void setup_serial() {
         exit(EXIT_FAILURE);
     }
 }
-// Read generated axon file from superhost (i.e. main.py)
-void readAxonsFile(const std::string& file, std::vector<uint32_t>& axons, bool isInput) {
-    std::ifstream infile(file);
-    if (!infile.is_open()) {
-        std::cerr << "Unable to open file: " << file << std::endl;
-        return;
+// Map the axon map written by the superhost (i.e. main.py), the map is left empty if it is missing or malformed
+void loadAxonMap(const std::string& file, AxonMap& axonMap) {
+    if (!axonMap.load(file)) {
+        LOG_ERROR("Failed to load axon map: " << axonMap.error());
     }
-    std::string line;
-    bool isSection = false;
-
-    while (std::getline(infile, line)) {
-        if ((line == "Input Axons:" && isInput) || (line == "Output Axons:" && !isInput)) {
-            isSection = true;
-            continue;
-        }
-        if ((line == "Input Axons:" && !isInput) || (line == "Output Axons:" && isInput)) {
-            isSection = false;
-            continue;
-        }
-
-        if (isSection && !line.empty()) {
-            axons.push_back(std::stoi(line));
-        }
-    }
-    infile.close();
 }
 
 
 // Print axons to console, used for debugging....
-void printAxons(const std::vector<uint32_t>& axons, const std::string& label) {
+void printAxons(const uint32_t* axons, uint32_t count, const std::string& label) {
     std::cout << label << ": ";
-    for (const auto& axon : axons) {
-        std::cout << axon << " ";
+    for (uint32_t i = 0; i < count; i++) {
+        std::cout << axons[i] << " ";
     }
     std::cout << std::endl;
 }
 
-//Reads all data currently available on the serial port [HOST SNIP <--- TEENSY]
-void ReadFromTeensy(int numBytes, std::string channel){
+//Reads the data available on the serial port [HOST SNIP <--- TEENSY]
+// Up to ENCODER_MSG_WORDS input ports go in one message, the last one is padded with EMPTY_PORT. At most
+// CHANNEL_BUFFER_SIZE messages are written per call, so nxEncoder never overflows (the encoder snip reads one
+// message per timestep), the remaining bytes stay in the serial buffer for the next run.
+int ReadFromTeensy(int numBytes, std::string channel){
+    numBytes = std::min(numBytes, CHANNEL_BUFFER_SIZE * ENCODER_MSG_WORDS);
+    int32_t message[ENCODER_MSG_WORDS];
+    int words = 0;
     for(int i = 0; i < numBytes; i++){
         uint8_t data;
         serial_port.ReadByte(data);
-        LOG_INFO("Received data from Teensy: " << (int)data);
-        uint32_t data32 = static_cast<uint32_t>(data);
-        writeChannel(channel.c_str(), &data32, 1);
+        LOG_DEBUG("Received data from Teensy: " << (int)data);
+        message[words++] = static_cast<int32_t>(data);
+        if (words == ENCODER_MSG_WORDS || i == numBytes - 1) {
+            std::fill(message + words, message + ENCODER_MSG_WORDS, EMPTY_PORT);
+            writeChannel(channel.c_str(), message, 1);
+            words = 0;
+        }
     }
+    return numBytes;
 }
 
-//Spikes are on receive channel, read axon IDs and send to Teensy [HOST SNIP ---> TEENSY]
-void WriteToTeensy(std::string channel){
-    uint32_t data32;
-    readChannel(channel.c_str(), &data32, 1);
-    LOG_INFO("Sending data to Teensy: " << data32);
-    uint8_t data8 = static_cast<uint8_t>(data32 & 0xFF);
-    std::vector<uint8_t> data8_vector = {data8};
+//Spikes are on receive channel, expand the timestep's spike bitmask and send the neuron IDs to Teensy [HOST SNIP ---> TEENSY]
+int WriteToTeensy(std::string channel){
+    uint32_t message[DECODER_MSG_WORDS];
+    readChannel(channel.c_str(), message, 1);
+    std::vector<uint8_t> data8_vector;
+    for (int word = 0; word < BITMASK_WORDS; word++) {
+        for (uint32_t bits = message[1 + word]; bits != 0; bits &= bits - 1) {
+            int neuron = 32 * word + __builtin_ctz(bits);  // lowest set bit
+            data8_vector.push_back(static_cast<uint8_t>(neuron & 0xFF));
+        }
+    }
+    LOG_DEBUG("Sending " << data8_vector.size() << " spikes from timestep " << message[0] << " to Teensy");
     serial_port.Write(data8_vector);
+    return data8_vector.size();
+}
+
+// Opens the serial port and starts the Teensy, once, whichever host snip is constructed first
+void startPipeline() {
+    static std::once_flag started;
+    std::call_once(started, []() {
+        setup_serial(); //start serial port and settings
+
+        std::vector<uint8_t> dataBuffer = {START_DATA_PIPE};
+        serial_port.Write(dataBuffer);
+        while(!serial_port.IsDataAvailable()){
+            //wait for response
+        }
+    });
 }
 
 //*****************************HOST SNIPS*****************************************//
 // SpikeInjector class to read and handle input axons
 class SpikeInjector : public PreExecutionSequentialHostSnip {
 private:
-    std::string channel = "nxEncoder";
-    std::vector<uint32_t> inputAxons;
+    std::string channel = ENCODER_CHANNEL_NAME;
+    AxonMap axonMap;
     int neuron = 0;
+    HostSnipSchedule schedule_{HOST_SNIP_SCHEDULE, HOST_SNIP_STRIDE, HOST_SNIP_MAX_STRIDE, HOST_SNIP_TARGET_SPIKES};
 
 public: //run setup code as part of pre execution constructor
     SpikeInjector() { 
-        readAxonsFile(precomputed_axons_file, inputAxons, true);
-        printAxons(inputAxons, "Input Axons from host");
-        setup_serial(); //start serial port and settings
-
-        std::vector<uint8_t> dataBuffer = {START_DATA_PIPE};
-        serial_port.Write(dataBuffer);
-        while(!serial_port.IsDataAvailable()){
-            //wait for response
-        }
+        loadAxonMap(axon_map_file, axonMap);
+        printAxons(axonMap.inputAxons(), axonMap.numInputs(), "Input Axons from host");
+        startPipeline();
     }
 
     virtual void run(uint32_t timestep) override {
-        LOG_INFO("Running host snip spike injector " << timestep);
+        LOG_DEBUG("Running host snip spike injector " << timestep);
+        int spikes = 0;
         int numAvailable = serial_port.GetNumberOfBytesAvailable(); 
         if(numAvailable > 0){
-            ReadFromTeensy(numAvailable, channel);
+            spikes = ReadFromTeensy(numAvailable, channel);
         }
+        schedule_.record(timestep, spikes);
     }
 
-    //runs on every other timestep
+    // see include/HostSnipSchedule.h, set by host_snip_schedule in topology.json
     virtual std::valarray<uint32_t> schedule(const std::valarray<uint32_t>& timesteps) const override {
-        return timesteps;
+        return schedule_.select(timesteps);
     }
 };
 
 // SpikeReceiver class to read and handle output axons
 class SpikeReceiver : public PostExecutionSequentialHostSnip {
 private:
-    std::string channel = "nxDecoder";
-    std::vector<uint32_t> outputAxons;
+    std::string channel = DECODER_CHANNEL_NAME;
+    AxonMap axonMap;
+    HostSnipSchedule schedule_{HOST_SNIP_SCHEDULE, HOST_SNIP_STRIDE, HOST_SNIP_MAX_STRIDE, HOST_SNIP_TARGET_SPIKES};
 
 public:
     SpikeReceiver() {
-        readAxonsFile(precomputed_axons_file, outputAxons, false);
-        printAxons(outputAxons, "Output Axons from host");
+        loadAxonMap(axon_map_file, axonMap);
+        printAxons(axonMap.outputAxons(), axonMap.numOutputs(), "Output Axons from host");
 
     }
 
     virtual void run(uint32_t timestep) override {
-        LOG_INFO("Running host snip spike receiver " << timestep);
+        LOG_DEBUG("Running host snip spike receiver " << timestep);
+        int spikes = 0;
         while(probeChannel(channel.c_str())){
-            WriteToTeensy(channel);
+            spikes += WriteToTeensy(channel);
         }
+        schedule_.record(timestep, spikes);
     }
 
     virtual std::valarray<uint32_t> schedule(const std::valarray<uint32_t>& timesteps) const override {
-        return timesteps;
+        return schedule_.select(timesteps);
+    }
+};
+
+// Data-driven schedule (HOST_SNIP_SCHEDULE_DATA): moves spikes both ways whenever there are any, concurrently
+// with the chip, so the host never holds up a timestep. main.py creates it in place of the two snips above.
+class SpikeStreamer : public ConcurrentHostSnip {
+private:
+    std::string encoderChannel = ENCODER_CHANNEL_NAME;
+    std::string decoderChannel = DECODER_CHANNEL_NAME;
+
+public:
+    SpikeStreamer() {
+        if (HOST_SNIP_SCHEDULE == HOST_SNIP_SCHEDULE_DATA) {
+            startPipeline();
+        }
+    }
+
+    virtual void run(std::atomic_bool& endOfExecution) override {
+        if (HOST_SNIP_SCHEDULE != HOST_SNIP_SCHEDULE_DATA) {
+            return;
+        }
+        while (!endOfExecution) {
+            bool idle = true;
+            int numAvailable = serial_port.GetNumberOfBytesAvailable();
+            if (numAvailable > 0) {
+                ReadFromTeensy(numAvailable, encoderChannel);
+                idle = false;
+            }
+            while (probeChannel(decoderChannel.c_str())) {
+                WriteToTeensy(decoderChannel);
+                idle = false;
+            }
+            if (idle) {
+                std::this_thread::sleep_for(std::chrono::microseconds(HOST_SNIP_POLL_US));
+            }
+        }
     }
 };
 
 // Register the Snips
 REGISTER_SNIP(SpikeInjector, PreExecutionSequentialHostSnip);
 REGISTER_SNIP(SpikeReceiver, PostExecutionSequentialHostSnip);
+REGISTER_SNIP(SpikeStreamer, ConcurrentHostSnip);
 
 
 //******************************END OF HOST SNIPS******************************//
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+@Brief: Content-addressed cache for the host snip shared library, so restarting the pipeline costs a hash check
+        instead of a CMake build.
+
+@Notes:
+    - The key is a SHA-256 over the host snip sources (host_snip.cpp, CMakeLists.txt, include/, src/ and the
+      snips/*.h headers it shares with the embedded snips) and the toolchain: compiler and CMake versions,
+      CXX/CXXFLAGS/LDFLAGS, the libserial flags from pkg-config and the nxsdk host headers that are compiled in.
+    - Each key gets its own directory under CACHE_DIR holding libhost_snip.so. Switching branches or configs
+      and back reuses the library built earlier instead of rebuilding it.
+    - On a miss, `build.sh lib` builds straight into a temporary directory (HOST_SNIP_OUTPUT_DIR), which is
+      renamed into place once the build succeeds. A failed or interrupted build never leaves a library behind
+      that a later run would trust. CMake is configured in BUILD_SUBDIR of that directory rather than the
+      shared build/ in the source tree, so two builds for different keys never clobber each other, and the
+      build tree is deleted before the rename.
+    - Only the MAX_CACHED_LIBRARIES most recently used entries are kept.
+
+@Usage:
+    lib = build_library()  # path to a libhost_snip.so matching the current sources
+
+@Author: Reece Wayt
+"""
+import os
+import glob
+import shutil
+import hashlib
+import subprocess
+
+PIPELINE_DIR = os.path.dirname(os.path.realpath(__file__))
+CACHE_DIR = os.environ.get("HOST_SNIP_CACHE_DIR", os.path.join(PIPELINE_DIR, ".host_snip_cache"))
+LIBRARY_NAME = "libhost_snip.so"
+BUILD_SUBDIR = "cmake-build"  # build.sh configures CMake here, under HOST_SNIP_OUTPUT_DIR
+MAX_CACHED_LIBRARIES = 8
+
+SOURCE_PATTERNS = ["host_snip.cpp", "CMakeLists.txt", "include/**/*", "src/**/*", "snips/*.h"]
+# Embedded-snip-only header regenerated after every compile (utils/topology.py), the library never includes it
+EXCLUDED_SOURCES = ["snips/topology_ports.h"]
+FLAG_VARIABLES = ["CXX", "CC", "CXXFLAGS", "CPPFLAGS", "LDFLAGS", "CMAKE_BUILD_TYPE"]
+TOOL_COMMANDS = [
+    [os.environ.get("CXX", "c++"), "--version"],
+    ["cmake", "--version"],
+    ["pkg-config", "--modversion", "--cflags", "--libs", "libserial"],
+]
+
+
+def _command_output(cmd):
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        return f"{cmd[0]}: {e.strerror}"
+    return result.stdout + result.stderr
+
+
+def _nxsdk_fingerprint():
+    # The library compiles in nxsdk's host headers (see build.sh), so they are part of the key
+    try:
+        import nxsdk
+    except ImportError:
+        return b"nxsdk: not installed"
+    digest = hashlib.sha256(str(getattr(nxsdk, "__version__", "")).encode())
+    for path in sorted(glob.glob(os.path.join(list(nxsdk.__path__)[0], "include", "**", "*"), recursive=True)):
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.digest()
+
+
+def source_files(root=PIPELINE_DIR):
+    """Files that go into the library, sorted so the hash does not depend on directory order."""
+    files = set()
+    for pattern in SOURCE_PATTERNS:
+        files.update(path for path in glob.glob(os.path.join(root, pattern), recursive=True) if os.path.isfile(path))
+    files.difference_update(os.path.join(root, path) for path in EXCLUDED_SOURCES)
+    return sorted(files)
+
+
+def build_hash(root=PIPELINE_DIR):
+    """Returns the hex digest identifying the library the current sources and toolchain would build."""
+    digest = hashlib.sha256()
+    for path in source_files(root):
+        digest.update(os.path.relpath(path, root).encode() + b"\0")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    for name in FLAG_VARIABLES:
+        digest.update(f"{name}={os.environ.get(name, '')}\0".encode())
+    for cmd in TOOL_COMMANDS:
+        digest.update(_command_output(cmd).encode() + b"\0")
+    digest.update(_nxsdk_fingerprint())
+    return digest.hexdigest()
+
+
+def cached_library(key):
+    """Path of the cached library for `key`, or None on a miss."""
+    lib = os.path.join(CACHE_DIR, key, LIBRARY_NAME)
+    return lib if os.path.isfile(lib) else None
+
+
+def _prune():
+    entries = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)]
+    entries = [path for path in entries if os.path.isdir(path) and ".tmp-" not in path]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for stale in entries[MAX_CACHED_LIBRARIES:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def build_library(root=PIPELINE_DIR, force=False):
+    """
+    Returns the path of a libhost_snip.so built from the current sources, building it only on a cache miss.
+
+    Parameters:
+        root (str): Pipeline directory holding build.sh and the host snip sources.
+        force (bool): Rebuild even if a cached library exists.
+    """
+    key = build_hash(root)
+    lib = cached_library(key)
+    if lib and not force:
+        os.utime(os.path.dirname(lib))  # mark as recently used for _prune
+        print(f"Host snip library up to date ({key[:12]}), skipping build.")
+        return lib
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    staging_dir = os.path.join(CACHE_DIR, f"{key}.tmp-{os.getpid()}")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    env = dict(os.environ, HOST_SNIP_OUTPUT_DIR=staging_dir)
+    try:
+        subprocess.run(["/bin/bash", os.path.join(root, "build.sh"), "lib"], check=True, env=env)
+        if not os.path.isfile(os.path.join(staging_dir, LIBRARY_NAME)):
+            raise FileNotFoundError(f"build.sh did not produce {LIBRARY_NAME} in {staging_dir}")
+        shutil.rmtree(os.path.join(staging_dir, BUILD_SUBDIR), ignore_errors=True)
+        final_dir = os.path.join(CACHE_DIR, key)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(staging_dir, final_dir)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    _prune()
+    return os.path.join(final_dir, LIBRARY_NAME)
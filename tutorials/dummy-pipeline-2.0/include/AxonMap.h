@@ -0,0 +1,129 @@
+#ifndef AXON_MAP_H
+#define AXON_MAP_H
+
+// Read side of the binary axon map written by axon_map.py, see that file for the layout.
+// The file is mmapped read-only and the arrays are used in place, nothing is parsed or copied.
+
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <string>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+static_assert(__BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__, "axon map is little-endian, the arrays are used in place");
+
+constexpr char AXON_MAP_MAGIC[4] = {'A', 'X', 'M', 'P'};
+constexpr uint16_t AXON_MAP_VERSION = 1;
+
+struct AxonMapHeader {
+    char magic[4];
+    uint16_t version;
+    uint16_t headerSize;
+    uint32_t numInputs;
+    uint32_t numOutputs;
+    uint32_t reserved[4];
+};
+
+// Must match HEADER_DTYPE in axon_map.py
+static_assert(sizeof(AxonMapHeader) == 32, "AxonMapHeader layout changed, update axon_map.py and VERSION");
+static_assert(offsetof(AxonMapHeader, version) == 4, "AxonMapHeader layout changed");
+static_assert(offsetof(AxonMapHeader, headerSize) == 6, "AxonMapHeader layout changed");
+static_assert(offsetof(AxonMapHeader, numInputs) == 8, "AxonMapHeader layout changed");
+static_assert(offsetof(AxonMapHeader, numOutputs) == 12, "AxonMapHeader layout changed");
+
+class AxonMap {
+public:
+    AxonMap() = default;
+    AxonMap(const AxonMap&) = delete;
+    AxonMap& operator=(const AxonMap&) = delete;
+    ~AxonMap() { unload(); }
+
+    // Maps `path`. Returns false and sets error() if the file is missing or not a valid axon map.
+    bool load(const std::string& path) {
+        unload();
+        int fd = open(path.c_str(), O_RDONLY);
+        if (fd < 0) {
+            return fail("unable to open " + path);
+        }
+        struct stat st;
+        if (fstat(fd, &st) != 0 || st.st_size < (off_t)sizeof(AxonMapHeader)) {
+            close(fd);
+            return fail(path + " is too short for an axon map header");
+        }
+        void* addr = mmap(nullptr, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+        close(fd);  // the mapping stays valid after the descriptor is closed
+        if (addr == MAP_FAILED) {
+            return fail("unable to mmap " + path);
+        }
+        data_ = addr;
+        size_ = st.st_size;
+
+        const AxonMapHeader* h = header();
+        if (std::memcmp(h->magic, AXON_MAP_MAGIC, sizeof(AXON_MAP_MAGIC)) != 0) {
+            return fail(path + " is not an axon map");
+        }
+        if (h->version != AXON_MAP_VERSION) {
+            return fail(path + " has axon map version " + std::to_string(h->version) +
+                        ", expected " + std::to_string(AXON_MAP_VERSION));
+        }
+        size_t expected = h->headerSize + 3 * sizeof(uint32_t) * ((size_t)h->numInputs + h->numOutputs);
+        if (h->headerSize < sizeof(AxonMapHeader) || size_ != expected) {
+            return fail(path + " has " + std::to_string(size_) + " bytes, expected " + std::to_string(expected));
+        }
+        return true;
+    }
+
+    void unload() {
+        if (data_ != nullptr) {
+            munmap(data_, size_);
+        }
+        data_ = nullptr;
+        size_ = 0;
+    }
+
+    bool loaded() const { return data_ != nullptr; }
+    const std::string& error() const { return error_; }
+
+    uint32_t numInputs() const { return loaded() ? header()->numInputs : 0; }
+    uint32_t numOutputs() const { return loaded() ? header()->numOutputs : 0; }
+
+    // Arrays of numInputs() entries, port i of each belongs together
+    const uint32_t* inputAxons() const { return array(0); }
+    const uint32_t* inputChips() const { return array(1); }
+    const uint32_t* inputCores() const { return array(2); }
+
+    // Arrays of numOutputs() entries
+    const uint32_t* outputAxons() const { return array(3); }
+    const uint32_t* outputChips() const { return array(4); }
+    const uint32_t* outputCores() const { return array(5); }
+
+private:
+    void* data_ = nullptr;
+    size_t size_ = 0;
+    std::string error_;
+
+    const AxonMapHeader* header() const { return static_cast<const AxonMapHeader*>(data_); }
+
+    const uint32_t* array(int index) const {
+        if (!loaded()) {
+            return nullptr;
+        }
+        const AxonMapHeader* h = header();
+        size_t offset = h->headerSize;
+        for (int i = 0; i < index; i++) {
+            offset += sizeof(uint32_t) * (i < 3 ? h->numInputs : h->numOutputs);
+        }
+        return reinterpret_cast<const uint32_t*>(static_cast<const char*>(data_) + offset);
+    }
+
+    bool fail(const std::string& message) {
+        unload();
+        error_ = message;
+        return false;
+    }
+};
+
+#endif // AXON_MAP_H
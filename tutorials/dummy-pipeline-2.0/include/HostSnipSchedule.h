@@ -0,0 +1,75 @@
+#ifndef HOST_SNIP_SCHEDULE_H
+#define HOST_SNIP_SCHEDULE_H
+
+// Which timesteps a sequential host snip runs on. Every scheduled run serializes the host with the chip, so
+// running less often buys timesteps/sec at the cost of injection latency. host_schedule.py mirrors this class
+// for benchmark_host_schedule.py, keep the two in step.
+//
+//   HOST_SNIP_SCHEDULE_EVERY_K   every HOST_SNIP_STRIDE timesteps (1 is every timestep)
+//   HOST_SNIP_SCHEDULE_DATA      never, SpikeStreamer moves the data from a concurrent host snip instead
+//   HOST_SNIP_SCHEDULE_ADAPTIVE  the stride follows the recent spike rate, so a run finds about
+//                                HOST_SNIP_TARGET_SPIKES spikes waiting, within [1, HOST_SNIP_MAX_STRIDE]
+//
+// The mode and its parameters come from topology.json through include/host_snip_config.h.
+
+#include <atomic>
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <valarray>
+#include <vector>
+
+#define HOST_SNIP_SCHEDULE_EVERY_K 0
+#define HOST_SNIP_SCHEDULE_DATA 1
+#define HOST_SNIP_SCHEDULE_ADAPTIVE 2
+
+class HostSnipSchedule {
+public:
+    HostSnipSchedule(int mode, uint32_t stride, uint32_t maxStride, double targetSpikes)
+        : mode_(mode), maxStride_(std::max<uint32_t>(maxStride, 1)), targetSpikes_(targetSpikes),
+          stride_(std::max<uint32_t>(stride, 1)) {}
+
+    int mode() const { return mode_; }
+    uint32_t stride() const { return stride_.load(); }
+
+    // Subset of `timesteps` to run on. schedule() is re-evaluated on every board.run() call, which is how
+    // the adaptive stride takes effect (main.py runs adaptive schedules in chunks).
+    std::valarray<uint32_t> select(const std::valarray<uint32_t>& timesteps) const {
+        if (mode_ == HOST_SNIP_SCHEDULE_DATA || timesteps.size() == 0) {
+            return std::valarray<uint32_t>();
+        }
+        uint32_t k = stride_.load();
+        std::vector<uint32_t> selected;
+        selected.reserve(timesteps.size() / k + 1);
+        for (size_t i = 0; i < timesteps.size(); i++) {
+            if (timesteps[i] % k == 0) {
+                selected.push_back(timesteps[i]);
+            }
+        }
+        return std::valarray<uint32_t>(selected.data(), selected.size());
+    }
+
+    // Called from run() with the spikes it moved, updates the adaptive stride
+    void record(uint32_t timestep, uint32_t spikes) {
+        if (mode_ != HOST_SNIP_SCHEDULE_ADAPTIVE) {
+            return;
+        }
+        uint32_t elapsed = lastTimestep_ == 0 || timestep <= lastTimestep_ ? 1 : timestep - lastTimestep_;
+        lastTimestep_ = timestep;
+        rate_ += RATE_SMOOTHING * ((double)spikes / elapsed - rate_);  // spikes per timestep, EWMA
+        double k = rate_ > 0.0 ? std::floor(targetSpikes_ / rate_) : (double)maxStride_;
+        stride_.store((uint32_t)std::min(std::max(k, 1.0), (double)maxStride_));
+    }
+
+private:
+    static constexpr double RATE_SMOOTHING = 0.25;
+
+    const int mode_;
+    const uint32_t maxStride_;
+    const double targetSpikes_;
+    std::atomic<uint32_t> stride_;
+    uint32_t lastTimestep_ = 0;
+    double rate_ = 0.0;
+};
+
+#endif // HOST_SNIP_SCHEDULE_H
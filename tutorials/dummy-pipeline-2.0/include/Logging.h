@@ -27,11 +27,14 @@ inline std::string logLevelToString(LogLevel level) {
     }
 }
 
-// Macro for logging with levels
+// Macro for logging with levels. The level test is a compile time constant, so disabled levels
+// (and the stream formatting of msg) are removed by the compiler. Per timestep messages belong at DEBUG.
 #define LOG(level, msg) \
-    if (level <= CURRENT_LOG_LEVEL) { \
-        std::cout << logLevelToString(level) << " " << __FILE__ << ":" << __LINE__ << " - " << msg << std::endl; \
-    }
+    do { \
+        if (level <= CURRENT_LOG_LEVEL) { \
+            std::cout << logLevelToString(level) << " " << __FILE__ << ":" << __LINE__ << " - " << msg << std::endl; \
+        } \
+    } while (0)
 
 #define LOG_ERROR(msg) LOG(LogLevel::ERROR, msg)
 #define LOG_WARN(msg) LOG(LogLevel::WARN, msg)
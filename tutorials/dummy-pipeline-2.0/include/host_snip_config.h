@@ -0,0 +1,16 @@
+// GENERATED by utils/topology.py from topology.json, edit the spec instead of this file
+#ifndef HOST_SNIP_CONFIG_H
+#define HOST_SNIP_CONFIG_H
+
+#define USB_SERIAL_PORT "/dev/ttyACM0"
+#define BAUD_RATE 1000000
+#define ENCODER_CHANNEL_NAME "nxEncoder"
+#define DECODER_CHANNEL_NAME "nxDecoder"
+#define AXON_MAP_FILE "axon_map.bin"
+#define HOST_SNIP_SCHEDULE HOST_SNIP_SCHEDULE_EVERY_K
+#define HOST_SNIP_STRIDE 1
+#define HOST_SNIP_MAX_STRIDE 32
+#define HOST_SNIP_TARGET_SPIKES 4.0
+#define HOST_SNIP_POLL_US 100
+
+#endif // HOST_SNIP_CONFIG_H
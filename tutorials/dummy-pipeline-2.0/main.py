@@ -5,11 +5,20 @@
 
 @Notes: 
 
-    - The code demonstrates the use of an axon file which can then be read from the host snips
+    - The code demonstrates the use of an axon map file (axon_map.bin, see axon_map.py) which the host snips mmap
     - Probes and debugging can be enabled/disabled via command line arguments, see cli_parser() for more information
-    - The pipeline uses a simple 4 neuron network with 2 input and 2 output neurons
+    - The pipeline uses a simple network of input and output neurons, 2 of each by default. Sizes, channel settings
+      and the host snip's serial settings come from topology.json, which also generates snips/topology.h,
+      snips/topology_ports.h and include/host_snip_config.h (utils/topology.py). Edit the spec, not the headers.
     - [IMPORTANT] A Spike probe of some sort must be enabled for use of Spike Count register in embedded SNIPs.
     - [IMPORTANT] The pipeline uses a shared library to communicate with the host snips, this is built using the build.sh script.
+      Builds are cached per source/toolchain hash by host_snip_cache.py, so an unchanged library is not rebuilt.
+    - Startup runs as a small dependency graph (utils/startup.py): the Arduino upload (build.sh arduino), host snip
+      build (build.sh lib) and network build/compile overlap and join before board.start(). The timeline is
+      printed and appended to startup_times.jsonl.
+    - The host snips run every timestep by default. host_snip_schedule in topology.json runs them every k
+      timesteps, adaptively to the spike rate, or data-driven from a concurrent host snip, trading injection
+      latency for timesteps/sec. benchmark_host_schedule.py compares the modes.
     - [IMPORTANT] HOST SNIPs are used due to lower latency but note that SuperHost to Host communication is NOT supported. See NxSDK documentation for more information
 
 @Options: When running the python script there are two options by default debugging and probes are disabled
@@ -22,7 +31,11 @@
 import os
 import argparse
 from snn_utils import NeuralNetworkHelper
+import host_snip_cache
+from host_schedule import DATA, ADAPTIVE, ADAPTIVE_CHUNK_STEPS
 import subprocess
+import sys
+import numpy as np
 
 from nxsdk.utils.plotutils import plotRaster
 from nxsdk.graph.channel import Channel
@@ -31,6 +44,11 @@ import nxsdk.api.n2a as nx
 from nxsdk.arch.n2a.n2board import N2Board
 from nxsdk.graph.processes.phase_enums import Phase
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.startup import StartupPlan, StartupError
+from utils.topology import Topology
+from utils.resource_tables import resource_tables
+
 """CONSTANTS"""
 INCLUDE_DIR = os.path.join(os.getcwd(), 'snips/')
 ENCODER_FUNC_NAME = "run_encoding"
@@ -38,12 +56,19 @@ ENCODER_GUARD_NAME = "do_encoding"
 DECODER_FUNC_NAME = "run_decoding"
 DECODER_GUARD_NAME = "do_decoding"
 
-CHANNEL_BUFFER_SIZE = 32
-ENCODER_MSG_SIZE = 4
-DECODER_MSG_SIZE = 4
+HOST_INCLUDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'include/')
+TOPOLOGY = Topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology.json'))
+
+CHANNEL_BUFFER_SIZE = TOPOLOGY.channel_buffer_size
+ENCODER_MSG_SIZE = TOPOLOGY.encoder_msg_size
+NUM_INPUTS = TOPOLOGY.num_inputs
+NUM_OUTPUTS = TOPOLOGY.num_outputs
+DECODER_MSG_SIZE = TOPOLOGY.decoder_msg_size  # one time step + spike bitmask message per timestep
 
 NUM_STEP = 500
-NUM_NEURONS = 4
+NUM_NEURONS = NUM_INPUTS + NUM_OUTPUTS
+
+STARTUP_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_times.jsonl')
 
 def debug_logger(message, debug_enabled):
     if debug_enabled:
@@ -70,30 +95,40 @@ def cli_parser():
     return debug_enabled, probe_enabled
 
 
-def build_shared_libary() -> str:
-    """Build the host snip shared library"""
-    lib = os.path.dirname(os.path.realpath(__file__)) + \
-        "/build/libhost_snip.so" # FIXME: This is hardcoded for now 
-
-    # Compile the Host Snip to create the library after linking with ros libs
+def run_build_script(mode):
+    """Runs build.sh in one of its modes (arduino, lib or all)"""
     build_script = "{}/build.sh".format(
         os.path.dirname(os.path.realpath(__file__)))
     subprocess.run(
-        [build_script],
-        check=True,
-        shell=True,
-        executable="/bin/bash")
+        ["/bin/bash", build_script, mode],
+        check=True)
 
-    return lib
 
+def upload_firmware():
+    """Compile and upload the Arduino sketch"""
+    run_build_script("arduino")
 
 
-if __name__ == "__main__":
-    
-    debug_enabled, probe_enabled = cli_parser()
-    
-    shared_library_path = build_shared_libary() # Build the host snip shared library and arduino sketch
+def build_shared_libary() -> str:
+    """Build the host snip shared library, or reuse the cached one if the sources and toolchain are unchanged"""
+    return host_snip_cache.build_library()
 
+
+def write_topology_headers():
+    """Generates the snip and host snip headers from topology.json, before either is built"""
+    TOPOLOGY.write_snip_header(INCLUDE_DIR)
+    TOPOLOGY.write_host_config(HOST_INCLUDE_DIR)
+
+
+def write_port_header(network, board):
+    """Generates snips/topology_ports.h from where the compiler placed the input ports"""
+    mySNN, inputSynapseIds = network[1], network[3]
+    inputs = resource_tables(mySNN.net, board).input_axons(inputSynapseIds)
+    TOPOLOGY.write_port_header(INCLUDE_DIR, inputs["axonId"], inputs["chipId"], inputs["coreId"])
+
+
+def build_network(probe_enabled):
+    """Builds the input/output neuron network, returns (net, mySNN, neurons, inputSynapseIds, outputSynapseIds, probes)"""
     net = nx.NxNet()
     # get network class
     mySNN = NeuralNetworkHelper(net)
@@ -105,50 +140,61 @@ if __name__ == "__main__":
                                         compartmentVoltageDecay=256,
                                         compartmentCurrentDecay=4096)
 
-    neurons = [mySNN.create_neuron(prototype) for _ in range(NUM_NEURONS)]
+    # One compartment group per layer, wired with one connect() and a mask each instead of one per neuron
+    input_group = mySNN.create_neuron_group(prototype, NUM_INPUTS)
+    output_group = mySNN.create_neuron_group(prototype, NUM_OUTPUTS)
+    neurons = [input_group[ii] for ii in range(NUM_INPUTS)] + [output_group[ii] for ii in range(NUM_OUTPUTS)]
 
     input_conn_proto = nx.ConnectionPrototype(weight=255)
 
     # Create input layer
-    inputSynapseIds = mySNN.create_input_layer(input_conn_proto, neurons[:2])  # Use two neurons for input
-    print("Logical Input Synapse IDs:", inputSynapseIds)
+    inputSynapseIds = mySNN.create_input_port_group(input_conn_proto, input_group)
 
     # Create output layer
-    outputSynapseIds = mySNN.create_output_layer(neurons[2:4])  # Use two neurons for output
-    print("Logical Output Synapse IDs:", outputSynapseIds)
-
+    outputSynapseIds = mySNN.create_output_port_group(output_group)
 
-    neurons[0].connect(neurons[2], prototype=input_conn_proto)
-    neurons[1].connect(neurons[3], prototype=input_conn_proto)
+    # Input neuron ii drives output neuron ii % NUM_OUTPUTS, mask is (destinations, sources)
+    hidden_mask = np.zeros((NUM_OUTPUTS, NUM_INPUTS), dtype=int)
+    hidden_mask[np.arange(NUM_INPUTS) % NUM_OUTPUTS, np.arange(NUM_INPUTS)] = 1
+    input_group.connect(output_group, prototype=input_conn_proto, connectionMask=hidden_mask)
 
     #Track probes if command line argument is TRUE
     #[IMPORTANT] Spike probe of some sort much be enabled for use of Spike Count register in embedded SNIPs 
+    probes = None
     if probe_enabled:
         probe_parameters = [nx.ProbeParameter.COMPARTMENT_CURRENT,
                             nx.ProbeParameter.COMPARTMENT_VOLTAGE,
                             nx.ProbeParameter.SPIKE]
         probes = mySNN.create_probes(neurons, probe_parameters)
-        u_probes, v_probes, s_probes = zip(*probes)
     else:
         customSpikeProbeCond = SpikeProbeCondition(tStart=1000000000)
         for neuron in neurons:
             sProbe = neuron.probe(nx.ProbeParameter.SPIKE, customSpikeProbeCond)
 
-    compiler = nx.N2Compiler()
-    board = compiler.compile(net)
+    return net, mySNN, neurons, inputSynapseIds, outputSynapseIds, probes
 
-    mySNN.write_precomputed_axons_file(inputSynapseIds, outputSynapseIds)
 
-    cppFile = os.path.dirname(os.path.realpath(__file__)) +"/host_snip.cpp"
+def compile_network(network):
+    compiler = nx.N2Compiler()
+    return compiler.compile(network[0])
+
 
+def create_snips_and_channels(board, shared_library_path):
+    """Creates the host and embedded snips and connects them with channels"""
     """SNIPs on Host"""
-    spikeInjector = board.createSnip(
-        phase=Phase.HOST_PRE_EXECUTION,
-        library=shared_library_path)
-    
-    spikeReader = board.createSnip(
-        phase=Phase.HOST_POST_EXECUTION,
-        library=shared_library_path)
+    if TOPOLOGY.host_snip_schedule == DATA:
+        # One concurrent snip moves spikes both ways as they arrive, see include/HostSnipSchedule.h
+        spikeInjector = spikeReader = board.createSnip(
+            phase=Phase.HOST_CONCURRENT_EXECUTION,
+            library=shared_library_path)
+    else:
+        spikeInjector = board.createSnip(
+            phase=Phase.HOST_PRE_EXECUTION,
+            library=shared_library_path)
+
+        spikeReader = board.createSnip(
+            phase=Phase.HOST_POST_EXECUTION,
+            library=shared_library_path)
     
     """SNIPs on x86 Cores (embedded snips)"""
     encoderEmbeddedProcess = board.createSnip(phase=Phase.EMBEDDED_SPIKING,
@@ -164,25 +210,65 @@ if __name__ == "__main__":
                                    guardName=DECODER_GUARD_NAME)
 
     """Create Channels"""
-    encoderChannel = board.createChannel(name=b'nxEncoder',
+    encoderChannel = board.createChannel(name=TOPOLOGY.encoder_channel.encode(),
                                          messageSize=ENCODER_MSG_SIZE,
                                          numElements=CHANNEL_BUFFER_SIZE)
     #Create input channel: host_process ----> loihi
     encoderChannel.connect(spikeInjector, encoderEmbeddedProcess)
 
-    
-
-    decoderChannel = board.createChannel(name=b'nxDecoder',
+    decoderChannel = board.createChannel(name=TOPOLOGY.decoder_channel.encode(),
                                          messageSize=DECODER_MSG_SIZE,
                                          numElements=CHANNEL_BUFFER_SIZE)
     #Create output channel: host_process <---- loihi
     decoderChannel.connect(decoderEmbeddedProcess, spikeReader)
 
+    return encoderChannel, decoderChannel
+
+
+if __name__ == "__main__":
+    
+    debug_enabled, probe_enabled = cli_parser()
+    
+    # Firmware, host snip library and network are independent, build them side by side and join before board.start()
+    plan = StartupPlan()
+    plan.add("firmware", upload_firmware)
+    plan.add("topology", write_topology_headers)
+    plan.add("host_snip_lib", lambda topology: build_shared_libary(), deps=["topology"])
+    plan.add("net", lambda: build_network(probe_enabled))
+    plan.add("compile", compile_network, deps=["net"])
+    plan.add("axon_map", lambda network, board: network[1].write_axon_map_file(*network[3:5], board=board),
+             deps=["net", "compile"])
+    plan.add("snip_ports", lambda network, board, axon_map: write_port_header(network, board),
+             deps=["net", "compile", "axon_map"])
+    # After the axon map so nxsdk never sees two threads on one board
+    plan.add("snips", lambda board, lib, axon_map, ports: create_snips_and_channels(board, lib),
+             deps=["compile", "host_snip_lib", "axon_map", "snip_ports"])
+    try:
+        results = plan.run()
+    except StartupError as e:
+        print(f"An error occurred during startup: {e}")
+        print(plan.timeline())
+        exit(1)
+    print(plan.timeline())
+    plan.save(STARTUP_LOG)
+
+    net, mySNN, neurons, inputSynapseIds, outputSynapseIds, probes = results["net"]
+    board = results["compile"]
+    print("Logical Input Synapse IDs:", inputSynapseIds)
+    print("Logical Output Synapse IDs:", outputSynapseIds)
+    if probe_enabled:
+        u_probes, v_probes, s_probes = zip(*probes)
+
     board.start()
     
     try:
-        board.run(NUM_STEP, aSync=True)
-        board.finishRun()
+        if TOPOLOGY.host_snip_schedule == ADAPTIVE:
+            # nxsdk asks the host snips for their schedule once per run call, chunks let the stride adapt
+            for start in range(0, NUM_STEP, ADAPTIVE_CHUNK_STEPS):
+                board.run(min(ADAPTIVE_CHUNK_STEPS, NUM_STEP - start))
+        else:
+            board.run(NUM_STEP, aSync=True)
+            board.finishRun()
         print("Run finished")
     
     finally:
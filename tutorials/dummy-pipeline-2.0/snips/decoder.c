@@ -4,38 +4,44 @@
 #include <time.h>
 #include <unistd.h>
 
-#define OUTPUT_DIM 2
-#define NEURON_COUNT 4
-
 int spikeCountCx = 0;
 int channelID = -1;
 
-volatile int output_spike_activity[NEURON_COUNT] = {0};
+volatile int output_spike_activity[OUTPUT_DIM] = {0};
+static uint32_t spike_message[DECODER_MSG_WORDS]; // time step + spike bitmask, see spike_bitmask.h
                   
 
 int do_decoding(runState *s) {
     if (s->time_step==1){
-        channelID = getChannelID("nxDecoder"); 
+        channelID = getChannelID(DECODER_CHANNEL); 
     }
     return 1;
 }
 
 void run_decoding(runState *s) {
     int time = s->time_step;
+    int spiked = 0;
+    memset(spike_message, 0, sizeof(spike_message));
+    spike_message[0] = time;
     //printf("Checking for spike\n");
-    for(int ii = 0; ii < NEURON_COUNT; ii++){
-        volatile int count = SPIKE_COUNT[(time)&3][0x20+ii];
+    for(int ii = 0; ii < OUTPUT_DIM; ii++){
+        // output synapse counters start at SPIKE_COUNTER_OFFSET, in the order they are created
+        volatile int count = SPIKE_COUNT[(time)&3][SPIKE_COUNTER_OFFSET+ii];
         //printf("Neuron id %d, spike count %d, at time %d", ii, count, time);
         if(count > 0){
             output_spike_activity[ii]+= 1; 
-            writeChannel(channelID, &ii, 1); // Outputs which neuron spiked
-            //writeChannel(channelID, &s->time_step, 1); // Outputs the time step
-            SPIKE_COUNT[(s->time_step-1)&3][0x20+ii] = 0;    // Lakemont spike counters need to be cleared after reading to prevent overflow 
+            spike_message[1 + ii / 32] |= 1u << (ii % 32); // Marks which neuron spiked
+            spiked = 1;
+            SPIKE_COUNT[(s->time_step-1)&3][SPIKE_COUNTER_OFFSET+ii] = 0;    // Lakemont spike counters need to be cleared after reading to prevent overflow 
         }
     }
+    // One message per timestep however many neurons spiked, nothing on quiet timesteps
+    if(spiked){
+        writeChannel(channelID, spike_message, 1);
+    }
 
     if(time == 49){
-        for(int ii = 0; ii < NEURON_COUNT; ii++){
+        for(int ii = 0; ii < OUTPUT_DIM; ii++){
             printf("Neuron %d spiked %d times\n", ii, output_spike_activity[ii]);
         }    
     }
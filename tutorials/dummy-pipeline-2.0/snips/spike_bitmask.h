@@ -0,0 +1,13 @@
+#ifndef SPIKE_BITMASK_H
+#define SPIKE_BITMASK_H
+
+// Layout of the nxDecoder channel message, shared by the decoder snip and its reader.
+// One message per timestep with output spikes: word 0 is the time step, bit b of word 1 + k is set when
+// output neuron 32*k + b spiked. Must match utils/spike_bitmask.py.
+
+#include "topology.h"  // OUTPUT_DIM, generated from topology.json by utils/topology.py
+
+#define BITMASK_WORDS ((OUTPUT_DIM + 31) / 32)
+#define DECODER_MSG_WORDS (1 + BITMASK_WORDS)  // nxDecoder messageSize is 4 * DECODER_MSG_WORDS bytes
+
+#endif // SPIKE_BITMASK_H
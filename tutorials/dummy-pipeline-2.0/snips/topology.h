@@ -0,0 +1,17 @@
+// GENERATED by utils/topology.py from topology.json, edit the spec instead of this file
+#ifndef TOPOLOGY_H
+#define TOPOLOGY_H
+
+#define NUM_INPUTS 2
+#define OUTPUT_DIM 2
+#define CHANNEL_BUFFER_SIZE 32
+#define ENCODER_MSG_SIZE 4
+#define ENCODER_MSG_WORDS 1  // input port numbers per message
+#define EMPTY_PORT -1  // pads an encoder message that is not full
+#define DECODER_MSG_SIZE 8
+#define SPIKE_COUNTER_OFFSET 0x20
+#define CORE_ID_OFFSET 4
+#define ENCODER_CHANNEL "nxEncoder"
+#define DECODER_CHANNEL "nxDecoder"
+
+#endif // TOPOLOGY_H
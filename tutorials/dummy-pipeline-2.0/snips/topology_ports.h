@@ -0,0 +1,11 @@
+// GENERATED by utils/topology.py from topology.json, edit the spec instead of this file
+#ifndef TOPOLOGY_PORTS_H
+#define TOPOLOGY_PORTS_H
+
+#include "topology.h"
+
+static const int INPUT_AXON[NUM_INPUTS] = {0, 1};
+static const int INPUT_CHIP[NUM_INPUTS] = {0, 0};
+static const int INPUT_CORE[NUM_INPUTS] = {0, 0};
+
+#endif // TOPOLOGY_PORTS_H
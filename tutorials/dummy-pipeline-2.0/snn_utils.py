@@ -1,7 +1,9 @@
 """See NxNet tutorials for context"""
 
 import os
+import sys
 import atexit
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 from nxsdk.utils.plotutils import plotRaster
@@ -9,6 +11,11 @@ from nxsdk.graph.channel import Channel
 import nxsdk.api.n2a as nx
 from nxsdk.arch.n2a.n2board import N2Board
 from nxsdk.graph.processes.phase_enums import Phase
+from axon_map import write_axon_map
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.resource_tables import resource_tables, node_ids
+from utils import connection_masks
 
 haveDisplay = "DISPLAY" in os.environ
 if not haveDisplay:
@@ -18,7 +25,7 @@ class NeuralNetworkHelper:
     def __init__(self, net):
         self.net = net
         self.modified_path = None
-        self.precomputed_axon_file_name = "precomputed_axons.txt"
+        self.axon_map_file_name = "axon_map.bin"
 
     def create_neuron(self, prototype):
         neuron = self.net.createCompartment(prototype)
@@ -40,56 +47,59 @@ class NeuralNetworkHelper:
             outputSynapseIds.append(spikeOutputPort.nodeId)
         return outputSynapseIds
 
+    # Group versions of the layer builders: one port group and one connect() with a mask per layer, instead of
+    # one port and one connect() per neuron. connection_mask is (num destinations, num sources) as nxsdk expects,
+    # i.e. (neurons, ports) for input ports and (ports, neurons) for output ports, any other shape raises
+    # ValueError. The default wires port i <-> neuron i like the per-neuron versions. They return contiguous
+    # int64 nodeId arrays.
+    def create_neuron_group(self, prototype, size):
+        return self.net.createCompartmentGroup(size=size, prototype=prototype)
+
+    def create_input_port_group(self, prototype, neuron_group, connection_mask=None, num_ports=None):
+        num_ports = neuron_group.numNodes if num_ports is None else num_ports
+        connection_mask = connection_masks.connection_mask(connection_mask, neuron_group.numNodes, num_ports)
+        port_group = self.net.createSpikeInputPortGroup(size=num_ports)
+        port_group.connect(neuron_group, prototype=prototype, connectionMask=connection_mask)
+        return node_ids(port_group)
+
+    def create_output_port_group(self, neuron_group, connection_mask=None, num_ports=None):
+        num_ports = neuron_group.numNodes if num_ports is None else num_ports
+        connection_mask = connection_masks.connection_mask(connection_mask, num_ports, neuron_group.numNodes)
+        port_group = self.net.createSpikeOutputPortGroup(size=num_ports)
+        neuron_group.connect(port_group, connectionMask=connection_mask)
+        return node_ids(port_group)
+
     def get_resource_map(self, neuron, inputSynapseId, outputSynapseId):
-        boardId, chipId, coreId, compartmentId, cxProfileCfgId, vthProfileCfgId = self.net.resourceMap.compartment(neuron.nodeId)
-        inputSynapseData = self.net.resourceMap.inputAxon(inputSynapseId)
-        inputSynapseId = inputSynapseData[0][3]  # Unpack the inputAxonId from the inputAxonData
-        outputSynapseData = self.net.resourceMap.synapse(outputSynapseId)
-        return {
-            "boardId": boardId,
-            "chipId": chipId,
-            "coreId": coreId,
-            "compartmentId": compartmentId,
-            "cxProfileCfgId": cxProfileCfgId,
-            "vthProfileCfgId": vthProfileCfgId,
-            "inputSynapseId": inputSynapseId,
-            "outputSynapseId": outputSynapseId
-        }
-
-    def store_resource_maps(self, neurons, inputSynapseIds, outputSynapseIds):
-        resource_maps = {}
-        for idx, (neuron, inputSynapseId, outputSynapseId) in enumerate(zip(neurons, inputSynapseIds, outputSynapseIds)):
-            neuron_name = f"Neuron{idx}"
-            resource_maps[neuron_name] = self.get_resource_map(neuron, inputSynapseId, outputSynapseId)
-        return resource_maps
-
-    def write_precomputed_axons_file(self, logicalInputAxonIds, logicalOutputAxonIds):
-        physicalInputAxonIds = []
-        physicalOutputAxonIds = []
-
-        for logicalAxonId in logicalInputAxonIds:
-            _, _, _, physicalAxonId = self.net.resourceMap.inputAxon(logicalAxonId)[0]
-            physicalInputAxonIds.append(physicalAxonId)
-
-        for logicalAxonId in logicalOutputAxonIds:
-            _, _, _, physicalAxonId = self.net.resourceMap.synapse(logicalAxonId)
-            physicalOutputAxonIds.append(physicalAxonId)
-
-        with open(self.precomputed_axon_file_name, "w") as f:
-            f.write("Input Axons:\n")
-            f.write("\n".join(str(axon) for axon in physicalInputAxonIds))
-            f.write("\n\nOutput Axons:\n")
-            f.write("\n".join(str(axon) for axon in physicalOutputAxonIds))
+        resource_map = self.store_resource_maps([neuron], [inputSynapseId], [outputSynapseId])
+        return {field: int(column[0]) for field, column in resource_map.items()}
+
+    def store_resource_maps(self, neurons, inputSynapseIds, outputSynapseIds, board=None):
+        """Struct-of-arrays table, one entry per neuron, see utils/resource_tables.py for the columns"""
+        tables = resource_tables(self.net, board)
+        resource_map = tables.compartments(node_ids(neurons))
+        resource_map["inputSynapseId"] = tables.input_axons(inputSynapseIds)["axonId"]
+        resource_map["outputSynapseId"] = tables.output_axons(outputSynapseIds)["axonId"]
+        return resource_map
+
+    def write_axon_map_file(self, logicalInputAxonIds, logicalOutputAxonIds, board=None):
+        """Writes the physical axon, chip and core of every input and output port, see axon_map.py"""
+        tables = resource_tables(self.net, board)
+        inputs = tables.input_axons(logicalInputAxonIds)
+        outputs = tables.output_axons(logicalOutputAxonIds)
+
+        write_axon_map(self.axon_map_file_name, inputs["axonId"], outputs["axonId"],
+                       input_chips=inputs["chipId"], input_cores=inputs["coreId"],
+                       output_chips=outputs["chipId"], output_cores=outputs["coreId"])
 
     
-    def update_host_snip_with_path_to_precomputed_axons_file(self, filePath):
+    def update_host_snip_with_path_to_axon_map_file(self, filePath):
         with open(filePath, 'r') as file:
             data = file.readlines()
 
         for index, line in enumerate(data):
-            if 'static std::string precomputed_axons_file' in line:
-                data[index] = 'static std::string precomputed_axons_file = "{}";\n'.format(
-                    self.precomputed_axon_file_name)
+            if 'static std::string axon_map_file' in line:
+                data[index] = 'static std::string axon_map_file = "{}";\n'.format(
+                    self.axon_map_file_name)
 
         tokens = os.path.split(filePath)
         modified_fileName = "modified_" + tokens[-1]
@@ -105,7 +115,7 @@ class NeuralNetworkHelper:
     def cleanup(self):
         if self.modified_path:
             os.remove(self.modified_path)
-            os.remove(self.precomputed_axon_file_name)
+            os.remove(self.axon_map_file_name)
 
     def create_probes(self, neurons, probe_parameters, probe_conditions=None):
         probes = []
@@ -21,6 +21,9 @@ import nxsdk.api.n2a as nx
 from nxsdk.graph.monitor.probes import *
 from benchmark_kit.perf_wrappers import timeit
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.gpio_scheduler import GpioScheduler, PinpongBackend
+
 def configure_paths():
     """Configure paths for the benchmark kit."""
     this_program_dir = os.path.dirname(os.path.abspath(__file__))
@@ -87,22 +90,23 @@ def init_led_thread():
     
     Returns:
     board: PinPong board object
-    led: LED pin object
+    gpio: Started GPIO scheduler driving the LED pin
     my_queue: Queue for communication between threads
     stop_event: Event to signal thread termination
     """
     board = Board("uno", "/dev/ttyACM0").begin()
-    led = Pin(Pin.D13, Pin.OUT)  # Initialize pin as output
+    gpio = GpioScheduler(PinpongBackend())
+    gpio.start()
     my_queue = queue.Queue()
     stop_event = threading.Event()
-    return board, led, my_queue, stop_event
+    return board, gpio, my_queue, stop_event
 
 def main():
     # Initialize panda board, LED, and queue
-    lp_board, led, spk_queue, stop_event = init_led_thread()
+    lp_board, gpio, spk_queue, stop_event = init_led_thread()
 
     # Set up the LED thread
-    monitor_thread = threading.Thread(target=monitor_for_spike, args=(lp_board, led, spk_queue, stop_event))
+    monitor_thread = threading.Thread(target=monitor_for_spike, args=(gpio, Pin.D13, spk_queue, stop_event))
     monitor_thread.daemon = True  # Ensures the thread will exit when the main program does
     monitor_thread.start()
 
@@ -141,6 +145,7 @@ def main():
         # Ensure LED thread is properly terminated
         stop_event.set()
         monitor_thread.join()
+        gpio.stop()
         print("Thread joined successfully.")
 
     # Calculate and print average frequency of spike reads
@@ -1,23 +1,28 @@
 """
 thread1-led-blink.py - this thread control the latte panda expansion header pin D13 which
-is connected to an LED for testing
+is connected to an LED for testing, through the GPIO scheduler in utils/gpio_scheduler.py
 
 Author: Reece Wayt
 Date: 4/25/2024
 """
-import time
-import threading
 import queue
-from pinpong.board import Board, Pin
+import threading
+
+BLINK_TIME = 1.0 # [sec]
 
-def monitor_for_spike(panda_board, led, queue, stop_event): 
-    #Pin initialization as digital output
-    led = Pin(Pin.D13, Pin.OUT) 
+def monitor_for_spike(scheduler, led_pin, spike_queue, stop_event, blink_time=BLINK_TIME):
+    """
+    Blinks led_pin for blink_time on every spike signal. The GPIO scheduler (utils/gpio_scheduler.py) owns the
+    pin and times the pulse, so this thread goes straight back to the queue instead of sleeping through the blink,
+    and spikes arriving during a blink extend it.
+    """
+    scheduler.add_pin(led_pin)
 
     while not stop_event.is_set(): 
-        spike_signal = queue.get(timeout=3) #Blocks for one second
+        try:
+            spike_signal = spike_queue.get(timeout=3) #Blocks for up to three seconds
+        except queue.Empty:
+            continue
         if spike_signal: 
             print(f"Spike received from thread id: {threading.get_ident()}")    # Debugging message
-            led.write_digital(1) #turn on LED
-            time.sleep(1)
-            led.write_digital(0) #turn of LED
\ No newline at end of file
+            scheduler.blink(led_pin, blink_time)
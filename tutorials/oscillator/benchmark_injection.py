@@ -0,0 +1,99 @@
+"""
+Author: Reece Wayt
+
+Compares the original oscillator main loop (poll spike_queue.empty(), one sendSpikes per spike) against
+SpikeInjector (block on the queue, one sendSpikes per spike generator per flush) on mock spike generators.
+
+Notes:
+    - An OscillatorBank feeds the queue, its oscillators split over the two spike generators as in main.py.
+      --call-us is the cost of one sendSpikes call (the superhost -> chip round trip), measure it on the board.
+    - Lag is the time from when a spike was due to when a sendSpikes call carried it. It grows without bound
+      once the per-spike loop cannot keep up with the spike rate.
+    - The polling loop also holds the GIL while it spins, so the bank thread produces fewer spikes next to it.
+    - Both loops count spikes the way SpikeInjector does, the per spike loop printed by main.py used to count
+      every pass of the loop instead.
+    - No hardware needed, run with `python benchmark_injection.py [--oscillators 16] [--call-us 200]`
+"""
+import os
+import sys
+import time
+import queue
+import argparse
+import numpy as np
+from OscGenProcess import OscillatorBank
+from spike_injector import SpikeInjector
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.harness import MockSpikeGen
+
+PERCENTILES = [50, 99]
+
+
+def per_spike_loop(spike_queue, routes, bank, lags):
+    """The old main loop: spin on empty(), send one spike per call."""
+    sent = 0
+    while bank.thread.is_alive() or not spike_queue.empty():
+        if not spike_queue.empty():
+            for neuron_id, t in spike_queue.get():
+                spike_gen, port = routes[neuron_id]
+                spike_gen.sendSpikes(spikeInputPortNodeIds=[port], numSpikes=[1])
+                lags.append(time.perf_counter() - bank.start_time - t)
+                sent += 1
+    return sent, sent  # one call per spike
+
+
+def batched_loop(spike_queue, routes, bank, lags):
+    """
+    SpikeInjector, with the lag taken from the due times of each flush: the injector only sees neuron ids, so the
+    batches are peeked here on their way into a second queue.
+    """
+    relay = queue.Queue()
+    injector = SpikeInjector(relay, routes)
+    while bank.thread.is_alive() or not spike_queue.empty():
+        try:
+            batches = [spike_queue.get(timeout=0.01)]
+        except queue.Empty:
+            continue
+        while not spike_queue.empty():
+            batches.append(spike_queue.get_nowait())
+        for batch in batches:
+            relay.put(batch)
+        injector.flush(timeout=0)
+        now = time.perf_counter() - bank.start_time
+        lags.extend(now - t for batch in batches for _, t in batch)
+    return injector.spikes_sent, injector.calls
+
+
+def measure(loop, oscillators, duration, call_cost):
+    spike_queue = queue.Queue()
+    bank = OscillatorBank(200, np.linspace(0.5, 2, oscillators), 2 * np.pi * np.arange(oscillators) / oscillators,
+                          duration, spike_queue)
+    # Even neuron ids to the first generator, odd to the second, one port per oscillator on each
+    generators = MockSpikeGen.chain([oscillators, oscillators], call_cost)
+    routes = {neuron_id: (generators[neuron_id % 2], generators[neuron_id % 2].firstPort + neuron_id // 2)
+              for neuron_id in range(2 * oscillators)}
+    lags = []
+    wall_start = time.perf_counter()
+    bank.run()
+    sent, calls = loop(spike_queue, routes, bank, lags)
+    wall = time.perf_counter() - wall_start
+    bank.thread.join()
+    injected = sum(gen.spike_count for gen in generators)
+    assert sent == injected, f"counted {sent} spikes but the generators got {injected}"
+    return bank.spikes_sent, sent, calls, wall, np.asarray(lags)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per spike vs batched InteractiveSpikeGen injection.")
+    parser.add_argument("--oscillators", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds of oscillator output per loop")
+    parser.add_argument("--call-us", type=float, default=200, help="Cost of one sendSpikes call [us]")
+    args = parser.parse_args()
+
+    print(f"[INFO] {args.oscillators} oscillators for {args.duration:g}s, sendSpikes costs {args.call_us:g}us")
+    print(f"{'loop':>10} {'produced':>9} {'sent':>7} {'calls':>7} {'wall[s]':>8} {'p50 lag[ms]':>12} "
+          f"{'p99 lag[ms]':>12}")
+    for name, loop in (("per spike", per_spike_loop), ("batched", batched_loop)):
+        produced, sent, calls, wall, lags = measure(loop, args.oscillators, args.duration, args.call_us * 1e-6)
+        p50, p99 = np.percentile(lags, PERCENTILES) * 1e3 if lags.size else (np.nan, np.nan)
+        print(f"{name:>10} {produced:>9} {sent:>7} {calls:>7} {wall:>8.2f} {p50:>12.2f} {p99:>12.2f}")
@@ -0,0 +1,164 @@
+"""
+Author: Reece Wayt
+
+Compares the sleeping oscillator (oscillator.generate_sine_wave) and the replay of a precomputed schedule
+(oscillator.replay_schedule) against the original busy polling loop (oscillator.generate_sine_wave_polling):
+spike timing jitter and CPU use.
+
+Notes:
+    - Every spike is timestamped as it is put on the spike queue. The sleeping and replay generators chain spike
+      times from the ideal ones, so they are compared against oscillator.spike_schedule(). The polling loop chains
+      from the time it actually sent the previous spike, so its ideal time is next_spike_time() from there and
+      the jitter of one spike does not carry into the next.
+    - CPU use is the process CPU time over the wall time of the run, the main thread only waits. With
+      --load-threads busy threads compete for the GIL, as the spike-sending loop in main.py does.
+    - The transport table runs the oscillator in a thread and in its own process (run(process=True)), both sending
+      through a shared-memory spike_ring(), and times each spike from when it was due until the main thread had it
+      out of the ring, while busy threads load the main process.
+    - The last table runs N oscillators as one OscillatorBank (ticks or merged analytic schedules) and as one
+      sleeping oscillator thread each, --bank-sizes sets the N to try.
+    - No hardware needed, run with `python benchmark_oscillator.py [--duration 3] [--load-threads 1]`
+"""
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+from OscGenProcess import oscillator, OscillatorBank, spike_ring, unpack_spikes
+
+PERCENTILES = [50, 99, 100]
+
+
+class TimestampQueue(queue.Queue):
+    """Records perf_counter() at every put, to time the spikes without touching the generator."""
+
+    def __init__(self):
+        super().__init__()
+        self.put_times = []
+
+    def put(self, item, block=True, timeout=None):
+        self.put_times.append(time.perf_counter())
+        super().put(item, block, timeout)
+
+
+def gil_load(stop_event):
+    x = 0
+    while not stop_event.is_set():
+        x = (x + 1) % 1000003
+
+
+def measure(mode, duration, load_threads, amplitude, frequency):
+    spike_queue = TimestampQueue()
+    osc = oscillator(amplitude=amplitude, frequency=frequency, phase_shift=0, duration=duration,
+                     spike_queue=spike_queue)
+    schedule = osc.spike_schedule()
+    stop_load = threading.Event()
+    loaders = [threading.Thread(target=gil_load, args=(stop_load,)) for _ in range(load_threads)]
+    for loader in loaders:
+        loader.start()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    osc.run(polling=mode == "polling", schedule=schedule if mode == "replay" else None)
+    osc.thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    stop_load.set()
+    for loader in loaders:
+        loader.join()
+
+    sent = np.asarray(spike_queue.put_times) - osc.start_time
+    if mode != "polling":
+        ideal = schedule[0][:sent.size]
+    else:
+        previous = np.concatenate([[0.0], sent[:-1]])
+        ideal = np.array([osc.next_spike_time(t_last) for t_last in previous])
+    return sent.size, np.abs(sent - ideal), cpu / wall
+
+
+def bank_parameters(size):
+    """Frequencies spread over 0.5-2 Hz and evenly spaced phases, a stand-in for the legs of a CPG."""
+    return np.linspace(0.5, 2, size), 2 * np.pi * np.arange(size) / size
+
+
+def measure_bank(mode, size, duration, amplitude):
+    """Spikes sent and CPU use of `size` oscillators, as one OscillatorBank or as one thread each."""
+    frequencies, phases = bank_parameters(size)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    if mode == "threads":
+        spike_queue = queue.Queue()
+        members = [oscillator(amplitude, f, p, duration, spike_queue) for f, p in zip(frequencies, phases)]
+        for member in members:
+            member.run()
+        for member in members:
+            member.thread.join()
+        spikes = spike_queue.qsize()
+    else:
+        bank = OscillatorBank(amplitude, frequencies, phases, duration, queue.Queue())
+        bank.run(analytic=mode == "bank analytic")
+        bank.thread.join()
+        spikes = bank.spikes_sent
+    return spikes, (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+
+def measure_transport(mode, duration, load_threads, amplitude, frequency):
+    """
+    Delay from when each spike was due to when the main thread had it out of the spike ring, with the oscillator in
+    a thread or in its own process, while `load_threads` busy threads hold the GIL in the main process.
+    """
+    ring = spike_ring()
+    osc = oscillator(amplitude=amplitude, frequency=frequency, phase_shift=0, duration=duration, spike_queue=ring)
+    stop_load = threading.Event()
+    loaders = [threading.Thread(target=gil_load, args=(stop_load,)) for _ in range(load_threads)]
+    for loader in loaders:
+        loader.start()
+    osc.run(process=mode == "process")
+    delays = []
+    try:
+        while osc.thread.is_alive() or not ring.empty():
+            try:
+                batch = ring.get_batch(timeout=0.1)
+            except queue.Empty:
+                continue
+            received = time.perf_counter()
+            delays.append(received - unpack_spikes(batch)[1])
+    finally:
+        stop_load.set()
+        for loader in loaders:
+            loader.join()
+        osc.thread.join()
+    return np.concatenate(delays) if delays else np.empty(0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spike timing jitter and CPU use of the oscillator generators.")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per generator")
+    parser.add_argument("--load-threads", type=int, default=0, help="Busy threads competing for the GIL")
+    parser.add_argument("--amplitude", type=float, default=200)
+    parser.add_argument("--frequency", type=float, default=1)
+    parser.add_argument("--transport-load-threads", type=int, default=2,
+                        help="Busy threads in the main process for the thread vs process transport table")
+    parser.add_argument("--bank-sizes", type=int, nargs="*", default=[1, 8, 32],
+                        help="Oscillator counts to compare OscillatorBank against one thread per oscillator")
+    args = parser.parse_args()
+
+    print(f"{'generator':>10} {'spikes':>7} {'p50[us]':>9} {'p99[us]':>9} {'max[us]':>9} {'cpu':>6}")
+    for mode in ("polling", "analytic", "replay"):
+        count, jitter, cpu = measure(mode, args.duration, args.load_threads, args.amplitude, args.frequency)
+        p50, p99, worst = np.percentile(jitter, PERCENTILES) * 1e6 if count else (np.nan,) * 3
+        print(f"{mode:>10} {count:>7} {p50:>9.1f} {p99:>9.1f} {worst:>9.1f} {cpu:>6.0%}")
+
+    print(f"\n{'transport':>10} {'spikes':>7} {'p50[us]':>9} {'p99[us]':>9} {'max[us]':>9}"
+          f"   ({args.transport_load_threads} GIL load threads)")
+    for mode in ("thread", "process"):
+        delays = measure_transport(mode, args.duration, args.transport_load_threads, args.amplitude, args.frequency)
+        p50, p99, worst = np.percentile(delays, PERCENTILES) * 1e6 if delays.size else (np.nan,) * 3
+        print(f"{mode:>10} {delays.size:>7} {p50:>9.1f} {p99:>9.1f} {worst:>9.1f}")
+
+    if args.bank_sizes:
+        print(f"\n{'oscillators':>11} {'generator':>14} {'spikes':>7} {'cpu':>6}")
+        for size in args.bank_sizes:
+            for mode in ("threads", "bank ticks", "bank analytic"):
+                spikes, cpu = measure_bank(mode, size, args.duration, args.amplitude)
+                print(f"{size:>11} {mode:>14} {spikes:>7} {cpu:>6.0%}")
@@ -15,78 +15,70 @@ Notes:
 
     threading library is very suitable for I/O bound tasks
 
+    Set OSCILLATOR_PROCESS = True to do exactly that for the oscillator: it runs in its own process and
+    publishes spikes through a shared-memory ring (utils/shm_ring.py), and this loop sleeps on the ring's
+    semaphore and takes them in batches. benchmark_oscillator.py compares the spike delay of both under load.
+
+    nxsdk, psutil and matplotlib are imported where they are used, so the module imports without a board
+    (tests/test_oscillator_main.py). Pick the LED backend with --gpio-backend, e.g. --gpio-backend fake for
+    a run without the LattePanda header.
+
 """
 import time
-import numpy as np
 import os
-import threading
 import queue
-import matplotlib.pyplot as plt
-from nxsdk.utils.plotutils import plotRaster
-from nxsdk.graph.channel import Channel
-import nxsdk.api.n2a as nx
-from nxsdk.arch.n2a.n2board import N2Board
-from nxsdk.graph.processes.phase_enums import Phase
-from pinpong.board import Board, Pin
-from OscGenProcess import oscillator
-import matplotlib as mpl
-import psutil
+import argparse
+from OscGenProcess import oscillator, spike_ring
+from spike_injector import SpikeInjector
+from spike_receiver import SpikeReceiverCallback
+import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.hardware_runtime import HardwareRuntime, BACKENDS
 
-mpl.use('Agg')
 
 # -------------------------------------------------------------------------
 NUM_PLOTS_PER_RECEIVER = 1
 NUM_TIME_STEPS = 500
-CURR_TIMESTEP = 0
+# Feed the network the precomputed oscillator schedule through addSpikes() instead of the real-time thread, the
+# network then runs at full simulation speed and every run sees the same spike train
+OFFLINE_SCHEDULE = False
+TIMESTEP_DURATION = 1e-3 # [sec] oscillator time per timestep in an offline run
+# Run the oscillator in its own process, clear of the GIL, sending spikes through a shared-memory ring
+OSCILLATOR_PROCESS = False
+BLINK_TIME = 0.005 # [sec] LED on time per spike
+# Default LED pin backend (--gpio-backend), see utils/hardware_runtime.py: "pinpong" (one write_digital round
+# trip per pin), "firmata" (Firmata port messages, 8 pins per message, capped to what the link carries, the
+# serial port is then opened here rather than by pinpong) or "fake" (no device, the run records the LED edges)
+GPIO_BACKEND = "pinpong"
+SERIAL_PORT = "/dev/ttyACM0"
+FIRMATA_BAUD = 57600
+LED_PINS = (2, 3) # header pins D2 and D3, one LED per spike receiver
+# Spike input port node id of each neuron's spike generator. Port node ids count up across spike generators
+# (see README), so neuron2's one port is 1, in both addSpikes() and sendSpikes()
+SPIKE_PORTS = (0, 1)
 # -------------------------------------------------------------------------
-"""Used for callback method of spike receiver"""
-class Callable:
-    def __init__(self, index):
-        # data will hold the spike activity for the compartments associated with a spikereceiver
+"""Used for callback method of spike receiver, storage and spike detection live in spike_receiver.py"""
+class Callable(SpikeReceiverCallback):
+    def __init__(self, index, led_output):
         # Each spikereceiver will have its own Callable instance as the callback. This is denoted by index
-        self.data = [[] for i in range(NUM_PLOTS_PER_RECEIVER)]
-        self.index = index
-        """Performance Measures"""
-        self.total_latency = 0.0
-        self.request_count = 0
-
-    def __call__(self, *args, **kwargs):
-        # At every invocation of this method, new data since the last invocation will be passed along.
-        # args[0] essentially is a list[list]. Length of the parent list is the number of compartments 
-        # connecting to this spike receiver while each sublist is the timeseries data associated with that
-        # compartment accrued since the last invocation. len(args) is 1.
-        global CURR_TIMESTEP, led2_output, led3_output
-        #print(f"Data for neuron{self.index}: {args[0]}")
-        start_time = time.perf_counter()
-        for compartmentId, tsData in enumerate(args[0]):
-            self.data[compartmentId].extend(tsData)
-            for spike in tsData:
-                if spike == 1:
-                    if self.index == 1:
-                        #print(f"Data to blink led2, {self.index}")
-                        led2_output.send_spike('blink')
-                    elif self.index == 2:  
-                        #print(f"Data to blink led3, {self.index}")
-                        led3_output.send_spike('blink')
-                    #Increment per request of spike received
-                    self.request_count+= 1  
-            #print(f"{compartmentId}: {self.data[compartmentId]}, Index: {self.index}, Timestamp {tsData}")
-
-        #print(f"Done this time.... time-step: {len(self.data[compartmentId])}")
-        CURR_TIMESTEP = len(self.data[compartmentId])
-
-        end_time = time.perf_counter()
-        self.total_latency = self.total_latency + (end_time - start_time)
+        super().__init__(index, NUM_PLOTS_PER_RECEIVER, on_spikes=self.blink)
+        self.led_output = led_output
+
+    def blink(self, compartment_ids, time_steps):
+        # The spikes of one invocation arrive together, overlapping blinks merge into one pulse anyway
+        self.led_output.send_spike('blink')
 
     def plot_data(self):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
         fig, axes = plt.subplots(NUM_PLOTS_PER_RECEIVER, 1, figsize=(10, 5))
         if NUM_PLOTS_PER_RECEIVER == 1:
             axes = [axes]
 
         for compartmentId, ax in enumerate(axes):
-            spikes = np.array(self.data[compartmentId])
-            spike_times = np.where(spikes > 0)[0]
+            spike_times = self.spike_times(compartmentId)
             ax.eventplot(spike_times, colors='red', lineoffsets=0, linelengths=1.0)
             ax.set_title(f"SpikeReceiver{self.index} Compartment{compartmentId+1}")
             ax.set_xlim((0, NUM_TIME_STEPS))
@@ -97,54 +89,48 @@ class Callable:
         plt.close(fig)
         print("Data has been plotted")
 
-    def get_average_latency(self):
-        return self.total_latency / self.request_count if self.request_count > 0 else 0
-
 
 class ledPinOutput:
-    def __init__(self, pin_number):
-        #self.board = Board("uno", "/dev/ttyACM0").begin()
+    """
+    One LED on the shared GPIO scheduler (utils/gpio_scheduler.py). A spike schedules a BLINK_TIME pulse on the
+    scheduler's timer wheel and returns, blinks landing while the LED is still on extend it.
+    """
+    def __init__(self, scheduler, pin_number):
+        self.scheduler = scheduler
         self.pin_number = pin_number
-        self.led = Pin(pin_number, Pin.OUT)
-        self.queue = queue.Queue()
-        self.stop_event = threading.Event()
-        self.thread = threading.Thread(target=self._run)
-        self.thread.start()
-
-    def _run(self):
-        while not self.stop_event.is_set():
-            try:
-                # Wait for a spike with a timeout to periodically check for stop event
-                spike = self.queue.get(timeout=0.001)
-                if spike == 'blink':
-                    self._blink_led()
-            except queue.Empty:
-                continue
-
-    def _blink_led(self):
-        #print(f"Blinking Pin: {self.pin_number}")
-        self.led.write_digital(1)
-        time.sleep(0.005)     # Keep it on for 0.2 seconds
-        self.led.write_digital(0)
-        time.sleep(0.005)     # Keep it off for 0.2 seconds
+        self.scheduler.add_pin(pin_number)
 
     def send_spike(self, spike):
-        self.queue.put(spike)
+        if spike == 'blink':
+            self.scheduler.blink(self.pin_number, BLINK_TIME)
 
     def cleanup(self):
-        self.stop_event.set()
-        self.thread.join()
-        
+        # The scheduler owns the pin and drives it low when stopped
+        pass
+
+
+def led_outputs(runtime):
+    """One ledPinOutput per LED_PINS entry on the runtime's GPIO scheduler, the first opens the backend."""
+    return [ledPinOutput(runtime.gpio, pin_number=pin) for pin in LED_PINS]
+
+
+def cli_parser():
+    parser = argparse.ArgumentParser(description="Oscillator driven spike generators with LED spike receivers.")
+    parser.add_argument("--gpio-backend", choices=sorted(BACKENDS), default=GPIO_BACKEND,
+                        help=f"LED pin backend (default {GPIO_BACKEND})")
+    parser.add_argument("--serial-port", default=SERIAL_PORT, help=f"Board serial port (default {SERIAL_PORT})")
+    return parser.parse_args()
+
 #--------------------------------------------------------------------------
 # Main
 #--------------------------------------------------------------------------
-"""Header Pin Outputs"""
-pandaBoard = Board("uno", "/dev/ttyACM0").begin()
-
-led2_output = ledPinOutput(pin_number=Pin.D2)
-led3_output = ledPinOutput(pin_number=Pin.D3)
-
+# Importing this module opens no serial port, starts no thread and needs no nxsdk, the hardware is opened on
+# first use once the runtime is started below and closed by runtime.stop()
 if __name__ == '__main__':
+    import nxsdk.api.n2a as nx
+    import psutil
+
+    args = cli_parser()
 
     """Configure Network"""
 
@@ -166,12 +152,26 @@ if __name__ == '__main__':
     #Connection prototype
     spikeConnProto = nx.ConnectionPrototype(weight = 64)
 
-    #Spike generator process for neuron1
-    spikeGen1 = net.createInteractiveSpikeGenProcess(numPorts=1)
-    spikeGen1.connect(neuron1, prototype=spikeConnProto)
+    """Oscillator Process, see OscGenProcess.py for more details"""
+    spike_queue = spike_ring() if OSCILLATOR_PROCESS else queue.Queue()
+    oscillator = oscillator(amplitude = 200, 
+                            frequency = 1, 
+                            phase_shift=0, 
+                            spike_queue = spike_queue)
 
-    #Spike generator process for neuron2
-    spikeGen2 = net.createInteractiveSpikeGenProcess(numPorts=1)
+    if OFFLINE_SCHEDULE:
+        #Spike generator processes preloaded with the oscillator's whole spike train, one per neuron
+        spikeTimes1, spikeTimes2 = oscillator.spike_timesteps(TIMESTEP_DURATION, NUM_TIME_STEPS)
+        spikeGen1 = net.createSpikeGenProcess(numPorts=1)
+        spikeGen1.addSpikes(spikeInputPortNodeIds=[SPIKE_PORTS[0]], spikeTimes=[spikeTimes1])
+        spikeGen2 = net.createSpikeGenProcess(numPorts=1)
+        spikeGen2.addSpikes(spikeInputPortNodeIds=[SPIKE_PORTS[1]], spikeTimes=[spikeTimes2])
+    else:
+        #Spike generator process for neuron1
+        spikeGen1 = net.createInteractiveSpikeGenProcess(numPorts=1)
+        #Spike generator process for neuron2
+        spikeGen2 = net.createInteractiveSpikeGenProcess(numPorts=1)
+    spikeGen1.connect(neuron1, prototype=spikeConnProto)
     spikeGen2.connect(neuron2, prototype=spikeConnProto)
     
     #Spike receiver processes
@@ -179,9 +179,15 @@ if __name__ == '__main__':
     spikeReceiver1.connect(neuron1)
     spikeReceiver2 = nx.SpikeReceiver(net)
     spikeReceiver2.connect(neuron2)
+    """Header Pin Outputs"""
+    runtime = HardwareRuntime(args.gpio_backend, port=args.serial_port, baud=FIRMATA_BAUD)
+    runtime.start()
+    # The first LED opens the board and starts the GPIO scheduler, before the network runs
+    led2_output, led3_output = led_outputs(runtime)
+
     #Register callback functions for spike receivers
-    callable1 = Callable(1)
-    callable2 = Callable(2)
+    callable1 = Callable(1, led2_output)
+    callable2 = Callable(2, led3_output)
     spikeReceiver1.callback(callable1)
     spikeReceiver2.callback(callable2) 
     
@@ -192,14 +198,8 @@ if __name__ == '__main__':
     #receive board object required by SNIPs
     #board = compiler.compile(net)
     
-    """Oscillator Process, see OscGenProcess.py for more details"""
-    spike_queue = queue.Queue()
-    oscillator = oscillator(amplitude = 200, 
-                            frequency = 1, 
-                            phase_shift=0, 
-                            spike_queue = spike_queue)
-    
-    oscillator.run() # Starts generating sinewave in a separate thread
+    if not OFFLINE_SCHEDULE:
+        oscillator.run(process=OSCILLATOR_PROCESS) # Starts generating sinewave in a separate thread/process
 
     #if using the N2Board class, uncomment the following lines
     #board.start()
@@ -211,6 +211,10 @@ if __name__ == '__main__':
     p = psutil.Process()
     net_counters_start = psutil.net_io_counters()
     p_start_time = time.perf_counter()
+    if OFFLINE_SCHEDULE:
+        total_spikes_sent = len(spikeTimes1) + len(spikeTimes2)
+    else:
+        injector = SpikeInjector(spike_queue, {0: (spikeGen1, SPIKE_PORTS[0]), 1: (spikeGen2, SPIKE_PORTS[1])})
 
     """Run Network"""
     net.runAsync(numSteps=NUM_TIME_STEPS)
@@ -218,19 +222,13 @@ if __name__ == '__main__':
 
     try: 
         #listen for spikes
-        while CURR_TIMESTEP < NUM_TIME_STEPS:
-            if not spike_queue.empty(): 
-                
-                #print("I'm here 2")
-                neuron_id = spike_queue.get()
-                if neuron_id == 0:
-                    # print("Spiking neuron 1")
-                    spikeGen1.sendSpikes(spikeInputPortNodeIds=[0], numSpikes=[1])
-                elif neuron_id == 1:
-                    # print("Spiking neuron 2")
-                    spikeGen2.sendSpikes(spikeInputPortNodeIds=[1], numSpikes=[1])
-            
-            total_spikes_sent += 1
+        while callable1.time_step < NUM_TIME_STEPS:
+            if OFFLINE_SCHEDULE:
+                time.sleep(0.001) # The spikes are already on the chip, wait for the receivers
+                continue
+            # Sleeps on the queue (or the ring's semaphore), then sends every pending spike in one call per
+            # spike generator. The timeout only bounds how late the time_step check runs.
+            injector.flush(timeout=0.01)
             
 
     except KeyboardInterrupt:
@@ -241,7 +239,10 @@ if __name__ == '__main__':
     finally: 
         p_stop_time = time.perf_counter()
         net_counters_stop = psutil.net_io_counters()
-        oscillator.stop()
+        if not OFFLINE_SCHEDULE:
+            oscillator.stop()
+            total_spikes_sent = injector.spikes_sent # Exact, counted per spike handed to sendSpikes
+            print(f"sendSpikes calls: {injector.calls} over {injector.flushes} flushes")
         #board.finishRun()
         #board.disconnect()
         net.disconnect()
@@ -250,6 +251,13 @@ if __name__ == '__main__':
         #cleanup LED objects
         led2_output.cleanup()
         led3_output.cleanup()
+        runtime.stop()
+        leds = runtime.pin_backend
+        if hasattr(leds, "coalesced"):
+            print(f"LED pin writes: {leds.pin_writes} in {leds.port_writes} port messages "
+                  f"({leds.coalesced} coalesced)")
+        elif hasattr(leds, "edges"):
+            print(f"LED edges recorded (fake backend): {len(leds.edges)}")
 
         #Plot spike receiver data from runtime
         callable1.plot_data()
@@ -257,7 +265,7 @@ if __name__ == '__main__':
 
 
     """Performance Evaluation"""
-    total_spikes_received = callable1.request_count + callable2.request_count
+    total_spikes_received = callable1.spike_count + callable2.spike_count
     total_elapsed_time = p_stop_time - p_start_time
 
     #I/O Counters Data
@@ -274,6 +282,10 @@ if __name__ == '__main__':
     print(f"Total Spikes Received: {total_spikes_received}")
     print(f"Total Elapsed Time: {total_elapsed_time} [seconds]")
     print(f"Average Spike Receiver Latency: {average_latency} [seconds]") 
+    for receiver in (callable1, callable2):
+        stats = receiver.latency_stats()
+        print(f"SpikeReceiver{receiver.index} callback: {stats['calls']} calls, mean {stats['mean'] * 1e6:.1f} us, "
+              f"p99 {stats['p99'] * 1e6:.1f} us, max {stats['max'] * 1e6:.1f} us")
     print(f"Throughput: {throughput} spikes/second")   
 
     # -------------------------------------------------------------------------
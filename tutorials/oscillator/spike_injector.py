@@ -0,0 +1,112 @@
+"""
+Author: Reece Wayt
+
+Batched spike injection from the oscillator's spike queue into InteractiveSpikeGen processes.
+
+Notes:
+    The old main loop polled spike_queue.empty() without sleeping and called sendSpikes once per spike, each
+    call a round trip to the board. SpikeInjector.flush() instead blocks on the queue until a spike arrives,
+    takes everything else already waiting, counts the spikes per neuron and makes one sendSpikes call per
+    spike generator with the count for each of its ports.
+
+    The queue can hold what any of the oscillator generators produce:
+        int                          one neuron id (oscillator on a queue.Queue)
+        list of (neuron_id, time)    one batch (OscillatorBank)
+        SPIKE_MESSAGE bytes          spike_ring(), e.g. oscillator.run(process=True), drained with get_batch()
+
+    The counters are exact: spikes_sent is the sum of numSpikes over every sendSpikes call. Run it against
+    utils.harness.MockSpikeGen to check the grouping and counts without a board (see benchmark_injection.py).
+"""
+import os
+import sys
+import queue
+import numpy as np
+from OscGenProcess import unpack_spikes
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.shm_ring import SharedRingBuffer
+
+
+class SpikeInjector:
+    """
+    Attributes:
+        routes (dict): neuron id -> (spike generator, input port) the neuron's spikes are sent to.
+        spikes_sent (int): Spikes handed to sendSpikes.
+        calls (int): sendSpikes calls made.
+        flushes (int): flush() calls that sent something.
+        dropped (int): Spikes for neuron ids without a route.
+        neuron_counts (np.ndarray): Spikes sent per neuron id.
+    """
+
+    def __init__(self, spike_queue, routes):
+        """
+        Parameters:
+            spike_queue (queue.Queue or SharedRingBuffer): Where the oscillator puts its spikes.
+            routes (dict): neuron id -> (spike generator, input port), e.g. {0: (spikeGen1, 0), 1: (spikeGen2, 1)}.
+        """
+        self.spike_queue = spike_queue
+        self.routes = dict(routes)
+        self._num_neurons = max(self.routes) + 1
+        self._has_route = np.zeros(self._num_neurons, dtype=bool)
+        self._has_route[list(self.routes)] = True
+        # Grouped once: every generator with the neuron ids and ports it serves
+        generators = {}
+        for neuron_id, (spike_gen, port) in sorted(self.routes.items()):
+            generators.setdefault(id(spike_gen), (spike_gen, [], []))
+            generators[id(spike_gen)][1].append(neuron_id)
+            generators[id(spike_gen)][2].append(port)
+        self._generators = [(gen, np.array(ids), np.array(ports)) for gen, ids, ports in generators.values()]
+        self.spikes_sent = 0
+        self.calls = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.neuron_counts = np.zeros(self._num_neurons, dtype=np.int64)
+
+    def _ids(self, item):
+        if isinstance(item, (bytes, bytearray)):
+            return unpack_spikes([item])[0]
+        if isinstance(item, list):
+            return np.array([neuron_id for neuron_id, _ in item], dtype=np.int64)
+        return np.array([item], dtype=np.int64)
+
+    def _drain(self, timeout):
+        """Neuron ids of every pending spike, waiting up to `timeout` for the first. Empty if none came."""
+        try:
+            if isinstance(self.spike_queue, SharedRingBuffer):
+                return unpack_spikes(self.spike_queue.get_batch(timeout=timeout))[0]
+            items = [self.spike_queue.get(timeout=timeout)]
+        except queue.Empty:
+            return np.empty(0, dtype=np.int64)
+        while True:
+            try:
+                items.append(self.spike_queue.get_nowait())
+            except queue.Empty:
+                break
+        return np.concatenate([self._ids(item) for item in items])
+
+    def flush(self, timeout=None):
+        """
+        Blocks until a spike arrives (or `timeout` passes) and sends every pending spike, one sendSpikes call per
+        spike generator. Returns the number of spikes sent.
+        """
+        neuron_ids = self._drain(timeout)
+        if neuron_ids.size == 0:
+            return 0
+        in_range = (neuron_ids >= 0) & (neuron_ids < self._num_neurons)
+        neuron_ids = neuron_ids[in_range][self._has_route[neuron_ids[in_range]]]
+        self.dropped += int(in_range.size - neuron_ids.size)
+        if neuron_ids.size == 0:
+            return 0
+        counts = np.bincount(neuron_ids, minlength=self._num_neurons)
+        for spike_gen, ids, ports in self._generators:
+            gen_counts = counts[ids]
+            pending = gen_counts > 0
+            if pending.any():
+                spike_gen.sendSpikes(spikeInputPortNodeIds=ports[pending].tolist(),
+                                     numSpikes=gen_counts[pending].tolist())
+                self.calls += 1
+        sent = int(neuron_ids.size)
+        self.neuron_counts += counts
+        self.spikes_sent += sent
+        self.flushes += 1
+        return sent
@@ -0,0 +1,88 @@
+"""
+Author: Reece Wayt
+
+Array-backed callback for nx.SpikeReceiver, shared by main.py and spike_sender_receiver_example.py.
+
+Notes:
+    Every callback invocation passes args[0], one list per connected compartment holding the values of the
+    timesteps since the last invocation. The old Callable extended a Python list per compartment and walked
+    every value in Python. SpikeReceiverCallback copies the block into a utils.recorder.Recorder in one call
+    (timesteps as rows, compartments as columns) and finds the spikes with np.flatnonzero, so a callback costs
+    the same at timestep 100 as at timestep 100000.
+
+    - keep_last bounds the memory: only the last keep_last timesteps stay in RAM, older ones are appended to
+      spill_path (if given) and come back with history().
+    - on_spikes(compartment_ids, time_steps) is called once per invocation with every spike in it, e.g. to
+      hand the batch to an actuator thread.
+    - time_step counts the timesteps received, use it instead of a global to follow the run.
+    - Callback time is measured with perf_counter_ns, see latency_stats().
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from utils.recorder import Recorder
+
+LATENCY_WINDOW = 4096  # callback times kept for the percentiles
+PERCENTILES = [50, 99]
+
+
+class SpikeReceiverCallback:
+    """
+    Attributes:
+        index (int): Which spike receiver this is, for plot titles and file names.
+        num_compartments (int): Compartments connected to the receiver.
+        recorder (Recorder): Received values, one row per timestep and one column per compartment.
+        time_step (int): Timesteps received so far.
+        spike_count (int): Spikes received so far.
+        call_count (int): Callback invocations.
+    """
+
+    def __init__(self, index, num_compartments=1, keep_last=None, spill_path=None, on_spikes=None):
+        self.index = index
+        self.num_compartments = num_compartments
+        self.recorder = Recorder([f"compartment{i}" for i in range(num_compartments)], keep_last=keep_last,
+                                 dtype=np.uint8, spill_path=spill_path)
+        self.on_spikes = on_spikes
+        self.time_step = 0
+        self.spike_count = 0
+        self.call_count = 0
+        self.total_ns = 0
+        self.latencies_ns = Recorder(("ns",), keep_last=LATENCY_WINDOW, dtype=np.int64)
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        # (timesteps, compartments), the layout the recorder stores
+        block = np.asarray(args[0], dtype=np.uint8).reshape(self.num_compartments, -1).T
+        self.recorder.extend(block)
+        spikes = np.flatnonzero(block)
+        if spikes.size:
+            self.spike_count += spikes.size
+            if self.on_spikes is not None:
+                compartment_ids = spikes % self.num_compartments
+                time_steps = self.time_step + spikes // self.num_compartments + 1  # timesteps start at 1
+                self.on_spikes(compartment_ids, time_steps)
+        self.time_step += block.shape[0]
+        elapsed = time.perf_counter_ns() - start
+        self.call_count += 1
+        self.total_ns += elapsed
+        self.latencies_ns.append(elapsed)
+
+    def spike_times(self, compartment_id=0):
+        """Timesteps (from 1) compartment_id spiked at, over the whole run if the recorder spills."""
+        return np.flatnonzero(self.recorder.history()[:, compartment_id]) + 1
+
+    def latency_stats(self):
+        """Callback time in seconds: mean over the run, p50/p99/max over the last LATENCY_WINDOW calls."""
+        latencies = self.latencies_ns.array()[:, 0]
+        if latencies.size == 0:
+            return {"calls": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        p50, p99 = np.percentile(latencies, PERCENTILES) / 1e9
+        return {"calls": self.call_count, "mean": self.total_ns / self.call_count / 1e9, "p50": p50, "p99": p99,
+                "max": latencies.max() / 1e9}
+
+    def get_average_latency(self):
+        """Callback time per spike received [sec], the figure main.py has always printed."""
+        return self.total_ns / self.spike_count / 1e9 if self.spike_count > 0 else 0
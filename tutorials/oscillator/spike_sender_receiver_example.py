@@ -8,6 +8,7 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
 from threading import Thread, Event
+from spike_receiver import SpikeReceiverCallback
 
 #Number of timesteps to run
 NUM_TIMESTEPS=10
@@ -15,22 +16,15 @@ NUM_TIMESTEPS=10
 # Number of plots for each spike receiver (corresponds to how many compartments are connected with the spike receiver)
 NUM_PLOTS_PER_RECEIVER=GROUP_SIZE=3
 
-class Callable:
+class Callable(SpikeReceiverCallback):
     def __init__(self, index):
-        # data will hold the spike activity for the 3 compartments associated with a spikereceiver
+        # The recorder holds the spike activity for the 3 compartments associated with a spikereceiver
         # Each spikereceiver will have its own Callable instance as the callback. This is denoted by index
-        self.data = [[] for i in range(NUM_PLOTS_PER_RECEIVER)]
-        self.index = index
+        super().__init__(index, NUM_PLOTS_PER_RECEIVER, on_spikes=self.print_spikes)
 
-    def __call__(self, *args, **kwargs):
-        # At every invocation of this method, new data since the last invocation will be passed along.
-        # args[0] essentially is a list[list]. Length of the parent list is the number of compartments 
-        # connecting to this spike receiver while each sublist is the timeseries data associated with that
-        # compartment accrued since the last invocation. len(args) is 1.
-        for compartmentId, tsData in enumerate(args[0]):
-            self.data[compartmentId].extend(tsData)
-            print(f"Data {compartmentId}: {self.data[compartmentId]}, Index: {self.index}, Timestamp {tsData}")
-        print("Done")
+    def print_spikes(self, compartment_ids, time_steps):
+        # Called once per invocation with every spike in it, see spike_receiver.py
+        print(f"Receiver {self.index} spikes, compartments: {compartment_ids}, timesteps: {time_steps}")
 
 
 class AsyncPlotter:
@@ -60,11 +54,11 @@ class AsyncPlotter:
             plt.tight_layout()
 
             # Loop till all timesteps are complete
-            while len(callableObjects[0].data[0]) != timesteps:
+            while callableObjects[0].time_step != timesteps:
                 sleep(0.5)
                 for objIndex, subplot in enumerate(axes):
                     for index, ax in enumerate(subplot):
-                        ax.eventplot(np.where(callableObjects[objIndex].data[index]), colors=eventColors[objIndex])
+                        ax.eventplot(callableObjects[objIndex].spike_times(index), colors=eventColors[objIndex])
                 fig.canvas.draw()
 
             # Save the plot to a file
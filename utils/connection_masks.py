@@ -0,0 +1,32 @@
+"""
+@Brief: Connection masks for the port group layer builders of both dummy pipelines (create_input_port_group and
+        create_output_port_group in dummy-pipeline-1.0/loihi_utils.py and dummy-pipeline-2.0/snn_utils.py).
+
+@Notes:
+    - Masks are (num destinations, num sources) as nxsdk's connect() expects, i.e. (neurons, ports) for input
+      ports and (ports, neurons) for output ports.
+    - The default mask wires source i -> destination i for i < min of the two, so a port group need not match
+      the neuron count. It is a scipy.sparse CSR matrix, scipy is pinned in environment.yml.
+
+@Usage:
+    mask = connection_mask(None, neuron_group.numNodes, num_ports)
+    port_group.connect(neuron_group, prototype=prototype, connectionMask=mask)
+
+@Author: Reece Wayt
+"""
+import scipy.sparse
+
+
+def identity_mask(num_destinations, num_sources):
+    """Source i -> destination i, as a (num_destinations, num_sources) CSR matrix."""
+    return scipy.sparse.eye(num_destinations, num_sources, dtype=int, format="csr")
+
+
+def connection_mask(mask, num_destinations, num_sources):
+    """Returns `mask`, or the identity mask if it is None. Raises ValueError if its shape does not match."""
+    if mask is None:
+        return identity_mask(num_destinations, num_sources)
+    if tuple(mask.shape) != (num_destinations, num_sources):
+        raise ValueError(f"connection mask is {tuple(mask.shape)}, expected "
+                         f"(num destinations, num sources) = ({num_destinations}, {num_sources})")
+    return mask
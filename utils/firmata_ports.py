@@ -0,0 +1,119 @@
+"""
+@Brief: GPIO scheduler backend that writes digital outputs as Firmata port messages, one 3 byte message per 8 pins
+        instead of one round trip per pin, with an optional cap on the message rate.
+
+@Notes:
+    - Firmata addresses digital outputs by port: DIGITAL_MESSAGE (0x90 | port), then the 8 pin levels of the port
+      as two 7 bit bytes. write_pins() folds every change of one scheduler tick into the cached port levels and
+      sends each touched port once, however many of its pins changed.
+    - max_messages_per_sec caps the port messages sent (token bucket, bursts of up to MAX_BURST_MESSAGES after
+      an idle spell). A port that has no token stays dirty and keeps absorbing later changes until it can go
+      out, pending tells the GPIO scheduler to keep flushing. link_message_rate(baud) is the most a serial link
+      can carry.
+    - pin_writes counts the pin level changes handed in, port_writes the messages sent; coalesced is the
+      difference, the round trips saved.
+    - transport is anything with write(bytes): a pyserial Serial from open_serial(), or the serial object of an
+      existing connection. pinpong's Board must not hold the same port, outputs then go through here alone.
+
+@Usage:
+    backend = FirmataPortBackend(open_serial("/dev/ttyACM0"), max_messages_per_sec=link_message_rate(57600))
+    with GpioScheduler(backend) as gpio:
+        gpio.blink(2, 0.005)
+
+@Author: Reece Wayt
+"""
+import time
+import threading
+
+DIGITAL_MESSAGE = 0x90
+SET_PIN_MODE = 0xF4
+PIN_MODE_OUTPUT = 0x01
+PORT_PINS = 8
+MESSAGE_BYTES = 3
+MAX_BURST_MESSAGES = 8    # port messages the rate cap lets out back to back after an idle spell
+ARDUINO_RESET_TIME = 2.0  # [sec] the board resets when the port is opened, StandardFirmata is ready after this
+
+
+def link_message_rate(baud):
+    """Port messages per second a serial link at `baud` can carry (10 bits per byte on the wire)."""
+    return baud / 10 / MESSAGE_BYTES
+
+
+def open_serial(port, baud=57600, settle=ARDUINO_RESET_TIME):
+    """Opens `port` with pyserial and waits for the board to come out of reset."""
+    import serial
+    link = serial.Serial(port, baud)
+    time.sleep(settle)
+    return link
+
+
+def port_message(port, levels):
+    """DIGITAL_MESSAGE for `port` with pin bit b of `levels` driving pin PORT_PINS * port + b."""
+    return bytes([DIGITAL_MESSAGE | (port & 0x0F), levels & 0x7F, (levels >> 7) & 0x01])
+
+
+class FirmataPortBackend:
+    """
+    Attributes:
+        pin_writes (int): Pin level changes received.
+        port_writes (int): Port messages sent.
+        pending (int): Dirty ports waiting for the rate cap.
+    """
+
+    def __init__(self, transport, max_messages_per_sec=None):
+        self.transport = transport
+        self.max_messages_per_sec = max_messages_per_sec
+        self._ports = {}      # port -> cached levels of its 8 pins
+        self._dirty = set()   # ports changed since their last message
+        self._tokens = 1.0
+        self._refilled = time.perf_counter()
+        self._lock = threading.Lock()
+        self.pin_writes = 0
+        self.port_writes = 0
+
+    @property
+    def pending(self):
+        return len(self._dirty)
+
+    @property
+    def coalesced(self):
+        return self.pin_writes - self.port_writes
+
+    def setup(self, pin):
+        with self._lock:
+            self._ports.setdefault(pin // PORT_PINS, 0)
+            self.transport.write(bytes([SET_PIN_MODE, pin & 0x7F, PIN_MODE_OUTPUT]))
+
+    def _take_token(self):
+        if self.max_messages_per_sec is None:
+            return True
+        now = time.perf_counter()
+        self._tokens = min(self._tokens + (now - self._refilled) * self.max_messages_per_sec, MAX_BURST_MESSAGES)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def write_pins(self, changes):
+        """Applies {pin: value} to the cached ports and sends every dirty port the rate cap allows."""
+        with self._lock:
+            for pin, value in changes.items():
+                port, bit = divmod(pin, PORT_PINS)
+                levels = self._ports.get(port, 0)
+                self._ports[port] = levels | (1 << bit) if value else levels & ~(1 << bit)
+                self._dirty.add(port)
+            self.pin_writes += len(changes)
+            message = bytearray()
+            for port in sorted(self._dirty):
+                if not self._take_token():
+                    break
+                message += port_message(port, self._ports[port])
+                self._dirty.discard(port)
+                self.port_writes += 1
+            if message:
+                self.transport.write(bytes(message))
+
+    def flush(self):
+        """Sends the ports held back by the rate cap, as far as it allows now."""
+        self.write_pins({})
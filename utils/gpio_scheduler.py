@@ -0,0 +1,198 @@
+"""
+@Brief: One thread that owns every actuator pin and drives on/off edges from a timer wheel, so a blink costs its
+        caller a dict update instead of a thread sleeping through it.
+
+@Notes:
+    - blink(pin, duration) never touches the hardware and never blocks. It schedules the on edge for the next
+      tick and the off edge `duration` later. A blink landing while the pin is still on extends the on time
+      (merged, counted in blinks_merged) instead of queueing another on/off pair, so the output rate no longer
+      depends on how long a blink lasts.
+    - The wheel has WHEEL_SLOTS slots of `tick` seconds. An edge further out than one turn stays in its slot
+      until its turn comes round. Off edges made stale by a merge are skipped when their slot fires.
+    - Every tick the scheduler collects the edges due, keeps the last value per pin, and hands the backend
+      only the pins whose level changes, in one write_pins({pin: value}) call. Ticks caught up on together
+      (a late thread, or advance() over several ticks) are still written one after another in tick order, so
+      a pulse whose on and off edges both fall in the catch up reaches the backend. The thread sleeps on a
+      condition while nothing is scheduled.
+    - Backends implement setup(pin) and write_pins(changes). PinpongBackend drives the LattePanda header
+      through pinpong (imported on first use), one round trip per pin. utils/firmata_ports.py batches a tick's
+      changes into Firmata port messages under a rate cap, and utils.harness.FakePinBackend records the edges
+      for tests. A backend with a `pending` count and flush() gets flushed every tick until it is drained.
+    - advance(now_tick) runs the wheel without the thread, which is how to step it deterministically.
+
+@Usage:
+    with GpioScheduler(PinpongBackend()) as gpio:
+        gpio.blink(Pin.D2, 0.005)
+
+@Author: Reece Wayt
+"""
+import time
+import threading
+
+WHEEL_SLOTS = 512
+DEFAULT_TICK = 1e-3  # [sec]
+
+
+class PinpongBackend:
+    """Digital outputs through pinpong. The pinpong Board must have been begun by the caller."""
+
+    def __init__(self):
+        self._pins = {}
+
+    def setup(self, pin):
+        from pinpong.board import Pin
+        self._pins[pin] = Pin(pin, Pin.OUT)
+
+    def write_pins(self, changes):
+        for pin, value in changes.items():
+            self._pins[pin].write_digital(value)
+
+
+class GpioScheduler:
+    """
+    Attributes:
+        backend: setup(pin)/write_pins(changes) implementation.
+        tick (float): [sec] wheel resolution, the granularity of edge times.
+        blinks (int): blink() calls.
+        blinks_merged (int): Blinks that landed on a pin already on and only extended it.
+        edges_written (int): Pin level changes handed to the backend.
+        late_ticks (int): Ticks processed after their deadline had passed by more than a tick.
+    """
+
+    def __init__(self, backend, tick=DEFAULT_TICK, slots=WHEEL_SLOTS):
+        self.backend = backend
+        self.tick = tick
+        self._wheel = [[] for _ in range(slots)]  # slot -> [(tick, pin, value)]
+        self._levels = {}      # pin -> level last written
+        self._on_until = {}    # pin -> tick of its live off edge
+        self._scheduled = 0    # edges in the wheel
+        self._last_tick = 0    # last tick processed
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.start_time = time.perf_counter()
+        self.blinks = 0
+        self.blinks_merged = 0
+        self.edges_written = 0
+        self.late_ticks = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def now_tick(self):
+        return int((time.perf_counter() - self.start_time) / self.tick)
+
+    def _schedule(self, tick, pin, value):
+        self._wheel[tick % len(self._wheel)].append((tick, pin, value))
+        self._scheduled += 1
+
+    def add_pin(self, pin):
+        """Sets `pin` up as an output, driven low. Pins are also added on first use."""
+        with self._cond:
+            if pin not in self._levels:
+                self.backend.setup(pin)
+                self._levels[pin] = 0
+
+    def blink(self, pin, duration):
+        """Turns `pin` on from the next tick for `duration` seconds, merging with a blink still in progress."""
+        self.add_pin(pin)
+        with self._cond:
+            self.blinks += 1
+            start = max(self.now_tick(), self._last_tick) + 1
+            off = start + max(int(round(duration / self.tick)), 1)
+            if self._on_until.get(pin, 0) >= start:
+                self.blinks_merged += 1
+                if off <= self._on_until[pin]:
+                    return
+            else:
+                self._schedule(start, pin, 1)
+            self._on_until[pin] = off
+            self._schedule(off, pin, 0)
+            self._cond.notify()
+
+    def advance(self, now_tick):
+        """Fires every edge due up to and including `now_tick`. Returns the number of pin writes made."""
+        with self._cond:
+            writes = []  # changes per tick with any, in tick order
+            for tick in range(self._last_tick + 1, now_tick + 1):
+                if self._scheduled == 0:
+                    break
+                slot = self._wheel[tick % len(self._wheel)]
+                if not slot:
+                    continue
+                remaining = []
+                changes = {}
+                for edge in slot:
+                    edge_tick, pin, value = edge
+                    if edge_tick != tick:
+                        remaining.append(edge)  # a later turn of the wheel
+                        continue
+                    self._scheduled -= 1
+                    if value == 0 and self._on_until.get(pin) != tick:
+                        continue  # superseded by a merged blink
+                    changes[pin] = value
+                slot[:] = remaining
+                changes = {pin: value for pin, value in changes.items() if self._levels[pin] != value}
+                if changes:
+                    self._levels.update(changes)
+                    writes.append(changes)
+            self._last_tick = max(self._last_tick, now_tick)
+        for changes in writes:
+            self.backend.write_pins(changes)
+            self.edges_written += len(changes)
+        if not writes and self._backend_pending():
+            self.backend.flush()
+        return sum(len(changes) for changes in writes)
+
+    def _backend_pending(self):
+        # Backends with a rate cap (utils/firmata_ports.py) hold writes back and need flushing on later ticks
+        return getattr(self.backend, "pending", 0)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                if self._scheduled == 0 and not self._backend_pending():
+                    self._cond.wait(timeout=0.1)
+                    self._last_tick = max(self._last_tick, self.now_tick() - 1)
+                    continue
+            next_deadline = self.start_time + (self._last_tick + 1) * self.tick
+            delay = next_deadline - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            now = self.now_tick()
+            if now > self._last_tick + 1:
+                self.late_ticks += now - self._last_tick - 1
+            self.advance(now)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._last_tick = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="gpio_scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the thread and drives every pin low."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._cond:
+            changes = {pin: 0 for pin, level in self._levels.items() if level}
+            self._levels.update(changes)
+            self._on_until.clear()
+            for slot in self._wheel:
+                slot.clear()
+            self._scheduled = 0
+        if changes:
+            self.backend.write_pins(changes)
+            self.edges_written += len(changes)
+        while self._backend_pending():
+            time.sleep(self.tick)
+            self.backend.flush()
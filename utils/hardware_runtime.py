@@ -0,0 +1,108 @@
+"""
+@Brief: Context-managed owner of the superhost's hardware (coprocessor serial link, GPIO scheduler), opened lazily
+        on first use through a pluggable backend, so importing a script opens nothing and starts no threads.
+
+@Notes:
+    - start() only arms the runtime. The first access to `gpio` opens the backend and starts the GpioScheduler
+      (utils/gpio_scheduler.py), anything never used is never opened. stop() closes what was opened, in reverse.
+    - Backends, picked by name or given as a factory(runtime) returning (pin_backend, close):
+        pinpong   pinpong Board on `port`, one write_digital round trip per pin (PinpongBackend)
+        firmata   Firmata port messages over pyserial, coalesced and rate capped (utils/firmata_ports.py)
+        fake      utils.harness.FakePinBackend, no device, for tests and dry runs
+      pinpong and pyserial are imported by their backends only.
+    - Pins are plain Arduino digital pin numbers (pinpong's Pin.D2 is 2), so callers need no pinpong import.
+
+@Usage:
+    with HardwareRuntime("fake") as hw:
+        hw.gpio.blink(2, 0.005)
+
+@Author: Reece Wayt
+"""
+import threading
+from .gpio_scheduler import GpioScheduler, PinpongBackend, DEFAULT_TICK
+
+DEFAULT_PORT = "/dev/ttyACM0"
+DEFAULT_BAUD = 57600
+
+
+def _open_pinpong(runtime):
+    from pinpong.board import Board
+    # pinpong keeps the connection for the life of the process, there is nothing to close
+    Board(runtime.board_name, runtime.port).begin()
+    return PinpongBackend(), lambda: None
+
+
+def _open_firmata(runtime):
+    from .firmata_ports import FirmataPortBackend, open_serial, link_message_rate
+    link = open_serial(runtime.port, runtime.baud)
+    return FirmataPortBackend(link, max_messages_per_sec=link_message_rate(runtime.baud)), link.close
+
+
+def _open_fake(runtime):
+    from .harness.fake_pins import FakePinBackend
+    return FakePinBackend(), lambda: None
+
+
+BACKENDS = {"pinpong": _open_pinpong, "firmata": _open_firmata, "fake": _open_fake}
+
+
+class HardwareRuntime:
+    """
+    Attributes:
+        backend (str or callable): Backend name in BACKENDS, or a factory(runtime) -> (pin_backend, close).
+        pin_backend: The opened pin backend, None until gpio is first used.
+        opened (list): Names of the resources opened so far, in order.
+    """
+
+    def __init__(self, backend="pinpong", port=DEFAULT_PORT, baud=DEFAULT_BAUD, board_name="uno",
+                 tick=DEFAULT_TICK):
+        if not callable(backend) and backend not in BACKENDS:
+            raise ValueError(f"unknown hardware backend {backend!r}, expected one of {sorted(BACKENDS)}")
+        self.backend = backend
+        self.port = port
+        self.baud = baud
+        self.board_name = board_name
+        self.tick = tick
+        self.pin_backend = None
+        self.opened = []
+        self._gpio = None
+        self._closers = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Arms the runtime, resources open on first use."""
+        self._started = True
+
+    @property
+    def gpio(self):
+        """The GpioScheduler, opening the backend and starting the scheduler thread on first use."""
+        with self._lock:
+            if not self._started:
+                raise RuntimeError("HardwareRuntime used before start()")
+            if self._gpio is None:
+                factory = self.backend if callable(self.backend) else BACKENDS[self.backend]
+                self.pin_backend, close = factory(self)
+                self._closers.append(close)
+                self.opened.append(getattr(self.backend, "__name__", self.backend))
+                self._gpio = GpioScheduler(self.pin_backend, tick=self.tick)
+                self._gpio.start()
+                self._closers.append(self._gpio.stop)
+                self.opened.append("gpio_scheduler")
+        return self._gpio
+
+    def stop(self):
+        """Stops and closes everything opened, newest first. Safe to call more than once."""
+        with self._lock:
+            self._started = False
+            closers, self._closers = self._closers, []
+            self._gpio = None
+        for close in reversed(closers):
+            close()
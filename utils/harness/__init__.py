@@ -0,0 +1,13 @@
+"""Hardware-free loopback harness: emulated Teensy on a pty, mock nxsdk channels and spike generator, a timestep
+clock and fake GPIO pins."""
+from .mock_channel import MockChannel, TO_CHIP, FROM_CHIP
+from .timestep_clock import TimestepClock, MockLoihi, MockBoard
+from .teensy_emulator import TeensyEmulator, RawByteProtocol
+from .mock_spike_gen import MockSpikeGen
+from .fake_pins import FakePinBackend
+
+# Define what is accessible when importing from harness
+__all__ = ['MockChannel', 'TO_CHIP', 'FROM_CHIP',
+           'TimestepClock', 'MockLoihi', 'MockBoard',
+           'TeensyEmulator', 'RawByteProtocol',
+           'MockSpikeGen', 'FakePinBackend']
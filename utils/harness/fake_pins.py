@@ -0,0 +1,58 @@
+"""
+@Brief: Fake digital output backend for utils/gpio_scheduler.py, records pin edges instead of driving a header.
+
+@Notes:
+    - Same calls as PinpongBackend: setup(pin) and write_pins({pin: value}).
+    - edges holds (perf_counter(), pin, value) for every level written, levels the current level per pin and
+      write_calls how many times the backend was called (one per scheduler tick with changes).
+    - write_cost adds a delay per call, a stand-in for the Firmata round trip.
+
+@Author: Reece Wayt
+"""
+import time
+import threading
+
+
+class FakePinBackend:
+    """
+    Attributes:
+        levels (dict): pin -> last level written.
+        edges (list): (perf_counter(), pin, value) per level written.
+        write_calls (int): write_pins calls.
+    """
+
+    def __init__(self, write_cost=0.0):
+        self.write_cost = write_cost
+        self.levels = {}
+        self.edges = []
+        self.write_calls = 0
+        self._lock = threading.Lock()
+
+    def setup(self, pin):
+        with self._lock:
+            self.levels[pin] = 0
+
+    def write_pins(self, changes):
+        if self.write_cost:
+            time.sleep(self.write_cost)
+        now = time.perf_counter()
+        with self._lock:
+            self.write_calls += 1
+            for pin, value in changes.items():
+                if pin not in self.levels:
+                    raise ValueError(f"pin {pin} written before setup()")
+                self.levels[pin] = value
+                self.edges.append((now, pin, value))
+
+    def pulses(self, pin):
+        """(on_time, off_time) of every completed pulse on `pin`."""
+        with self._lock:
+            edges = [(t, value) for t, p, value in self.edges if p == pin]
+        pulses, on_time = [], None
+        for t, value in edges:
+            if value and on_time is None:
+                on_time = t
+            elif not value and on_time is not None:
+                pulses.append((on_time, t))
+                on_time = None
+        return pulses
@@ -0,0 +1,119 @@
+"""
+@Brief: Stand-ins for nxsdk channels, so the pipeline's channel threads can run without a Kapoho Bay.
+
+@Notes:
+    - A channel carries numElements messages of messageSize bytes, the same arguments board.createChannel takes.
+    - The superhost side mirrors nxsdk.graph.channel.Channel: probe(), read(n) and write(n, data).
+      As on hardware, write blocks while the buffer is full and read blocks until enough messages arrive.
+      probe() is what the pipeline checks first: "room to write" on a TO_CHIP channel, "data to read" on a
+      FROM_CHIP channel.
+    - The chip side (chip_probe/chip_read/chip_write) is driven by MockLoihi from timestep_clock.py, the
+      same way the embedded encoder/decoder snips use probeChannel/readChannel/writeChannel.
+    - Values are checked against messageSize, so a message that would be truncated on hardware raises here.
+
+@Author: Reece Wayt
+"""
+import threading
+import collections
+
+TO_CHIP = "to_chip"      # superhost writes, embedded snip reads (e.g. nxEncoder)
+FROM_CHIP = "from_chip"  # embedded snip writes, superhost reads (e.g. nxDecoder)
+
+
+class MockChannel:
+    """
+    Attributes:
+        name (bytes): Channel name, as passed to board.createChannel.
+        messageSize (int): Bytes per message.
+        numElements (int): Messages the channel buffers.
+        overflow_count (int): Chip-side writes dropped because the buffer was full.
+        write_count, read_count (int): Messages accepted / delivered.
+    """
+
+    def __init__(self, name, messageSize, numElements, direction=TO_CHIP):
+        self.name = name
+        self.messageSize = messageSize
+        self.numElements = numElements
+        self.direction = direction
+        self._buffer = collections.deque()
+        self._cond = threading.Condition()
+        self._max_value = (1 << (8 * messageSize)) - 1
+        self.overflow_count = 0
+        self.write_count = 0
+        self.read_count = 0
+        self.closed = False
+
+    def _check(self, values):
+        for value in values:
+            if not 0 <= value <= self._max_value:
+                raise ValueError(f"{value} does not fit in a {self.messageSize} byte message on {self.name}")
+
+    def _put(self, values, block, timeout):
+        with self._cond:
+            for value in values:
+                if len(self._buffer) >= self.numElements:
+                    if not block or not self._cond.wait_for(
+                            lambda: self.closed or len(self._buffer) < self.numElements, timeout):
+                        return False
+                    if self.closed:
+                        return False
+                self._buffer.append(value)
+                self.write_count += 1
+                self._cond.notify_all()
+        return True
+
+    def _take(self, count, block, timeout):
+        with self._cond:
+            if len(self._buffer) < count:
+                if not block or not self._cond.wait_for(
+                        lambda: self.closed or len(self._buffer) >= count, timeout):
+                    return None
+                if len(self._buffer) < count:
+                    return None
+            values = [self._buffer.popleft() for _ in range(count)]
+            self.read_count += count
+            self._cond.notify_all()
+            return values
+
+    def close(self):
+        """Wakes up anyone blocked on the channel, the equivalent of board.disconnect()."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    # Superhost side, same calls as nxsdk's Channel
+    def probe(self):
+        with self._cond:
+            if self.direction == TO_CHIP:
+                return len(self._buffer) < self.numElements
+            return len(self._buffer) > 0
+
+    def write(self, numElements, data):
+        values = list(data[:numElements])
+        self._check(values)
+        self._put(values, block=True, timeout=None)
+
+    def read(self, numElements):
+        values = self._take(numElements, block=True, timeout=None)
+        return values if values is not None else []
+
+    # Chip side, used by MockLoihi in place of the embedded snips
+    def chip_probe(self):
+        with self._cond:
+            return len(self._buffer) > 0
+
+    def chip_read(self):
+        values = self._take(1, block=False, timeout=None)
+        return values[0] if values else None
+
+    def chip_write(self, value, block=False, timeout=None):
+        """Returns False (and counts an overflow) if the message could not be buffered."""
+        self._check([value])
+        if not self._put([value], block, timeout):
+            self.overflow_count += 1
+            return False
+        return True
+
+    def __len__(self):
+        with self._cond:
+            return len(self._buffer)
@@ -0,0 +1,70 @@
+"""
+@Brief: Stand-in for nxsdk's InteractiveSpikeGenProcess, so spike injection code can be run and counted without
+        a board.
+
+@Notes:
+    - sendSpikes(spikeInputPortNodeIds, numSpikes) takes the same arguments as on hardware and checks them the
+      same way: one count per port, every port one of this generator's port node ids.
+    - Port node ids count up across the spike generators of a network, as on hardware: the second generator's
+      ports start where the first one's end. MockSpikeGen.chain(...) creates generators numbered that way.
+    - Every call can cost call_cost seconds, a stand-in for the superhost -> chip round trip that makes one
+      sendSpikes per spike expensive. Measure yours by timing sendSpikes on the board.
+    - Counters are exact: calls, spikes in total and per port. listener(ports, counts) is called on every
+      call, e.g. to timestamp injections.
+
+@Author: Reece Wayt
+"""
+import time
+import threading
+import numpy as np
+
+
+class MockSpikeGen:
+    """
+    Attributes:
+        numPorts (int): Input ports, as passed to net.createInteractiveSpikeGenProcess.
+        firstPort (int): Port node id of the first port, the ports are firstPort ... firstPort + numPorts - 1.
+        call_count (int): sendSpikes calls.
+        spike_count (int): Spikes injected over all calls.
+        port_counts (np.ndarray): Spikes injected per port, port_counts[i] for port node id firstPort + i.
+    """
+
+    def __init__(self, numPorts, call_cost=0.0, listener=None, firstPort=0):
+        self.numPorts = numPorts
+        self.firstPort = firstPort
+        self.call_cost = call_cost
+        self.listener = listener
+        self.call_count = 0
+        self.spike_count = 0
+        self.port_counts = np.zeros(numPorts, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def chain(cls, num_ports, call_cost=0.0, listener=None):
+        """
+        One generator per entry of num_ports, port node ids counting up across them as
+        net.createInteractiveSpikeGenProcess gives them out, e.g. chain([1, 1]) has ports 0 and 1.
+        """
+        generators = []
+        first_port = 0
+        for ports in num_ports:
+            generators.append(cls(ports, call_cost, listener, firstPort=first_port))
+            first_port += ports
+        return generators
+
+    def sendSpikes(self, spikeInputPortNodeIds, numSpikes):
+        ports = np.asarray(spikeInputPortNodeIds, dtype=np.int64).reshape(-1)
+        counts = np.asarray(numSpikes, dtype=np.int64).reshape(-1)
+        if ports.size != counts.size:
+            raise ValueError(f"{ports.size} ports but {counts.size} spike counts")
+        last_port = self.firstPort + self.numPorts
+        if ports.size and (ports.min() < self.firstPort or ports.max() >= last_port):
+            raise ValueError(f"spike input ports must be in [{self.firstPort}, {last_port}), got {ports.tolist()}")
+        if self.call_cost:
+            time.sleep(self.call_cost)
+        with self._lock:
+            self.call_count += 1
+            self.spike_count += int(counts.sum())
+            np.add.at(self.port_counts, ports - self.firstPort, counts)
+        if self.listener is not None:
+            self.listener(ports, counts)
@@ -0,0 +1,196 @@
+"""
+@Brief: Python emulation of the Teensy oscillator board on a pseudo-terminal, so serial pipeline code can be
+        run against a real tty without a Teensy or the LattePanda's Leonardo relay.
+
+@Notes:
+    - The oscillator follows teensy/Oscillator.cpp: every 1ms tick it evaluates f = A*sin(omega*t + phase) and
+      emits a spike once the time since the last spike exceeds both maxDT (5ms) and 1/|f|. The neuron is 0
+      when f > 0 and 1 otherwise.
+    - The handshake follows teensy.ino: nothing is sent until a start command arrives and a stop command ends
+      the run. The Leonardo only relays bytes, so talking to the pty is equivalent to talking to /dev/ttyACM0.
+    - Pass a protocol to choose the wire format. RawByteProtocol (the default) is the one byte per spike format
+      still used by dummy-pipeline-2.0. For dummy-pipeline-1.0 pass its spike_protocol module, which provides
+      the same encode_control/encode_spikes/FrameDecoder calls.
+    - The UART is modelled at baud_rate (10 bits per byte) to track how full the Teensy's TX_BUFFER_SIZE
+      transmit buffer is. Spikes that would overflow it are dropped and counted, matching spikeCallback.
+
+@Usage:
+    teensy = TeensyEmulator()
+    teensy.start()
+    serial.Serial(teensy.port, 1000000)  # or point USB_SERIAL_PORT at teensy.port
+    teensy.stop()
+
+@Author: Reece Wayt
+"""
+import os
+import pty
+import tty
+import time
+import errno
+import select
+import threading
+import numpy as np
+from collections import namedtuple
+
+TICK = 1e-3                # [sec] IntervalTimer period in Oscillator.cpp
+MAX_DT = 5e-3              # [sec] minimum spike interval in Oscillator.cpp
+TX_BUFFER_SIZE = 104       # bytes, 100 byte addMemoryForWrite buffer + 4 byte FIFO
+READ_CHUNK = 4096
+
+RawFrame = namedtuple("RawFrame", ["type", "timestep", "neuron_ids"])
+
+
+class RawByteProtocol:
+    """One byte per spike, any first byte starts the oscillator and 0xFF stops it (teensy.ino before framing)."""
+    FRAME_START = "start"
+    FRAME_STOP = "stop"
+    FRAME_SPIKES = "spikes"
+
+    @staticmethod
+    def encode_spikes(timestep, neuron_ids):
+        return bytes(neuron_id & 0x01 for neuron_id in neuron_ids)
+
+    class FrameDecoder:
+        def __init__(self):
+            self.started = False
+            self.frame_count = 0
+            self.error_count = 0
+
+        def feed(self, data):
+            frames = []
+            for byte in data:
+                if not self.started:
+                    self.started = True
+                    frames.append(RawFrame(RawByteProtocol.FRAME_START, 0, ()))
+                elif byte == 0xFF:
+                    frames.append(RawFrame(RawByteProtocol.FRAME_STOP, 0, ()))
+                else:
+                    frames.append(RawFrame(RawByteProtocol.FRAME_SPIKES, 0, (byte,)))
+                self.frame_count += 1
+            return frames
+
+
+class TeensyEmulator:
+    """
+    Attributes:
+        port (str): Path of the pty slave to open with pyserial (e.g. /dev/pts/5).
+        spikes_sent (int): Spikes written to the host.
+        spikes_dropped (int): Spikes dropped because the emulated transmit buffer was full.
+        spikes_received (np.ndarray): Spikes received back from the host, per neuron ID.
+        sent_log, received_log (list): (perf_counter_ns, neuron_id) for every spike sent / received.
+        received_frames (list): (timestep, neuron_ids) for every spike frame received.
+    """
+
+    def __init__(self, amplitude=200.0, frequency=1.0, phase_shift=0.0, duration=-1,
+                 protocol=RawByteProtocol, baud_rate=1000000, max_neurons=256):
+        self.amplitude = amplitude
+        self.omega = 2 * np.pi * frequency
+        self.phase_shift = phase_shift
+        self.duration = duration
+        self.protocol = protocol
+        self.byte_time = 10.0 / baud_rate  # start + 8 data + stop bits
+
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._slave_fd)
+        os.set_blocking(self._master_fd, False)
+        self.port = os.ttyname(self._slave_fd)
+
+        self.spikes_sent = 0
+        self.spikes_dropped = 0
+        self.spikes_received = np.zeros(max_neurons, dtype=np.int64)
+        self.sent_log = []
+        self.received_log = []
+        self.received_frames = []
+        self.started = threading.Event()
+        self.stopped = threading.Event()
+        self._shutdown = threading.Event()
+        self._decoder = protocol.FrameDecoder()
+        self._thread = None
+
+    def start(self):
+        """Starts the emulated board. It idles until the host sends the start command."""
+        self._thread = threading.Thread(target=self._run, name="teensy_emulator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stops the board thread and closes the pty."""
+        self._shutdown.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        for fd in (self._master_fd, self._slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _read_host(self, timeout):
+        readable, _, _ = select.select([self._master_fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self._master_fd, READ_CHUNK)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EIO):
+                return
+            raise
+        now = time.perf_counter_ns()
+        for frame in self._decoder.feed(data):
+            if frame.type == self.protocol.FRAME_START:
+                self.started.set()
+            elif frame.type == self.protocol.FRAME_STOP:
+                self.stopped.set()
+            else:
+                self.received_frames.append((frame.timestep, tuple(frame.neuron_ids)))
+            for neuron_id in frame.neuron_ids:
+                if 0 <= neuron_id < self.spikes_received.size:
+                    self.spikes_received[neuron_id] += 1
+                self.received_log.append((now, neuron_id))
+
+    def _run(self):
+        while not self.started.is_set() and not self._shutdown.is_set():
+            self._read_host(0.01)
+        if self._shutdown.is_set():
+            return
+
+        start = time.perf_counter()
+        t_last_spike = 0.0
+        tx_free_at = start  # when the emulated UART finishes sending what is already queued
+        tick = 0
+        while not self._shutdown.is_set() and not self.stopped.is_set():
+            tick += 1
+            deadline = start + tick * TICK
+            # Service the host link until the next timer tick, like loop() between interrupts
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._read_host(remaining)
+                if self.stopped.is_set():
+                    return
+
+            current_time = tick * TICK
+            if self.duration > 0 and current_time > self.duration:
+                continue
+            f_now = self.amplitude * np.sin(self.omega * current_time + self.phase_shift)
+            current_dt = current_time - t_last_spike
+            if current_dt > MAX_DT and f_now != 0 and current_dt > abs(1 / f_now):
+                t_last_spike = current_time
+                neuron_id = 0 if f_now > 0 else 1
+                tx_free_at = self._send_spike(tick, neuron_id, tx_free_at)
+
+    def _send_spike(self, tick, neuron_id, tx_free_at):
+        data = self.protocol.encode_spikes(tick, [neuron_id])
+        now = time.perf_counter()
+        backlog = max(tx_free_at - now, 0.0) / self.byte_time
+        if backlog + len(data) > TX_BUFFER_SIZE:
+            self.spikes_dropped += 1
+            return tx_free_at
+        try:
+            os.write(self._master_fd, data)
+        except BlockingIOError:
+            # Host is not reading and the pty buffer is full
+            self.spikes_dropped += 1
+            return tx_free_at
+        self.spikes_sent += 1
+        self.sent_log.append((time.perf_counter_ns(), neuron_id))
+        return max(tx_free_at, now) + len(data) * self.byte_time
@@ -0,0 +1,159 @@
+"""
+@Brief: Timestep clock and a minimal Loihi stand-in that runs the pipeline's embedded snip logic against
+        mock channels.
+
+@Notes:
+    - TimestepClock calls its listeners once per timestep, either paced to a wall-clock period (to mimic a
+      throttled board) or free-running (timestep=None, which is how fast Loihi runs without probes).
+    - MockLoihi does per timestep what snips/encoder.c and snips/decoder.c do:
+        encoder: if the encoder channel has data, read ONE message and inject a spike on every input port it
+                 carries (one, or up to ports_per_message packed by utils/topology.pack_ports)
+        decoder: write the ID of every output neuron that spiked to the decoder channel, or with num_outputs
+                 set, one time step + spike bitmask message per timestep like the bitmask decoder snips
+                 (see utils/spike_bitmask.py)
+      The network itself is a mapping from input axon to output neurons plus a fixed delay in timesteps.
+      By default axon i drives neuron i, which is how the dummy pipelines are wired.
+    - MockBoard adds run(numSteps, aSync)/finishRun()/disconnect(), so driver code written against N2Board
+      can be pointed at the harness.
+
+@Author: Reece Wayt
+"""
+import time
+import threading
+import collections
+from .. import spike_bitmask
+from ..topology import unpack_ports
+
+
+class TimestepClock:
+    """
+    Attributes:
+        timestep (float or None): Wall-clock seconds per timestep, None to run as fast as possible.
+        time_step (int): Last completed timestep, starts at 0 like runState->time_step.
+    """
+
+    def __init__(self, timestep=1e-3):
+        self.timestep = timestep
+        self.time_step = 0
+        self.late_steps = 0  # steps that started after their deadline, i.e. listeners were too slow
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """callback(time_step) is called once per timestep, in registration order."""
+        self._listeners.append(callback)
+
+    def run(self, num_steps):
+        """Runs num_steps timesteps on the calling thread."""
+        start = time.perf_counter()
+        first_step = self.time_step + 1
+        for time_step in range(first_step, first_step + num_steps):
+            if self._stop_event.is_set():
+                break
+            if self.timestep is not None:
+                deadline = start + (time_step - first_step) * self.timestep
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -self.timestep:
+                    self.late_steps += 1
+            for callback in self._listeners:
+                callback(time_step)
+            self.time_step = time_step
+
+    def run_async(self, num_steps):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, args=(num_steps,), name="timestep_clock")
+        self._thread.start()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stop(self):
+        self._stop_event.set()
+        self.wait()
+
+
+class MockLoihi:
+    """
+    Attributes:
+        spikes_injected (int): Input spikes the encoder "snip" injected.
+        spikes_output (int): Output spikes the decoder "snip" produced (including ones the channel dropped).
+    """
+
+    def __init__(self, encoder_channel, decoder_channel, network=None, delay_steps=1, num_outputs=None,
+                 ports_per_message=1):
+        """
+        Parameters:
+            encoder_channel (MockChannel): TO_CHIP channel the encoder snip reads.
+            decoder_channel (MockChannel): FROM_CHIP channel the decoder snip writes.
+            network (callable, optional): Maps an input axon ID to an iterable of output neuron IDs.
+                Defaults to the identity wiring used by the dummy pipelines.
+            delay_steps (int): Timesteps between an input spike and the output spikes it causes.
+            num_outputs (int, optional): Output neurons of the network. When set, the decoder writes spike
+                bitmask messages, otherwise one neuron ID per message.
+            ports_per_message (int): Input port numbers per encoder message, encoder_msg_size / 4.
+        """
+        self.encoder_channel = encoder_channel
+        self.decoder_channel = decoder_channel
+        self.network = network or (lambda axon: (axon,))
+        self.delay_steps = delay_steps
+        self.num_outputs = num_outputs
+        self.ports_per_message = ports_per_message
+        self._pending = collections.defaultdict(list)  # timestep -> neuron IDs due to spike
+        self.spikes_injected = 0
+        self.spikes_output = 0
+
+    def run_encoding(self, time_step):
+        if self.encoder_channel.chip_probe():
+            message = self.encoder_channel.chip_read()
+            if message is not None:
+                for axon in unpack_ports(message, self.ports_per_message):
+                    self._pending[time_step + self.delay_steps].extend(self.network(axon))
+                    self.spikes_injected += 1
+
+    def run_decoding(self, time_step):
+        neuron_ids = self._pending.pop(time_step, ())
+        if self.num_outputs is not None:
+            if neuron_ids:
+                message = spike_bitmask.pack(time_step, sorted(set(neuron_ids)), self.num_outputs)
+                self.decoder_channel.chip_write(spike_bitmask.to_int(message))
+            self.spikes_output += len(set(neuron_ids))
+            return
+        for neuron_id in neuron_ids:
+            self.decoder_channel.chip_write(neuron_id)
+            self.spikes_output += 1
+
+    def step(self, time_step):
+        # Spiking phase runs before management, same as the encoder/decoder snip phases
+        self.run_encoding(time_step)
+        self.run_decoding(time_step)
+
+
+class MockBoard:
+    """The subset of N2Board the pipelines call, backed by a TimestepClock driving a MockLoihi."""
+
+    def __init__(self, loihi, timestep=1e-3):
+        self.loihi = loihi
+        self.clock = TimestepClock(timestep)
+        self.clock.add_listener(loihi.step)
+
+    def start(self):
+        pass
+
+    def run(self, numSteps, aSync=False):
+        if aSync:
+            self.clock.run_async(numSteps)
+        else:
+            self.clock.run(numSteps)
+
+    def finishRun(self):
+        self.clock.wait()
+
+    def disconnect(self):
+        self.clock.stop()
+        self.loihi.encoder_channel.close()
+        self.loihi.decoder_channel.close()
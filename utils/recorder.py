@@ -0,0 +1,151 @@
+"""
+@Brief: Preallocated NumPy recorder for per-sample data from real-time loops, keeping either every sample or
+        only the last N, with one-call binary saves and an optional CSV export.
+
+@Notes:
+    - Rows live in a single (capacity, num_columns) array, an append is one row assignment with no allocation,
+      cheap enough to leave on in the oscillator loop. Keep-all recorders double their capacity when full,
+      last-N recorders wrap around and count what they overwrote in `dropped`. Give a last-N recorder a
+      spill_path and the overwritten rows are appended to that file (raw, row-major) instead of lost, so memory
+      stays bounded on long runs and history() can still return everything.
+    - One writer thread at a time. Read (array/column/save) once the writer has stopped, a read during
+      recording sees a consistent prefix but may miss the row being written.
+    - save() writes .npy (the 2D array, column order as `columns`) or .npz (one array per column) in one call.
+      to_csv() is there for spreadsheets, it goes through np.savetxt and is the slow path.
+
+@Usage:
+    rec = Recorder(("time_ms", "frequency_hz", "spike_sent"), keep_last=100000)
+    rec.append(t * 1000, f_now, 1)
+    rec.save("run.npz")
+
+@Author: Reece Wayt
+"""
+import numpy as np
+
+DEFAULT_CAPACITY = 4096
+
+
+class Recorder:
+    """
+    Attributes:
+        columns (tuple): Column names, in row order.
+        keep_last (int or None): Rows retained, None keeps every row.
+        dropped (int): Rows overwritten by a keep_last recorder.
+    """
+
+    def __init__(self, columns, keep_last=None, capacity=DEFAULT_CAPACITY, dtype=np.float64, spill_path=None):
+        """
+        Parameters:
+            columns (sequence of str): Column names.
+            keep_last (int, optional): Keep only the most recent keep_last rows. None keeps all of them.
+            capacity (int): Initial rows allocated when keeping all rows (the buffer doubles when full).
+            dtype (numpy dtype): Storage type of every column.
+            spill_path (str, optional): File the rows a keep_last recorder overwrites are appended to, truncated
+                when the recorder is created.
+        """
+        if keep_last is not None and keep_last <= 0:
+            raise ValueError(f"keep_last must be positive or None, got {keep_last}")
+        if spill_path is not None and keep_last is None:
+            raise ValueError("spill_path needs keep_last, a keep-all recorder never overwrites rows")
+        self.columns = tuple(columns)
+        self.keep_last = keep_last
+        self.dropped = 0
+        rows = keep_last if keep_last is not None else max(int(capacity), 1)
+        self._data = np.zeros((rows, len(self.columns)), dtype=dtype)
+        self._count = 0  # rows ever appended
+        self.spill_path = spill_path
+        self._spill = open(spill_path, "wb") if spill_path is not None else None
+
+    def __len__(self):
+        return min(self._count, self._data.shape[0])
+
+    def _grow(self, needed):
+        rows = self._data.shape[0]
+        while rows < needed:
+            rows *= 2
+        grown = np.zeros((rows, self._data.shape[1]), dtype=self._data.dtype)
+        grown[:self._count] = self._data[:self._count]
+        self._data = grown
+
+    def append(self, *row):
+        """Records one row, one value per column."""
+        if self.keep_last is None:
+            if self._count == self._data.shape[0]:
+                self._grow(self._count + 1)
+            self._data[self._count] = row
+        else:
+            if self._count >= self.keep_last:
+                self.dropped += 1
+                if self._spill is not None:
+                    self._data[self._count % self.keep_last].tofile(self._spill)
+            self._data[self._count % self.keep_last] = row
+        self._count += 1
+
+    def extend(self, rows):
+        """Records a (n, num_columns) block of rows."""
+        rows = np.asarray(rows, dtype=self._data.dtype).reshape(-1, len(self.columns))
+        n = rows.shape[0]
+        if self.keep_last is None:
+            if self._count + n > self._data.shape[0]:
+                self._grow(self._count + n)
+            self._data[self._count:self._count + n] = rows
+        else:
+            overwritten = max(self._count + n - self.keep_last, 0) - max(self._count - self.keep_last, 0)
+            if self._spill is not None and overwritten:
+                # Oldest retained rows first, then any of the new rows that do not fit at all
+                oldest = (self._count - len(self) + np.arange(min(overwritten, len(self)))) % self.keep_last
+                self._data[oldest].tofile(self._spill)
+                rows[:max(n - self.keep_last, 0)].tofile(self._spill)
+            self.dropped += overwritten
+            rows = rows[-self.keep_last:]
+            index = (self._count + n - rows.shape[0] + np.arange(rows.shape[0])) % self.keep_last
+            self._data[index] = rows
+        self._count += n
+
+    def clear(self):
+        self._count = 0
+        self.dropped = 0
+        if self._spill is not None:
+            self._spill.seek(0)
+            self._spill.truncate()
+
+    def close(self):
+        """Closes the spill file, history() still reads it."""
+        if self._spill is not None:
+            self._spill.close()
+
+    def array(self):
+        """Retained rows, oldest first, as a (len, num_columns) copy."""
+        if self.keep_last is None or self._count <= self.keep_last:
+            return self._data[:len(self)].copy()
+        start = self._count % self.keep_last
+        return np.concatenate([self._data[start:], self._data[:start]])
+
+    def column(self, name):
+        return self.array()[:, self.columns.index(name)]
+
+    def history(self):
+        """Every row ever recorded, oldest first: the spill file followed by the retained rows."""
+        if self._spill is None:
+            return self.array()
+        if not self._spill.closed:
+            self._spill.flush()
+        spilled = np.fromfile(self.spill_path, dtype=self._data.dtype).reshape(-1, len(self.columns))
+        return np.concatenate([spilled, self.array()])
+
+    def save(self, path):
+        """
+        Writes the retained rows in one call: a .npy path gets the 2D array, any other path an .npz archive with
+        one array per column (np.savez appends .npz if missing). Returns the array written.
+        """
+        data = self.array()
+        if str(path).endswith(".npy"):
+            np.save(path, data)
+        else:
+            np.savez(path, **{name: data[:, i] for i, name in enumerate(self.columns)})
+        return data
+
+    def to_csv(self, path, header=None, fmt="%.18g"):
+        """Optional CSV export of the retained rows, `header` defaults to the column names."""
+        header = ",".join(header if header is not None else self.columns)
+        np.savetxt(path, self.array(), delimiter=",", header=header, comments="", fmt=fmt)
@@ -0,0 +1,112 @@
+"""
+@Brief: Struct-of-arrays view of an nxsdk network's resource map, so logical-to-physical lookups for a whole layer
+        are array operations instead of one resourceMap call and one dict per neuron.
+
+@Notes:
+    - nxsdk only answers resourceMap queries one node at a time (compartment, inputAxon, synapse). The tables ask
+      for each node once per compiled network and keep the answers in sorted NumPy arrays. Every later lookup,
+      for any set of nodes, is a searchsorted plus fancy indexing.
+    - resource_tables(net, board) caches the tables on the network object, keyed on the board the net was
+      compiled to (what N2Compiler.compile returned). A recompile returns a new board and rebuilds the tables,
+      so a stale layout is never served. net.resourceMap itself is no key, nxsdk may hand out a new object on
+      every read, so the tables read it afresh for each node they fetch. Without a board, the tables of the
+      first compile are kept.
+    - node_ids() turns a compartment group, a list of compartments or an ID array into the int64 array the
+      lookups take.
+    - Lookups return dicts of equal-length arrays (one entry per requested node, in request order), e.g.
+      tables.compartments(ids)["coreId"]. The columns are int64 and ready for np.savez or axon_map.py.
+
+@Usage:
+    tables = resource_tables(net, board)
+    cx = tables.compartments([n.nodeId for n in neurons])
+    inputs = tables.input_axons(inputSynapseIds)
+
+@Author: Reece Wayt
+"""
+import numpy as np
+
+COMPARTMENT_FIELDS = ("boardId", "chipId", "coreId", "compartmentId", "cxProfileCfgId", "vthProfileCfgId")
+AXON_FIELDS = ("boardId", "chipId", "coreId", "axonId")
+
+
+class _Table:
+    """Node ID -> fixed number of integer fields, filled on demand by `fetch(node_id)`."""
+
+    def __init__(self, fields, fetch):
+        self.fields = fields
+        self.fetch = fetch
+        self.node_ids = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, len(fields)), dtype=np.int64)
+
+    def _find(self, ids):
+        pos = np.searchsorted(self.node_ids, ids)
+        pos[pos == self.node_ids.size] = 0
+        found = self.node_ids[pos] == ids if self.node_ids.size else np.zeros(ids.shape, dtype=bool)
+        return pos, found
+
+    def lookup(self, node_ids):
+        ids = np.asarray(node_ids, dtype=np.int64).ravel()
+        pos, found = self._find(ids)
+        if not found.all():
+            missing = np.unique(ids[~found])
+            fetched = np.array([self.fetch(int(node_id)) for node_id in missing], dtype=np.int64)
+            fetched = fetched.reshape(missing.size, len(self.fields))
+            node_ids = np.concatenate([self.node_ids, missing])
+            order = np.argsort(node_ids, kind="stable")
+            self.node_ids = node_ids[order]
+            self.values = np.concatenate([self.values, fetched])[order]
+            pos, _ = self._find(ids)
+        rows = self.values[pos]
+        table = {"nodeId": ids}
+        for column, field in enumerate(self.fields):
+            table[field] = rows[:, column]
+        return table
+
+    def __len__(self):
+        return self.node_ids.size
+
+
+class ResourceTables:
+    """Cached, struct-of-arrays lookups into one compiled network's resourceMap."""
+
+    def __init__(self, net, board=None):
+        self.net = net
+        self.board = board
+        self._compartments = _Table(COMPARTMENT_FIELDS, lambda node_id: net.resourceMap.compartment(node_id))
+        # inputAxon returns one (board, chip, core, axon) entry per destination, the first one is the port's axon
+        self._input_axons = _Table(AXON_FIELDS, lambda node_id: net.resourceMap.inputAxon(node_id)[0])
+        self._output_axons = _Table(AXON_FIELDS, lambda node_id: net.resourceMap.synapse(node_id))
+
+    def compartments(self, node_ids):
+        """Board, chip, core, compartment and profile IDs of compartments, by nodeId."""
+        return self._compartments.lookup(node_ids)
+
+    def input_axons(self, port_ids):
+        """Board, chip, core and axon IDs of spike input ports, by nodeId."""
+        return self._input_axons.lookup(port_ids)
+
+    def output_axons(self, port_ids):
+        """Board, chip, core and axon IDs of spike output ports (the synapse they map to), by nodeId."""
+        return self._output_axons.lookup(port_ids)
+
+
+def node_ids(nodes):
+    """nodeIds of a compartment/port group, a list of nodes or an array of IDs, as an int64 array."""
+    if hasattr(nodes, "nodeIds"):
+        return np.asarray(nodes.nodeIds, dtype=np.int64)
+    nodes = list(nodes)
+    if nodes and hasattr(nodes[0], "nodeId"):
+        return np.fromiter((node.nodeId for node in nodes), dtype=np.int64, count=len(nodes))
+    return np.asarray(nodes, dtype=np.int64)
+
+
+def resource_tables(net, board=None):
+    """
+    Returns the ResourceTables for `net`'s compilation onto `board`, building them on first use. Pass the board
+    so a recompile is noticed.
+    """
+    tables = getattr(net, "_resource_tables", None)
+    if tables is None or (board is not None and tables.board is not board):
+        tables = ResourceTables(net, board)
+        net._resource_tables = tables
+    return tables
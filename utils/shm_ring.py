@@ -0,0 +1,133 @@
+"""
+@Brief: Single-producer/single-consumer ring buffer in shared memory, used to move fixed-size
+        messages between processes without pickling or a Manager server process.
+
+@Notes:
+    - Storage is a multiprocessing.RawArray rather than multiprocessing.shared_memory because the
+      loihi conda environment is Python 3.7, which predates shared_memory. The memory is still a
+      single anonymous shared mapping that both processes address directly.
+    - Exactly one process may put() and exactly one process may get(). The head index is only written
+      by the producer and the tail index only by the consumer, so the slots themselves need no lock.
+      This relies on aligned 64-bit stores being atomic, which holds on the LattePanda (x86-64).
+    - A counting semaphore mirrors the number of filled slots so that get() can block in the kernel
+      instead of spinning against the GIL.
+    - put/get/empty follow queue.Queue (including queue.Full/queue.Empty) so a ring can be dropped in
+      wherever the pipelines use a queue today. get_batch() drains a burst behind a single wakeup.
+
+@Author: Reece Wayt
+"""
+import ctypes
+import multiprocessing
+import queue
+import time
+
+PUT_RETRY_INTERVAL = 0.0001  # [sec] back-off while a blocking put waits for the consumer
+
+
+class SharedRingBuffer:
+    """
+    Attributes:
+        capacity (int): Number of message slots in the ring.
+        slot_size (int): Maximum message length in bytes (at most 255).
+    """
+
+    def __init__(self, capacity=1024, slot_size=4, ctx=None):
+        """
+        Allocates the shared ring. Must be created before the worker process is started so that the
+        child inherits the mapping.
+
+        Parameters:
+            capacity (int): Number of message slots.
+            slot_size (int): Maximum message length in bytes.
+            ctx (multiprocessing.context.BaseContext, optional): Context to allocate from, defaults to
+                the global multiprocessing module.
+        """
+        if not 0 < slot_size <= 0xFF:
+            raise ValueError(f"slot_size must be in [1, 255], got {slot_size}")
+        ctx = ctx or multiprocessing
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self._stride = slot_size + 1  # first byte of every slot holds the payload length
+        self._data = ctx.RawArray(ctypes.c_uint8, capacity * self._stride)
+        self._head = ctx.RawValue(ctypes.c_uint64, 0)  # total puts, producer owned
+        self._tail = ctx.RawValue(ctypes.c_uint64, 0)  # total gets, consumer owned
+        self._filled = ctx.Semaphore(0)
+
+    def _slot_address(self, index):
+        return ctypes.addressof(self._data) + (index % self.capacity) * self._stride
+
+    def qsize(self):
+        return self._head.value - self._tail.value
+
+    def empty(self):
+        return self._head.value == self._tail.value
+
+    def full(self):
+        return self.qsize() >= self.capacity
+
+    def put(self, data, block=True, timeout=None):
+        """
+        Copies `data` into the next free slot.
+
+        Raises:
+            ValueError: If `data` is longer than slot_size.
+            queue.Full: If the ring stays full for longer than `timeout` (or immediately if not blocking).
+        """
+        length = len(data)
+        if length > self.slot_size:
+            raise ValueError(f"message of {length} bytes exceeds slot size of {self.slot_size}")
+
+        head = self._head.value
+        if head - self._tail.value >= self.capacity:
+            if not block:
+                raise queue.Full
+            deadline = None if timeout is None else time.perf_counter() + timeout
+            while head - self._tail.value >= self.capacity:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    raise queue.Full
+                time.sleep(PUT_RETRY_INTERVAL)
+
+        address = self._slot_address(head)
+        ctypes.memset(address, length, 1)
+        ctypes.memmove(address + 1, data, length)
+        self._head.value = head + 1  # publish only after the payload is written
+        self._filled.release()
+
+    def put_nowait(self, data):
+        return self.put(data, block=False)
+
+    def get(self, block=True, timeout=None):
+        """
+        Removes and returns the oldest message as bytes.
+
+        Raises:
+            queue.Empty: If nothing arrives within `timeout` (or immediately if not blocking).
+        """
+        if not self._filled.acquire(block, timeout):
+            raise queue.Empty
+        return self._read_slot()
+
+    def _read_slot(self):
+        # Caller holds one count of _filled
+        tail = self._tail.value
+        address = self._slot_address(tail)
+        length = ctypes.c_uint8.from_address(address).value
+        data = ctypes.string_at(address + 1, length)
+        self._tail.value = tail + 1  # hand the slot back only after it has been copied out
+        return data
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def get_batch(self, max_items=None, block=True, timeout=None):
+        """
+        Waits for one message as get() does, then drains every message already in the ring (at most max_items)
+        without blocking again. One wakeup then covers a whole burst.
+
+        Raises:
+            queue.Empty: If nothing arrives within `timeout` (or immediately if not blocking).
+        """
+        batch = [self.get(block, timeout)]
+        while (max_items is None or len(batch) < max_items) and self._filled.acquire(False):
+            batch.append(self._read_slot())
+        return batch
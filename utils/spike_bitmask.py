@@ -0,0 +1,72 @@
+"""
+@Brief: Pack/unpack the per-timestep spike bitmask the decoder snips write to the nxDecoder channel.
+
+@Notes:
+    - One channel message per timestep with output spikes, instead of one message per spiking neuron.
+      The message is 1 + bitmask_words(num_outputs) uint32 words:
+        word 0      time step the spikes happened in
+        word 1 + k  bit b set <=> output neuron 32*k + b spiked (LSB first)
+      The channel's messageSize is 4 * message_words(num_outputs), see snips/decoder.h.
+    - On the Python side a message is either a sequence of uint32 words or a single int holding the
+      message little-endian (what a wide channel message reads back as). message_words_array() accepts both.
+    - unpack() is vectorized over any number of messages with np.unpackbits, so draining a backed-up channel
+      costs one NumPy call instead of a Python loop per bit.
+
+@Author: Reece Wayt
+"""
+import numpy as np
+
+WORD_BITS = 32
+
+
+def bitmask_words(num_outputs):
+    return (num_outputs + WORD_BITS - 1) // WORD_BITS
+
+
+def message_words(num_outputs):
+    """uint32 words in one message, time step included."""
+    return 1 + bitmask_words(num_outputs)
+
+
+def pack(time_step, neuron_ids, num_outputs):
+    """Returns the message for `neuron_ids` spiking at `time_step` as a uint32 array."""
+    ids = np.asarray(neuron_ids, dtype=np.int64)
+    if ids.size and (ids.min() < 0 or ids.max() >= num_outputs):
+        raise ValueError(f"neuron IDs must be in [0, {num_outputs})")
+    bits = np.zeros(bitmask_words(num_outputs) * WORD_BITS, dtype=np.uint8)
+    bits[ids] = 1
+    words = np.packbits(bits, bitorder="little").view("<u4")
+    return np.concatenate([np.array([time_step], dtype="<u4"), words])
+
+
+def to_int(message):
+    """A uint32 word array as one little-endian int, the way a wide channel message is written."""
+    return int.from_bytes(np.asarray(message, dtype="<u4").tobytes(), byteorder="little")
+
+
+def message_words_array(messages, num_outputs):
+    """
+    Normalizes messages (ints, or sequences of words) to a (num_messages, message_words) uint32 array.
+    """
+    width = message_words(num_outputs)
+    messages = list(messages)
+    if not messages:
+        return np.empty((0, width), dtype="<u4")
+    if isinstance(messages[0], (int, np.integer)):
+        raw = b"".join(int(m).to_bytes(4 * width, byteorder="little") for m in messages)
+        return np.frombuffer(raw, dtype="<u4").reshape(-1, width)
+    return np.asarray(messages, dtype="<u4").reshape(-1, width)
+
+
+def unpack(messages, num_outputs):
+    """
+    Expands messages into one entry per spike.
+
+    Returns:
+        (time_steps, neuron_ids): int64 arrays of equal length, in message order and ascending neuron ID
+        within a message.
+    """
+    words = message_words_array(messages, num_outputs)
+    bits = np.unpackbits(np.ascontiguousarray(words[:, 1:]).view(np.uint8), axis=1, bitorder="little")
+    rows, neuron_ids = np.nonzero(bits[:, :num_outputs])
+    return words[rows, 0].astype(np.int64), neuron_ids.astype(np.int64)
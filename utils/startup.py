@@ -0,0 +1,148 @@
+"""
+@Brief: Small dependency-graph executor for pipeline startup, so independent steps (Arduino firmware, host-snip
+        build, network build) overlap instead of running back to back.
+
+@Notes:
+    - Each step is a callable plus the names of the steps it needs. A step is handed the results of its
+      dependencies as positional arguments, in the order they were listed, and its return value becomes
+      available to later steps and in StartupPlan.results.
+    - Steps run on a thread pool. The slow ones (arduino-cli, cmake/make) are subprocesses and N2Compiler
+      spends little time holding the GIL, so threads are enough to overlap them.
+    - If a step fails, nothing new is started, the steps already running are waited for, and StartupError is
+      raised naming the failed step. SystemExit from helpers that call exit() is caught the same way.
+    - timeline() renders when each step started and finished relative to run(), so the critical path is easy
+      to spot. save() appends the same numbers as one JSON line, so cold-start time can be tracked across runs.
+
+@Usage:
+    plan = StartupPlan()
+    plan.add("firmware", arduino_manager.run)
+    plan.add("net", build_network)
+    plan.add("board", compile_network, deps=["net"])
+    results = plan.run()
+    print(plan.timeline())
+    results["board"].start()
+
+@Author: Reece Wayt
+"""
+import json
+import time
+import concurrent.futures
+
+TIMELINE_WIDTH = 40  # characters in the timeline bar
+
+
+class StartupError(RuntimeError):
+    """Raised by StartupPlan.run() when a step fails. The step's exception is chained as __cause__."""
+
+    def __init__(self, step, error):
+        super().__init__(f"startup step '{step}' failed: {error!r}")
+        self.step = step
+
+
+class StartupStep:
+    def __init__(self, name, func, deps):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.start = None  # [sec] relative to StartupPlan.run()
+        self.end = None
+        self.skipped = False
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+
+class StartupPlan:
+    """
+    Attributes:
+        results (dict): Step name -> return value, filled in as steps finish.
+        wall_time (float): Seconds run() took.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.steps = {}
+        self.results = {}
+        self.wall_time = None
+
+    def add(self, name, func, deps=()):
+        """Registers a step. Dependencies must already have been added, which also rules out cycles."""
+        if name in self.steps:
+            raise ValueError(f"duplicate startup step: {name}")
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"startup step '{name}' depends on unknown step '{dep}'")
+        self.steps[name] = StartupStep(name, func, deps)
+        return self
+
+    def _call(self, step, t0):
+        step.start = time.perf_counter() - t0
+        try:
+            return step.func(*(self.results[dep] for dep in step.deps))
+        finally:
+            step.end = time.perf_counter() - t0
+
+    def run(self):
+        """Runs every step as soon as its dependencies are done. Returns the results dict."""
+        t0 = time.perf_counter()
+        pending = dict(self.steps)
+        running = {}
+        failure = None
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="startup") as executor:
+            while pending or running:
+                if failure is None:
+                    for name, step in list(pending.items()):
+                        if all(dep in self.results for dep in step.deps):
+                            del pending[name]
+                            running[executor.submit(self._call, step, t0)] = step
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BaseException as e:
+                        if failure is None:
+                            failure = (step.name, e)
+                        continue
+                    self.results[step.name] = result
+        for step in pending.values():
+            step.skipped = True
+        self.wall_time = time.perf_counter() - t0
+
+        if failure is not None:
+            name, error = failure
+            raise StartupError(name, error) from error
+        return self.results
+
+    def timeline(self):
+        """Returns a printable timeline of the last run()."""
+        total = self.wall_time or max((s.end or 0.0 for s in self.steps.values()), default=0.0)
+        scale = TIMELINE_WIDTH / total if total > 0 else 0.0
+        width = max((len(name) for name in self.steps), default=0)
+        lines = [f"Startup timeline [s], total {total:.2f}:"]
+        for step in sorted(self.steps.values(), key=lambda s: (s.start is None, s.start or 0.0)):
+            if step.duration is None:
+                lines.append(f"  {step.name:<{width}}  {'skipped' if step.skipped else 'not run':>24}")
+                continue
+            lead = min(int(round(step.start * scale)), TIMELINE_WIDTH - 1)
+            bar = "#" * min(max(1, int(round(step.duration * scale))), TIMELINE_WIDTH - lead)
+            lines.append(f"  {step.name:<{width}}  {step.start:7.2f} -> {step.end:7.2f} ({step.duration:6.2f})"
+                         f"  |{' ' * lead}{bar:<{TIMELINE_WIDTH - lead}}|")
+        serial_time = sum(s.duration for s in self.steps.values() if s.duration is not None)
+        if total > 0:
+            lines.append(f"  sequential would take {serial_time:.2f}, {serial_time / total:.1f}x overlap")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """Appends {"time", "total", "steps": {name: [start, end]}} for the last run() as one JSON line."""
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "total": self.wall_time,
+                  "steps": {s.name: [s.start, s.end] for s in self.steps.values() if s.duration is not None}}
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
@@ -0,0 +1,190 @@
+"""
+@Brief: One topology spec per pipeline (topology.json) from which the Python constants, the embedded snip headers and
+        the host snip config header are generated, so the layers can't drift apart.
+
+@Notes:
+    - Before this, NUM_NEURONS (main.py), OUTPUT_DIM/NEURON_COUNT (decoder.c), the 0x20 spike counter offset, the
+      4+core core ID (encoder.c), CHANNEL_BUFFER_SIZE and the message sizes were kept in sync by hand.
+    - Three headers are generated, each only rewritten when its content changes (the host snip build cache hashes
+      them, see dummy-pipeline-2.0/host_snip_cache.py):
+        snips/topology.h         dimensions, channel sizes and counter/core offsets. Written before anything is
+                                 built, and shared by the embedded snips and the host snip.
+        snips/topology_ports.h   physical axon, chip and core of every input port, written after N2Compiler has
+                                 placed the network. The encoder snip indexes it with the port number it reads
+                                 from nxEncoder, so sharding inputs over cores or chips needs no C changes.
+        include/host_snip_config.h  serial port, baud rate, channel and file names and the schedule (every k
+                                    timesteps, data-driven or adaptive) for the host snip.
+    - The generated defaults for the checked-in topology are committed, so the snips still build on their own.
+    - An nxEncoder message carries encoder_msg_size / 4 input port numbers (pack_ports/unpack_ports), so the
+      encoder snip, which reads one message per timestep, can inject several spikes per timestep. Unused
+      words are EMPTY_PORT. benchmark_channels.py in dummy-pipeline-1.0 picks the size.
+
+@Usage:
+    topology = Topology.load("topology.json")
+    topology.write_snip_header("snips/")
+    ...compile...
+    topology.write_port_header("snips/", input_axons, input_chips, input_cores)
+
+@Author: Reece Wayt
+"""
+import os
+import json
+from .spike_bitmask import bitmask_words, message_words
+
+EMPTY_PORT = 0xFFFFFFFF  # pads an nxEncoder message that is not full, -1 to the encoder snip
+
+GENERATED_BANNER = "// GENERATED by utils/topology.py from {source}, edit the spec instead of this file\n"
+
+DEFAULTS = {
+    "num_inputs": 2,                 # input ports (encoder side), the port number is what the Teensy sends
+    "num_outputs": 2,                # output ports (decoder side)
+    "channel_buffer_size": 32,       # messages each channel buffers
+    "encoder_msg_size": 4,           # bytes per nxEncoder message, 4 per input port number it carries
+    "encoder_batch_size": 1,         # nxEncoder messages per channel write, superhost side only
+    "spike_counter_offset": 0x20,    # SPIKE_COUNT index of the first output port
+    "core_id_offset": 4,             # logical core n is CoreId{.id = core_id_offset + n}
+    "encoder_channel": "nxEncoder",
+    "decoder_channel": "nxDecoder",
+    "serial_port": "/dev/ttyACM0",   # host snip only
+    "baud_rate": 1000000,            # host snip only
+    "axon_map_file": "axon_map.bin", # host snip only
+    "host_snip_schedule": "every_k", # host snip only: every_k, data or adaptive, see include/HostSnipSchedule.h
+    "host_snip_stride": 1,           # every_k: timesteps between runs, adaptive: the starting stride
+    "host_snip_max_stride": 32,      # adaptive: longest stride
+    "host_snip_target_spikes": 4,    # adaptive: spikes a run should find waiting
+    "host_snip_poll_us": 100,        # data: idle poll period of the concurrent host snip [us]
+}
+
+HOST_SNIP_SCHEDULES = ("every_k", "data", "adaptive")
+
+
+class Topology:
+    """
+    Attributes:
+        Every key of DEFAULTS, plus the derived bitmask_words, decoder_msg_words and decoder_msg_size.
+    """
+
+    def __init__(self, source="topology.json", **spec):
+        unknown = set(spec) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown topology keys: {sorted(unknown)}")
+        self.source = source
+        for key, default in DEFAULTS.items():
+            setattr(self, key, spec.get(key, default))
+        if self.num_inputs < 1 or self.num_outputs < 1:
+            raise ValueError("a topology needs at least one input and one output port")
+        if self.host_snip_schedule not in HOST_SNIP_SCHEDULES:
+            raise ValueError(f"host_snip_schedule must be one of {HOST_SNIP_SCHEDULES}")
+        if self.host_snip_stride < 1 or self.host_snip_max_stride < 1:
+            raise ValueError("host snip strides must be at least 1")
+        if max(self.host_snip_stride, self.host_snip_max_stride) > self.channel_buffer_size:
+            # The decoder snip writes up to one nxDecoder message per timestep and the host snip drains them once
+            # per stride, a longer stride fills the channel and stalls the chip
+            raise ValueError("host snip strides must not exceed channel_buffer_size")
+        if self.encoder_msg_size < 4 or self.encoder_msg_size % 4:
+            raise ValueError("encoder_msg_size must be a multiple of 4, the encoder snip reads ints")
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(source=os.path.basename(path), **json.load(f))
+
+    def replace(self, **changes):
+        """A copy of this topology with some keys changed."""
+        spec = {key: getattr(self, key) for key in DEFAULTS}
+        spec.update(changes)
+        return Topology(source=self.source, **spec)
+
+    @property
+    def ports_per_message(self):
+        return self.encoder_msg_size // 4
+
+    @property
+    def bitmask_words(self):
+        return bitmask_words(self.num_outputs)
+
+    @property
+    def decoder_msg_words(self):
+        return message_words(self.num_outputs)
+
+    @property
+    def decoder_msg_size(self):
+        return 4 * self.decoder_msg_words
+
+    def _write(self, path, guard, body):
+        text = (GENERATED_BANNER.format(source=self.source) +
+                f"#ifndef {guard}\n#define {guard}\n\n" + body + f"\n#endif // {guard}\n")
+        try:
+            with open(path) as f:
+                if f.read() == text:
+                    return False
+        except OSError:
+            pass
+        with open(path, "w") as f:
+            f.write(text)
+        return True
+
+    def write_snip_header(self, snip_dir, name="topology.h"):
+        """Writes the dimensions and constants shared by the snips. Returns True if the file changed."""
+        body = (f"#define NUM_INPUTS {self.num_inputs}\n"
+                f"#define OUTPUT_DIM {self.num_outputs}\n"
+                f"#define CHANNEL_BUFFER_SIZE {self.channel_buffer_size}\n"
+                f"#define ENCODER_MSG_SIZE {self.encoder_msg_size}\n"
+                f"#define ENCODER_MSG_WORDS {self.ports_per_message}  // input port numbers per message\n"
+                f"#define EMPTY_PORT -1  // pads an encoder message that is not full\n"
+                f"#define DECODER_MSG_SIZE {self.decoder_msg_size}\n"
+                f"#define SPIKE_COUNTER_OFFSET 0x{self.spike_counter_offset:X}\n"
+                f"#define CORE_ID_OFFSET {self.core_id_offset}\n"
+                f"#define ENCODER_CHANNEL \"{self.encoder_channel}\"\n"
+                f"#define DECODER_CHANNEL \"{self.decoder_channel}\"\n")
+        return self._write(os.path.join(snip_dir, name), "TOPOLOGY_H", body)
+
+    def write_port_header(self, snip_dir, input_axons=None, input_chips=None, input_cores=None,
+                          name="topology_ports.h"):
+        """
+        Writes the physical placement of every input port. Without arguments port i maps to axon i on chip 0,
+        core 0, the placement N2Compiler gives the dummy pipelines. Returns True if the file changed.
+        """
+        columns = []
+        for label, values in (("INPUT_AXON", input_axons), ("INPUT_CHIP", input_chips), ("INPUT_CORE", input_cores)):
+            if values is None:
+                values = range(self.num_inputs) if label == "INPUT_AXON" else [0] * self.num_inputs
+            values = [int(v) for v in values]
+            if len(values) != self.num_inputs:
+                raise ValueError(f"{label} has {len(values)} entries, the topology has {self.num_inputs} inputs")
+            columns.append(f"static const int {label}[NUM_INPUTS] = {{{', '.join(map(str, values))}}};\n")
+        body = '#include "topology.h"\n\n' + "".join(columns)
+        return self._write(os.path.join(snip_dir, name), "TOPOLOGY_PORTS_H", body)
+
+    def write_host_config(self, include_dir, name="host_snip_config.h"):
+        """Writes the host snip's serial, channel and schedule settings. Returns True if the file changed."""
+        body = (f"#define USB_SERIAL_PORT \"{self.serial_port}\"\n"
+                f"#define BAUD_RATE {self.baud_rate}\n"
+                f"#define ENCODER_CHANNEL_NAME \"{self.encoder_channel}\"\n"
+                f"#define DECODER_CHANNEL_NAME \"{self.decoder_channel}\"\n"
+                f"#define AXON_MAP_FILE \"{self.axon_map_file}\"\n"
+                f"#define HOST_SNIP_SCHEDULE HOST_SNIP_SCHEDULE_{self.host_snip_schedule.upper()}\n"
+                f"#define HOST_SNIP_STRIDE {self.host_snip_stride}\n"
+                f"#define HOST_SNIP_MAX_STRIDE {self.host_snip_max_stride}\n"
+                f"#define HOST_SNIP_TARGET_SPIKES {float(self.host_snip_target_spikes)}\n"
+                f"#define HOST_SNIP_POLL_US {self.host_snip_poll_us}\n")
+        return self._write(os.path.join(include_dir, name), "HOST_SNIP_CONFIG_H", body)
+
+
+def pack_ports(ports, ports_per_message):
+    """
+    Packs input port numbers into nxEncoder messages of `ports_per_message` words each, as little-endian ints.
+    The last message is padded with EMPTY_PORT.
+    """
+    messages = []
+    for start in range(0, len(ports), ports_per_message):
+        words = list(ports[start:start + ports_per_message])
+        words += [EMPTY_PORT] * (ports_per_message - len(words))
+        messages.append(sum(int(word) << (32 * ii) for ii, word in enumerate(words)))
+    return messages
+
+
+def unpack_ports(message, ports_per_message):
+    """The input port numbers in one nxEncoder message, padding dropped."""
+    words = ((message >> (32 * ii)) & 0xFFFFFFFF for ii in range(ports_per_message))
+    return [word for word in words if word != EMPTY_PORT]